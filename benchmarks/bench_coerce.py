@@ -0,0 +1,69 @@
+"""
+Benchmarks coercing nested `Object` and `Array` payloads to native types.
+
+Compares instantiating the type and then applying its native type, which is
+what `handle_http` used to do, with :meth:`~doctor.types.SuperType.coerce`.
+Peak memory is measured with `tracemalloc`.
+"""
+import tracemalloc
+
+from doctor.types import array, boolean, integer, new_type, string, Object
+
+from .utils import bench
+
+
+Address = new_type(Object, description='An address.', properties={
+    'street': string('street'),
+    'city': string('city'),
+    'zip': string('zip', pattern=r'^\d{5}$'),
+})
+Order = new_type(Object, description='An order.', properties={
+    'order_id': integer('order id', minimum=1),
+    'paid': boolean('paid'),
+    'items': array('items', items=string('item')),
+    'shipping': Address,
+})
+Customer = new_type(Object, description='A customer.', properties={
+    'name': string('name'),
+    'addresses': array('addresses', items=Address),
+    'orders': array('orders', items=Order),
+})
+
+
+def make_payload(num_orders: int) -> dict:
+    address = {'street': '1 Main St', 'city': 'Portland', 'zip': '97201'}
+    return {
+        'name': 'John',
+        'addresses': [dict(address) for _ in range(5)],
+        'orders': [{'order_id': i + 1, 'paid': True, 'items': ['a', 'b'],
+                    'shipping': dict(address)} for i in range(num_orders)],
+    }
+
+
+def instantiate(value: dict) -> dict:
+    return Customer.native_type(Customer(value))
+
+
+def peak_memory(func, value) -> int:
+    tracemalloc.start()
+    result = func(value)  # noqa: F841
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    payload = make_payload(500)
+    bench('instantiate + native_type, 500 orders',
+          lambda: instantiate(payload), number=20)
+    bench('coerce, 500 orders', lambda: Customer.coerce(payload), number=20)
+    print('{:<50} {:>12} KiB'.format(
+        'instantiate + native_type, peak memory',
+        peak_memory(instantiate, payload) // 1024))
+    print('{:<50} {:>12} KiB'.format(
+        'coerce, peak memory',
+        peak_memory(Customer.coerce, payload) // 1024))
+
+
+if __name__ == '__main__':
+    main()
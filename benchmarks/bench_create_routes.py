@@ -0,0 +1,62 @@
+"""
+Benchmarks registering apps with thousands of routes.
+
+Synthetic routes with a GET and a POST method each are created with
+:class:`~doctor.routing.HTTPMethod` and passed to
+:func:`~doctor.flask.create_routes`.  The time per route should stay the same
+as the number of routes grows.  Adding the resources to a Flask app is also
+timed for reference, since it is usually the larger part of the startup time.
+"""
+from flask import Flask
+from flask_restful import Api
+
+from doctor.flask import create_routes
+from doctor.routing import get, post, Route
+from doctor.types import integer, string
+
+from .utils import bench
+
+ItemId = integer('An item id.', minimum=1, example=1)
+Name = string('A name.', example='name')
+
+
+def get_item(item_id: ItemId, name: Name = 'name') -> Name:
+    return name
+
+
+def create_item(name: Name) -> Name:
+    return name
+
+
+def make_routes(num_routes: int):
+    # All routes share a heading, so their handler names conflict.
+    return [
+        Route('/items{}/<int:item_id>/'.format(i), heading='Items',
+              methods=[get(get_item), post(create_item)])
+        for i in range(num_routes)]
+
+
+def add_resources(routes):
+    api = Api(Flask('bench'))
+    for route, resource in create_routes(routes):
+        api.add_resource(resource, route)
+
+
+def main():
+    for num_routes in (1000, 10000):
+        routes = make_routes(num_routes)
+        best = bench('HTTPMethods, {} routes'.format(num_routes),
+                     lambda: make_routes(num_routes), number=1, repeat=3)
+        print('{:<50} {:>12.2f} us'.format(
+            '  per route', best / num_routes * 1e6))
+        best = bench('create_routes, {} routes'.format(num_routes),
+                     lambda: create_routes(routes), number=1, repeat=3)
+        print('{:<50} {:>12.2f} us'.format(
+            '  per route', best / num_routes * 1e6))
+    routes = make_routes(1000)
+    bench('flask add_resource, 1000 routes', lambda: add_resources(routes),
+          number=1, repeat=1)
+
+
+if __name__ == '__main__':
+    main()
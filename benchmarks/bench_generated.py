@@ -0,0 +1,39 @@
+"""
+Benchmarks validating large random payloads.
+
+The payloads are generated from the types with
+:class:`~doctor.payloads.PayloadGenerator`, so they cover every property and
+constraint of the types instead of a single hand written example.
+"""
+from doctor.payloads import PayloadGenerator
+from doctor.types import (
+    array, boolean, enum, integer, new_type, number, string, Object)
+
+from .utils import bench
+
+
+Tag = string('tag', pattern=r'^[a-z]{3,10}$')
+Event = new_type(Object, description='An event.', properties={
+    'event_id': integer('event id', minimum=1),
+    'kind': enum('kind', enum=['click', 'view', 'purchase']),
+    'value': number('value', minimum=0, maximum=1000),
+    'occurred': string('occurred', format='date-time'),
+    'tags': array('tags', items=Tag, max_items=5),
+    'sampled': boolean('sampled'),
+}, required=['event_id', 'kind'])
+Events = array('events', items=Event)
+
+
+def main():
+    for num_events in (100, 1000):
+        generator = PayloadGenerator(seed=0, array_length=num_events,
+                                     optional_probability=0.8)
+        payload = generator.valid(Events)
+        bench('instantiate, {} events'.format(num_events),
+              lambda: Events(payload), number=10)
+        bench('coerce, {} events'.format(num_events),
+              lambda: Events.coerce(payload), number=10)
+
+
+if __name__ == '__main__':
+    main()
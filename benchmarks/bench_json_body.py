@@ -0,0 +1,65 @@
+"""
+Benchmarks validating POST bodies with hundreds of properties.
+
+Compares :meth:`~doctor.types.SuperType.coerce`, which copies the body, with
+:meth:`~doctor.types.SuperType.coerce_json`, which validates the containers
+decoded from a JSON body in place.  Validating a body in place is idempotent,
+so the same payload is reused for every call.
+"""
+import tracemalloc
+
+from doctor.types import array, boolean, integer, new_type, number, string, \
+    Object
+
+from .utils import bench
+
+
+def make_type(num_fields: int) -> Object:
+    properties = {}
+    for i in range(num_fields):
+        kind = i % 5
+        if kind == 0:
+            prop = string('field', max_length=100)
+        elif kind == 1:
+            prop = integer('field', minimum=0)
+        elif kind == 2:
+            prop = number('field', maximum=1000)
+        elif kind == 3:
+            prop = boolean('field')
+        else:
+            prop = array('field', items=integer('item'), max_items=10)
+        properties['field_{}'.format(i)] = prop
+    return new_type(Object, description='A body.', properties=properties)
+
+
+def make_payload(num_fields: int) -> dict:
+    values = ['value', 10, 1.5, True, [1, 2, 3]]
+    return {'field_{}'.format(i): values[i % 5] for i in range(num_fields)}
+
+
+def peak_memory(func, value) -> int:
+    tracemalloc.start()
+    result = func(value)  # noqa: F841
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    for num_fields in (100, 500):
+        Body = make_type(num_fields)
+        payload = make_payload(num_fields)
+        bench('coerce, {} fields'.format(num_fields),
+              lambda: Body.coerce(payload), number=200)
+        bench('coerce_json, {} fields'.format(num_fields),
+              lambda: Body.coerce_json(payload), number=200)
+        print('{:<50} {:>12} KiB'.format(
+            'coerce, {} fields, peak memory'.format(num_fields),
+            peak_memory(Body.coerce, payload) // 1024))
+        print('{:<50} {:>12} KiB'.format(
+            'coerce_json, {} fields, peak memory'.format(num_fields),
+            peak_memory(Body.coerce_json, payload) // 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Benchmarks validating a wide object when only a few properties are used.
+
+Compares :meth:`~doctor.types.SuperType.coerce` with
+:meth:`~doctor.types.Object.coerce_lazy`, reading 3 of the properties.
+"""
+from doctor.payloads import PayloadGenerator
+from doctor.types import integer, new_type, string, Object
+
+from .utils import bench
+
+
+def make_type(num_fields: int) -> Object:
+    properties = {}
+    for i in range(num_fields):
+        if i % 2:
+            prop = string('field', max_length=100, pattern=r'^[a-z]+$')
+        else:
+            prop = integer('field', minimum=0)
+        properties['field_{}'.format(i)] = prop
+    return new_type(Object, description='A wide object.',
+                    properties=properties, additional_properties=False)
+
+
+def read_fields(value):
+    return value['field_0'], value['field_1'], value['field_2']
+
+
+def main():
+    for num_fields in (100, 500):
+        Wide = make_type(num_fields)
+        payload = PayloadGenerator(seed=0, optional_probability=1).valid(Wide)
+        bench('coerce, {} fields, read 3'.format(num_fields),
+              lambda: read_fields(Wide.coerce(payload)), number=200)
+        bench('coerce_lazy, {} fields, read 3'.format(num_fields),
+              lambda: read_fields(Wide.coerce_lazy(payload)), number=200)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmarks decoding and validating request bodies as JSON and MessagePack.
+
+Each iteration decodes a body with hundreds of properties and validates it
+in place with :meth:`~doctor.types.SuperType.coerce_json`, like
+:func:`~doctor.flask.handle_http` does.  This requires the `msgpack` package.
+"""
+import json
+
+from .bench_json_body import make_payload, make_type
+from .utils import bench
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def main():
+    if msgpack is None:
+        print('Install msgpack to run this benchmark.')
+        return
+    for num_fields in (100, 500):
+        Body = make_type(num_fields)
+        payload = make_payload(num_fields)
+        json_body = json.dumps(payload).encode('utf-8')
+        msgpack_body = msgpack.packb(payload, use_bin_type=True)
+        print('{:<50} {:>12} B'.format(
+            'json, {} fields, size'.format(num_fields), len(json_body)))
+        print('{:<50} {:>12} B'.format(
+            'msgpack, {} fields, size'.format(num_fields), len(msgpack_body)))
+        bench('json decode, {} fields'.format(num_fields),
+              lambda: json.loads(json_body), number=200)
+        bench('msgpack decode, {} fields'.format(num_fields),
+              lambda: msgpack.unpackb(msgpack_body, raw=False), number=200)
+        bench('json decode + validate, {} fields'.format(num_fields),
+              lambda: Body.coerce_json(json.loads(json_body)), number=200)
+        bench('msgpack decode + validate, {} fields'.format(num_fields),
+              lambda: Body.coerce_json(
+                  msgpack.unpackb(msgpack_body, raw=False)), number=200)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmarks validating large `Array` payloads of `Number` and `Integer` items.
+
+Compares validating each item, the bulk path using NumPy and the bulk path
+using the `array` module.
+"""
+import random
+
+import doctor.types
+from doctor.types import array, integer, number
+
+from .utils import bench
+
+
+NUM_ITEMS = 100000
+
+Readings = array('readings', items=number(
+    'reading', minimum=-1000, maximum=1000, multiple_of=0.5))
+Counts = array('counts', items=integer(
+    'count', minimum=0, maximum=10 ** 6, multiple_of=2))
+
+
+def run(label: str, readings: list, counts: list):
+    bench('{}, {} numbers'.format(label, NUM_ITEMS),
+          lambda: Readings(readings), number=5)
+    bench('{}, {} integers'.format(label, NUM_ITEMS),
+          lambda: Counts(counts), number=5)
+
+
+def main():
+    readings = [random.randint(-2000, 2000) * 0.5 for _ in range(NUM_ITEMS)]
+    counts = [random.randint(0, 500000) * 2 for _ in range(NUM_ITEMS)]
+
+    min_items = doctor.types.BULK_NUMERIC_MIN_ITEMS
+    installed_numpy = doctor.types.numpy
+    try:
+        doctor.types.BULK_NUMERIC_MIN_ITEMS = NUM_ITEMS + 1
+        run('per item', readings, counts)
+        doctor.types.BULK_NUMERIC_MIN_ITEMS = min_items
+        if installed_numpy is not None:
+            run('bulk numpy', readings, counts)
+        doctor.types.numpy = None
+        run('bulk array module', readings, counts)
+    finally:
+        doctor.types.BULK_NUMERIC_MIN_ITEMS = min_items
+        doctor.types.numpy = installed_numpy
+
+
+if __name__ == '__main__':
+    main()
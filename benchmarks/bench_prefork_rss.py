@@ -0,0 +1,146 @@
+"""
+Measures the memory of pre-forked workers with and without freezing.
+
+An app with thousands of routes is created in a master process, which forks
+workers that each send a request to every route, like a pre-forking server.
+The total proportional set size (PSS) of the master and the workers is
+reported, which counts the pages they share copy-on-write once, first
+without and then with `doctor.warmup(app, freeze=True)` called before
+forking.  This requires Linux and Python 3.7 or later.
+
+    python -m benchmarks.bench_prefork_rss --routes 2000 --workers 8
+"""
+import argparse
+import gc
+import os
+import signal
+import subprocess
+import sys
+from typing import Sequence
+
+from flask import Flask
+from flask_restful import Api
+
+import doctor
+from doctor.flask import create_routes
+from doctor.routing import get, Route
+from doctor.types import array, boolean, enum, integer, Object, string
+
+
+def make_app(num_routes: int) -> Flask:
+    """Returns an app with a route, and its own types, per item kind."""
+    routes = []
+    for i in range(num_routes):
+        Code = string('Code {}.'.format(i), pattern=r'^[A-Z]{3}\d*$',
+                      example='ABC')
+        Color = enum('Color {}.'.format(i), enum=['blue', 'green', 'red'],
+                     example='blue')
+        ItemId = integer('Item id {}.'.format(i), minimum=1, example=1)
+        Item = type('Item{}'.format(i), (Object,), {
+            'description': 'Item {}.'.format(i),
+            'properties': {
+                'item_id': ItemId,
+                'code': Code,
+                'color': Color,
+                'in_stock': boolean('In stock?'),
+            },
+            'required': ['item_id'],
+        })
+        Items = array('Items {}.'.format(i), items=Item)
+
+        def get_items(item_id: ItemId, code: Code = 'ABC',
+                      color: Color = 'blue') -> Items:
+            return [{'item_id': item_id, 'code': code, 'color': color,
+                     'in_stock': True}]
+
+        routes.append(Route('/items{}/<int:item_id>/'.format(i), methods=[
+            get(get_items)], handler_name='Items{}Handler'.format(i)))
+
+    app = Flask('bench')
+    api = Api(app)
+    for route, resource in create_routes(routes):
+        api.add_resource(resource, route)
+    return app
+
+
+def get_pss(pid: int) -> int:
+    """Returns the proportional set size of a process in bytes."""
+    with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def run_master(num_routes: int, num_workers: int, freeze: bool) -> int:
+    """Forks workers that request every route and returns the total PSS."""
+    if freeze:
+        gc.disable()
+    app = make_app(num_routes)
+    if freeze:
+        doctor.warmup(app, freeze=True)
+    paths = ['/items{}/1/?code=XYZ1&color=red'.format(i)
+             for i in range(num_routes)]
+
+    pids = []
+    read_fd, write_fd = os.pipe()
+    for _ in range(num_workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            if freeze:
+                gc.enable()
+            client = app.test_client()
+            for path in paths:
+                client.get(path)
+            gc.collect()
+            os.write(write_fd, b'.')
+            signal.pause()
+            os._exit(0)
+        pids.append(pid)
+    os.close(write_fd)
+    # Wait until every worker has handled its requests.
+    ready = 0
+    while ready < num_workers:
+        ready += len(os.read(read_fd, num_workers))
+
+    total = get_pss(os.getpid()) + sum(get_pss(pid) for pid in pids)
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    return total
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_prefork_rss',
+        description='Compares the memory of pre-forked workers with and '
+                    'without freezing.')
+    parser.add_argument('--routes', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--freeze', choices=['yes', 'no'],
+                        help='Run a single master process and print its '
+                             'total PSS in bytes.')
+    args = parser.parse_args(argv)
+
+    if args.freeze is not None:
+        print(run_master(args.routes, args.workers, args.freeze == 'yes'))
+        return
+    if not hasattr(gc, 'freeze'):
+        print('This benchmark requires Python 3.7 or later.')
+        return
+
+    # Each mode runs in a fresh interpreter so they do not share memory.
+    print('{} routes, {} workers'.format(args.routes, args.workers))
+    for freeze in ('no', 'yes'):
+        output = subprocess.check_output([
+            sys.executable, '-m', 'benchmarks.bench_prefork_rss',
+            '--routes', str(args.routes), '--workers', str(args.workers),
+            '--freeze', freeze])
+        total = int(output.decode('utf-8').split()[-1])
+        print('{:<50} {:>12.1f} MB'.format(
+            'total PSS, freeze={}'.format(freeze), total / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
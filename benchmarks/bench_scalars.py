@@ -0,0 +1,31 @@
+"""
+Benchmarks validating `String`, `Integer`, `Number` and `Boolean` values.
+
+Each type is timed with a value that already has the native type and with a
+value that needs to be coerced.
+"""
+from doctor.types import boolean, integer, number, string
+
+from .utils import bench
+
+
+Name = string('name', min_length=1, max_length=100)
+Slug = string('slug', pattern=r'^[a-z0-9-]+$')
+Count = integer('count', minimum=0, maximum=1000)
+Ratio = number('ratio', minimum=0, maximum=1)
+Enabled = boolean('enabled')
+
+
+def main():
+    bench('String, str', lambda: Name('John Smith'), number=100000)
+    bench('String with pattern, str', lambda: Slug('a-slug'), number=100000)
+    bench('Integer, int', lambda: Count(10), number=100000)
+    bench('Integer, str', lambda: Count('10'), number=100000)
+    bench('Number, float', lambda: Ratio(0.5), number=100000)
+    bench('Number, int', lambda: Ratio(1), number=100000)
+    bench('Boolean, bool', lambda: Enabled(True), number=100000)
+    bench('Boolean, str', lambda: Enabled('false'), number=100000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmarks `UnionType` validation of the last of many `Object` variants.
+
+Compares trying each type in order, dispatching on a discriminator property
+and dispatching on the JSON type of the value.
+"""
+from doctor.types import enum, integer, new_type, string, Object, UnionType
+
+from .utils import bench
+
+
+NUM_VARIANTS = 10
+
+
+def make_variant(i: int):
+    return new_type(
+        Object, description='Variant {}.'.format(i),
+        properties={
+            'kind': enum('kind', enum=['variant{}'.format(i)]),
+            'name': string('name', min_length=1),
+            'count': integer('count', minimum=0),
+        },
+        required=['kind', 'name', 'count'],
+        additional_properties=False)
+
+
+VARIANTS = [make_variant(i) for i in range(NUM_VARIANTS)]
+
+
+class Ordered(UnionType):
+    description = 'Tries each variant in order.'
+    types = VARIANTS
+
+
+class Discriminated(UnionType):
+    description = 'Dispatches on the kind property.'
+    types = VARIANTS
+    discriminator = 'kind'
+
+
+class JsonDispatched(UnionType):
+    description = 'Dispatches on the JSON type.'
+    types = [string('a string'), integer('an int')] + VARIANTS[-1:]
+    dispatch_json_type = True
+
+
+def main():
+    last = {'kind': 'variant{}'.format(NUM_VARIANTS - 1), 'name': 'foo',
+            'count': 1}
+    bench('ordered, last variant', lambda: Ordered(last))
+    bench('discriminator, last variant', lambda: Discriminated(last))
+    bench('json type, object variant', lambda: JsonDispatched(last))
+
+
+if __name__ == '__main__':
+    main()
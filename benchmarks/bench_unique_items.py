@@ -0,0 +1,49 @@
+"""
+Benchmarks `unique_items` checking for an `Array` of objects.
+
+Compares the canonical key check used by `Array` with a pairwise comparison
+of every item, which is what a custom `validate` method had to do before.
+"""
+from doctor.types import array, integer, string, Object
+
+from .utils import bench
+
+
+NUM_ITEMS = 50000
+NUM_PAIRWISE_ITEMS = 2000
+
+
+class Tag(Object):
+    description = 'A tag.'
+    properties = {
+        'name': string('name'),
+        'weight': integer('weight'),
+    }
+
+
+Tags = array('tags', items=Tag, unique_items=True)
+TagsNotUnique = array('tags', items=Tag)
+
+
+def pairwise_unique(items: list) -> bool:
+    for i, item in enumerate(items):
+        for other in items[:i]:
+            if item == other:
+                return False
+    return True
+
+
+def main():
+    tags = [{'name': 'tag{}'.format(i), 'weight': i, 'labels': [i, {'x': i}]}
+            for i in range(NUM_ITEMS)]
+    bench('validate only, {} objects'.format(NUM_ITEMS),
+          lambda: TagsNotUnique(tags), number=1)
+    bench('unique_items, {} objects'.format(NUM_ITEMS),
+          lambda: Tags(tags), number=1)
+    pairwise = tags[:NUM_PAIRWISE_ITEMS]
+    bench('pairwise comparison, {} objects'.format(NUM_PAIRWISE_ITEMS),
+          lambda: pairwise_unique(pairwise), number=1, repeat=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Each benchmark is a module that can be run from the root of the repository,
+e.g. `python -m benchmarks.bench_union`.
+"""
+import timeit
+from typing import Callable
+
+
+def bench(name: str, func: Callable, number: int = 1000,
+          repeat: int = 5) -> float:
+    """Times a function and prints the best time per call.
+
+    :param name: The name to print for the benchmark.
+    :param func: A callable that takes no arguments.
+    :param number: The number of times to call `func` per repetition.
+    :param repeat: The number of repetitions.  The best is reported.
+    :returns: The best time per call in seconds.
+    """
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print('{:<50} {:>12.2f} us'.format(name, best * 1e6))
+    return best
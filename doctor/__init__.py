@@ -3,9 +3,14 @@ from ._version import __version__
 
 from . import errors
 from . import parsers
+from . import profiler
 from . import response
 from . import resource
 from . import routing
 from . import schema
+from .startup import warmup
 
-__all__ = [__version__, errors, parsers, response, resource, routing, schema]
+__all__ = [__version__, errors, parsers, profiler, response, resource,
+           routing, schema, warmup]
+
+profiler.enable_from_environment()
@@ -0,0 +1,182 @@
+"""
+Memoization of logic functions.
+
+Logic functions are passed parameters that doctor has already validated and
+coerced to native types, so equal requests call them with equal arguments.
+:func:`memoize` caches their results keyed by those arguments, with objects
+and arrays keyed canonically, regardless of the order of keys in objects.
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+from .routing import Deadline
+from .types import get_json_key
+
+#: The statistics of a :class:`Cache`.
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class Cache(object):
+    """A thread safe cache with LRU and TTL eviction.
+
+    Concurrent misses of the same key are computed once; the other callers
+    wait for the result instead of computing it too.
+
+    :param maxsize: The maximum number of entries, or None for no maximum.
+        The least recently used entry is evicted when it is exceeded.
+    :param ttl: The number of seconds entries are kept for, or None to keep
+        them until they are evicted.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Maps each key to a tuple of the time it expires and its value.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Maps each key being computed to its lock and number of callers.
+        self._key_locks = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any):
+        """Stores a value in the cache.
+
+        :param key: The key.
+        :param value: The value.
+        """
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+    def get_or_call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Returns the cached value of a key, calling a function on a miss.
+
+        :param key: The key.
+        :param func: Called with no arguments to compute the value.  If it
+            raises an exception, nothing is cached and the exception is
+            raised to the caller.
+        :returns: The value.
+        """
+        found, value = self._get(key)
+        if found:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = [threading.Lock(), 0]
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                # Another caller may have computed it while we waited.
+                found, value = self._get(key)
+                if found:
+                    return value
+                with self._lock:
+                    self.misses += 1
+                value = func()
+                self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+    def info(self) -> CacheInfo:
+        """Returns the statistics of the cache."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self._entries))
+
+    def clear(self):
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def memoize(ttl: float = None, maxsize: int = 128) -> Callable:
+    """Decorator that caches the results of a logic function.
+
+    The results are keyed by the arguments the function is called with,
+    with omitted arguments taking their defaults.  Arguments annotated with
+    :class:`~doctor.routing.Deadline` are not part of the key.  If any of
+    the arguments can not be hashed, even canonically, the function is
+    called without caching the result.
+
+    The signature of the decorated function is that of the logic function,
+    so it can be passed to :class:`~doctor.routing.HTTPMethod`.  It has a
+    `cache` attribute with the :class:`Cache`, and `cache_info` and
+    `cache_clear` functions like :func:`functools.lru_cache`.
+
+    .. code-block:: python
+
+        @memoize(ttl=60, maxsize=1024)
+        def get_note(note_id: NoteId) -> Note:
+            ...
+
+    Only use this for logic functions without side effects, since cached
+    results are shared by requests.
+
+    :param ttl: The number of seconds results are cached for, or None to
+        cache them until they are evicted.
+    :param maxsize: The maximum number of cached results, or None for no
+        maximum.
+    :returns: The decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            raise TypeError('memoize does not support coroutine functions.')
+        sig = inspect.signature(func)
+        # The deadline of a request differs for every request.
+        ignored = frozenset(
+            name for name, param in sig.parameters.items()
+            if param.annotation is Deadline)
+        cache = Cache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                bound = sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = get_json_key({
+                    name: value for name, value in bound.arguments.items()
+                    if name not in ignored})
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+            return cache.get_or_call(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -0,0 +1,207 @@
+"""
+Compression of HTTP request and response bodies.
+
+Responses are compressed with gzip or deflate, or brotli if the `brotli`
+package is installed, negotiated from the `Accept-Encoding` header of the
+request.  Request bodies compressed with gzip or deflate are decompressed up
+to a maximum size.  See :func:`doctor.flask.enable_compression` to enable it
+for a Flask app.
+"""
+import zlib
+from typing import IO, Dict, Iterable, Iterator, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from .errors import InvalidValueError, PayloadTooLargeError
+
+#: The response encodings that are supported, most preferred first.
+ENCODINGS = (('br',) if brotli is not None else ()) + ('gzip', 'deflate')
+
+#: The request encodings that can be decompressed.
+REQUEST_ENCODINGS = ('gzip', 'deflate')
+
+#: The wbits of gzip streams.
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+#: The wbits to decompress both gzip and zlib streams.
+_AUTO_WBITS = 32 + zlib.MAX_WBITS
+
+#: The size of the chunks request bodies are read in.
+_CHUNK_SIZE = 64 * 1024
+
+#: Mimetypes of responses that are compressed, besides `text/*`, `*+json` and
+#: `*+xml` mimetypes.
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/javascript',
+    'application/json',
+    'application/xml',
+))
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    """Returns True if responses with a mimetype should be compressed.
+
+    :param mimetype: The mimetype, without parameters.
+    """
+    if not mimetype:
+        return False
+    return (mimetype in COMPRESSIBLE_MIMETYPES or
+            mimetype.startswith('text/') or
+            mimetype.endswith(('+json', '+xml')))
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parses an `Accept-Encoding` header.
+
+    :param header: The header, e.g. `gzip;q=1.0, br;q=0.5, *;q=0`.
+    :returns: A dict mapping each lowercase encoding to its quality.
+    """
+    qualities = {}
+    for item in (header or '').split(','):
+        encoding, _, params = item.partition(';')
+        encoding = encoding.strip().lower()
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[encoding] = quality
+    return qualities
+
+
+def negotiate_encoding(header: Optional[str],
+                       encodings: Sequence[str] = ENCODINGS
+                       ) -> Optional[str]:
+    """Returns the encoding a response should be compressed with.
+
+    :param header: The `Accept-Encoding` header of the request.
+    :param encodings: The supported encodings, most preferred first.  This
+        breaks ties between encodings the client accepts equally.
+    :returns: The encoding with the highest quality, or None if the client
+        does not accept any of them.
+    """
+    qualities = parse_accept_encoding(header)
+    default = qualities.get('*', 0.0)
+    best = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best = encoding
+            best_quality = quality
+    return best
+
+
+def _compressobj(encoding: str, level: int):
+    if encoding == 'gzip':
+        return zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    if encoding == 'deflate':
+        return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+    raise ValueError('Unsupported encoding: {}'.format(encoding))
+
+
+def compress(data: bytes, encoding: str, level: int = 6,
+             brotli_quality: int = 4) -> bytes:
+    """Compresses a response body.
+
+    :param data: The body.
+    :param encoding: One of :data:`ENCODINGS`.
+    :param level: The zlib compression level of gzip and deflate, from 1 to
+        9.
+    :param brotli_quality: The brotli quality, from 0 to 11.
+    :returns: The compressed body.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    compressor = _compressobj(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = 6,
+                    brotli_quality: int = 4) -> Iterator[bytes]:
+    """Compresses a streamed response body.
+
+    Each chunk is flushed, so the client can decompress it as soon as it is
+    received.
+
+    :param chunks: The chunks of the body.
+    :param encoding: One of :data:`ENCODINGS`.
+    :param level: The zlib compression level of gzip and deflate.
+    :param brotli_quality: The brotli quality.
+    :returns: An iterator of the compressed chunks.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = _compressobj(encoding, level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def decompress_stream(stream: IO[bytes], encoding: str, max_size: int,
+                      length: int = None) -> bytes:
+    """Decompresses a request body, without using more memory than needed.
+
+    :param stream: The stream to read the compressed body from.
+    :param encoding: One of :data:`REQUEST_ENCODINGS`.
+    :param max_size: The maximum size of the decompressed body in bytes.
+    :param length: The length of the compressed body, if known.  If not, the
+        stream is read until it ends.
+    :returns: The decompressed body.
+    :raises PayloadTooLargeError: If the decompressed body is larger than
+        `max_size`.
+    :raises InvalidValueError: If the body is not valid.
+    """
+    if encoding not in REQUEST_ENCODINGS:
+        raise InvalidValueError(
+            'Unsupported Content-Encoding: {}'.format(encoding))
+    decompressor = zlib.decompressobj(_AUTO_WBITS)
+    chunks = []
+    size = 0
+    remaining = length
+    try:
+        while not decompressor.eof:
+            read_size = _CHUNK_SIZE
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                read_size = min(read_size, remaining)
+            data = stream.read(read_size)
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            while data:
+                # Never inflate more than one byte past the maximum size.
+                chunk = decompressor.decompress(data, max_size + 1 - size)
+                size += len(chunk)
+                if size > max_size:
+                    raise PayloadTooLargeError(
+                        'The decompressed request body is larger than {} '
+                        'bytes.'.format(max_size))
+                chunks.append(chunk)
+                data = decompressor.unconsumed_tail
+    except zlib.error:
+        raise InvalidValueError(
+            'The request body is not valid {}.'.format(encoding))
+    if not decompressor.eof:
+        raise InvalidValueError(
+            'The request body is not valid {}.'.format(encoding))
+    return b''.join(chunks)
@@ -1,4 +1,13 @@
+#: The names of the handler methods of HTTP methods routes can define.
+HTTP_METHODS = ('delete', 'get', 'patch', 'post', 'put')
+
 #: HTTP methods that are allowed to have a JSON body.  Technically all HTTP
 #: methods are allowed to have a body, but some like GET/DELETE have no
 #: contextual meaning server side, so should not be used.
 HTTP_METHODS_WITH_JSON_BODY = ('PATCH', 'POST', 'PUT')
+
+#: The mimetype of MessagePack request and response bodies.
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+#: Mimetypes of request bodies that are decoded as MessagePack.
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
@@ -80,25 +80,20 @@ class AutoFlaskHarness(BaseHarness):
                 rule, view_class, annotations = item
                 yield (heading, rule, view_class, annotations)
 
-    def request(self, rule, view_class, annotation):
-        """Make a request against the app.
-
-        This attempts to use the schema to replace any url params in the path
-        pattern. If there are any unused parameters in the schema, after
-        substituting the ones in the path, they will be sent as query string
-        parameters or form parameters. The substituted values are taken from
-        the "example" value in the schema.
+    def build_request(self, rule, annotation):
+        """Builds the arguments of an example request for an annotation.
 
         Returns a dict with the following keys:
 
-        - **url** -- Example URL, with url_prefix added to the path pattern,
-          and the example values substituted in for URL params.
-        - **method** -- HTTP request method (e.g. "GET").
+        - **method** -- The lowercase name of the test client method for the
+          HTTP request method (e.g. "get").
+        - **path** -- The path with the example values substituted in for URL
+          params.
         - **params** -- A dictionary of query string or form parameters.
-        - **response** -- The text response to the request.
+        - **kwargs** -- The keyword arguments to pass to the test client
+          method along with the path.
 
         :param route: Werkzeug Route object.
-        :param view_class: View class for the annotated method.
         :param annotation: Annotation for the method to be requested.
         :type annotation: doctor.resource.ResourceAnnotation
         :returns: dict
@@ -121,16 +116,48 @@ class AutoFlaskHarness(BaseHarness):
         else:
             params = {}
         method_name = annotation.http_method.lower()
-        method = getattr(self.test_client, method_name)
         if method_name in ('post', 'put'):
-            response = method(path, data=json.dumps(params), headers=headers,
-                              content_type='application/json')
+            kwargs = {'data': json.dumps(params), 'headers': headers,
+                      'content_type': 'application/json'}
         else:
-            response = method(path, data=params, headers=headers)
+            kwargs = {'data': params, 'headers': headers}
         return {
-            'url': '/'.join([self.url_prefix, path.lstrip('/')]),
-            'method': annotation.http_method.upper(),
+            'method': method_name,
+            'path': path,
             'params': params,
+            'kwargs': kwargs,
+        }
+
+    def request(self, rule, view_class, annotation):
+        """Make a request against the app.
+
+        This attempts to use the schema to replace any url params in the path
+        pattern. If there are any unused parameters in the schema, after
+        substituting the ones in the path, they will be sent as query string
+        parameters or form parameters. The substituted values are taken from
+        the "example" value in the schema.
+
+        Returns a dict with the following keys:
+
+        - **url** -- Example URL, with url_prefix added to the path pattern,
+          and the example values substituted in for URL params.
+        - **method** -- HTTP request method (e.g. "GET").
+        - **params** -- A dictionary of query string or form parameters.
+        - **response** -- The text response to the request.
+
+        :param route: Werkzeug Route object.
+        :param view_class: View class for the annotated method.
+        :param annotation: Annotation for the method to be requested.
+        :type annotation: doctor.resource.ResourceAnnotation
+        :returns: dict
+        """
+        args = self.build_request(rule, annotation)
+        method = getattr(self.test_client, args['method'])
+        response = method(args['path'], **args['kwargs'])
+        return {
+            'url': '/'.join([self.url_prefix, args['path'].lstrip('/')]),
+            'method': annotation.http_method.upper(),
+            'params': args['params'],
             'response': response.data,
         }
 
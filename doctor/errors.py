@@ -12,6 +12,14 @@ class DoctorError(ValueError):
 SchematicError = DoctorError
 
 
+class DeadlineExceededError(DoctorError):
+    """Raised when a request is not handled before its deadline.
+
+    Corresponds to a HTTP 504 Gateway Timeout error.
+    """
+    pass
+
+
 class ForbiddenError(DoctorError):
     """Raised when a request is forbidden for the authorized user.
 
@@ -59,6 +67,14 @@ class ParseError(DoctorError):
     pass
 
 
+class PayloadTooLargeError(DoctorError):
+    """Raised when a request body is larger than allowed.
+
+    Corresponds to a HTTP 413 Payload Too Large error.
+    """
+    pass
+
+
 class SchemaError(DoctorError):
     """Raised for errors in a schema."""
     pass
@@ -77,6 +93,21 @@ class SchemaValidationError(DoctorError):
         self.errors = errors
 
 
+class ServiceUnavailableError(DoctorError):
+    """Raised when a request can not be handled right now, e.g. overloaded.
+
+    Corresponds to a HTTP 503 Service Unavailable error.
+
+    :param message: The error message.
+    :param errors: A dict containing the errors.
+    :param retry_after: The number of seconds after which the client should
+        retry the request, if known.
+    """
+    def __init__(self, message, errors: dict = None, retry_after: int = None):
+        self.retry_after = retry_after
+        super().__init__(message, errors=errors)
+
+
 class TypeSystemError(DoctorError):
     """An error that represents an invalid value for a type.
 
@@ -0,0 +1,130 @@
+"""
+Sparse fieldsets for responses.
+
+A client can ask for only some of the properties of an `Object` response,
+or of the objects in an `Array` response, with a comma separated list of
+fields, e.g. `?fields=note_id,author.name`.  Nested properties are separated
+with a period.  The response is pruned to the requested fields before it is
+validated and serialized.
+"""
+import functools
+import typing
+from collections.abc import Mapping
+
+from .errors import TypeSystemError
+from .types import Array, new_type, Object, SuperType
+
+#: The name of the query string parameter containing the fields.
+FIELDS_PARAM = 'fields'
+
+#: A tree of the requested fields.  Each key is a property name and each
+#: value is a tree of the requested properties of that property, or None if
+#: the whole property was requested.
+FieldsTree = typing.Dict[str, typing.Optional[dict]]
+
+
+def supports_fields(cls: typing.Any) -> bool:
+    """Returns True if a type is an `Object` or an `Array` of them.
+
+    :param cls: The type.
+    """
+    if not isinstance(cls, type):
+        return False
+    if issubclass(cls, Array):
+        return supports_fields(cls.items)
+    return issubclass(cls, Object)
+
+
+def _get_object_type(cls: typing.Type[SuperType]
+                     ) -> typing.Optional[typing.Type[Object]]:
+    """Returns the object type of an `Object` or nested `Array` type."""
+    while isinstance(cls, type) and issubclass(cls, Array):
+        cls = cls.items
+    if isinstance(cls, type) and issubclass(cls, Object):
+        return cls
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def select_fields(cls: typing.Type[SuperType], fields: str
+                  ) -> typing.Tuple[FieldsTree, typing.Type[SuperType]]:
+    """Parses the fields requested for a response type.
+
+    The results are cached, since the same fields are usually requested
+    many times.
+
+    :param cls: An `Object` type, or an `Array` of them.
+    :param fields: The comma separated fields, e.g. `note_id,author.name`.
+    :returns: A tuple of the tree of requested fields, to pass to
+        :func:`prune`, and a type the pruned response can be validated with.
+        It is a copy of `cls` with only the requested properties and
+        required properties.
+    :raises TypeSystemError: If any of the fields are not properties of the
+        type.
+    """
+    tree = {}
+    unknown = []
+    for field in fields.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        node = tree
+        obj_type = _get_object_type(cls)
+        path = field.split('.')
+        for i, name in enumerate(path):
+            if obj_type is None or name not in obj_type.properties:
+                unknown.append(field)
+                break
+            if i == len(path) - 1:
+                # The whole property was requested.
+                node[name] = None
+            else:
+                if name not in node:
+                    node[name] = {}
+                elif node[name] is None:
+                    # The whole property was already requested.
+                    break
+                node = node[name]
+                obj_type = _get_object_type(obj_type.properties[name])
+    if unknown:
+        raise TypeSystemError('Unknown fields: {}.'.format(', '.join(unknown)))
+    return tree, _get_sparse_type(cls, tree)
+
+
+def _get_sparse_type(cls: typing.Type[SuperType],
+                     tree: FieldsTree) -> typing.Type[SuperType]:
+    """Returns a copy of a type with only the properties in `tree`."""
+    if issubclass(cls, Array):
+        return new_type(cls, items=_get_sparse_type(cls.items, tree))
+    properties = {}
+    for name, subtree in tree.items():
+        prop = cls.properties[name]
+        if subtree is not None:
+            prop = _get_sparse_type(prop, subtree)
+        properties[name] = prop
+    dependencies = {
+        name: dependencies
+        for name, dependencies in cls.property_dependencies.items()
+        if name in tree and all(dep in tree for dep in dependencies)}
+    return new_type(cls, properties=properties,
+                    required=[name for name in cls.required if name in tree],
+                    property_dependencies=dependencies)
+
+
+def prune(value: typing.Any, tree: FieldsTree) -> typing.Any:
+    """Returns a copy of a response with only the requested fields.
+
+    :param value: An object, or a list of objects.
+    :param tree: The requested fields returned by :func:`select_fields`.
+    :returns: The pruned response.
+    """
+    if isinstance(value, (list, tuple)):
+        return [prune(item, tree) for item in value]
+    if not isinstance(value, Mapping):
+        return value
+    result = {}
+    for name, subtree in tree.items():
+        if name in value:
+            item = value[name]
+            result[name] = item if subtree is None else prune(item, subtree)
+    return result
@@ -1,27 +1,53 @@
 from __future__ import absolute_import
 
+import asyncio
+import copy
+import inspect
+import io
+import json
 import logging
 import os
-from typing import Callable, Dict, List, Tuple, Union
+import threading
+import time
+from collections import deque
+from typing import IO, Any, Callable, Dict, List, Tuple, Union
 
 
 try:
-    from flask import current_app, request
+    from flask import current_app, make_response, request
     from flask_restful import Resource
     from werkzeug.exceptions import (BadRequest, Conflict, Forbidden,
-                                     HTTPException, NotFound, Unauthorized,
-                                     InternalServerError)
+                                     GatewayTimeout, HTTPException, NotFound,
+                                     Unauthorized,
+                                     InternalServerError,
+                                     RequestEntityTooLarge,
+                                     ServiceUnavailable,
+                                     UnsupportedMediaType)
 except ImportError:  # pragma: no cover
     raise ImportError('You must install flask to use the '
                       'doctor.flask module.')
 
-from .constants import HTTP_METHODS_WITH_JSON_BODY
-from .errors import (ForbiddenError, ImmutableError, InvalidValueError,
-                     NotFoundError, TypeSystemError, UnauthorizedError)
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+from .compression import (compress, compress_stream, decompress_stream,
+                          is_compressible, negotiate_encoding,
+                          REQUEST_ENCODINGS)
+from .constants import (HTTP_METHODS_WITH_JSON_BODY, MSGPACK_MIMETYPE,
+                        MSGPACK_MIMETYPES)
+from .fields import FIELDS_PARAM, prune, select_fields, supports_fields
+from .errors import (DeadlineExceededError, ForbiddenError, ImmutableError,
+                     InvalidValueError,
+                     NotFoundError, PayloadTooLargeError,
+                     ServiceUnavailableError, TypeSystemError,
+                     UnauthorizedError)
 from .parsers import map_param_names, parse_form_and_query_params
 from .response import Response
 from .routing import create_routes as doctor_create_routes
-from .routing import Route
+from .routing import Deadline, Route, SingleFlight
+from .types import get_json_key, Object
 
 
 STATUS_CODE_MAP = {
@@ -79,10 +105,40 @@ class HTTP409Exception(SchematicHTTPException, Conflict):
     pass
 
 
+class HTTP413Exception(SchematicHTTPException, RequestEntityTooLarge):
+    pass
+
+
 class HTTP500Exception(SchematicHTTPException, InternalServerError):
     pass
 
 
+class HTTP503Exception(SchematicHTTPException, ServiceUnavailable):
+    """Represents a HTTP 503 error.
+
+    :param description: The error description.
+    :param errors: A dict containing the errors.
+    :param retry_after: The number of seconds after which the client should
+        retry, sent in the `Retry-After` header.
+    """
+
+    def __init__(self, description: str=None, errors: dict=None,
+                 retry_after: int=None):
+        super(HTTP503Exception, self).__init__(description, errors=errors)
+        self.retry_after = retry_after
+
+    def get_headers(self, environ=None):
+        headers = super(HTTP503Exception, self).get_headers(environ)
+        if self.retry_after and not any(
+                name == 'Retry-After' for name, _ in headers):
+            headers.append(('Retry-After', str(self.retry_after)))
+        return headers
+
+
+class HTTP504Exception(SchematicHTTPException, GatewayTimeout):
+    pass
+
+
 def should_raise_response_validation_errors() -> bool:
     """Returns if the library should raise response validation errors or not.
 
@@ -94,30 +150,347 @@ def should_raise_response_validation_errors() -> bool:
     return bool(os.environ.get('RAISE_RESPONSE_VALIDATION_ERRORS', False))
 
 
-def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
+class SlowRequestRecorder(object):
+    """Records requests that take longer than a threshold.
+
+    Each record is a `dict` containing the route, method, status code,
+    duration, the time spent in each phase of
+    :func:`~doctor.flask.handle_http` and the sizes of the request params and
+    the response.  Durations are in seconds and sizes are the lengths of the
+    values serialized as JSON.  The phases are:
+
+        - `parse` - Parsing the request params.
+        - `validate` - Validating and coercing the request params.
+        - `logic` - Calling the logic function.
+        - `response` - Validating the response.
+
+    Only the most recent records are kept.
+
+    :param threshold: Requests that take longer than this many seconds are
+        recorded.  If None, requests are only recorded for routes that set a
+        `slow_request_threshold`.
+    :param max_records: The number of records to keep.
+    """
+
+    def __init__(self, threshold: float = None, max_records: int = 100):
+        self.threshold = threshold
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    @property
+    def max_records(self) -> int:
+        return self._records.maxlen
+
+    @max_records.setter
+    def max_records(self, max_records: int):
+        with self._lock:
+            self._records = deque(self._records, maxlen=max_records)
+
+    def record(self, record: Dict[str, Any]):
+        """Adds a record, discarding the oldest if there are too many.
+
+        :param record: The record to add.
+        """
+        with self._lock:
+            self._records.append(record)
+
+    def get_records(self) -> List[Dict[str, Any]]:
+        """Returns the records, oldest first."""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        """Removes all records."""
+        with self._lock:
+            self._records.clear()
+
+    def dump(self, output: Union[str, IO[str]]):
+        """Writes the records as JSON lines, oldest first.
+
+        :param output: A path or a file to write to.  Records are appended to
+            an existing file.
+        """
+        if isinstance(output, str):
+            with open(output, 'a') as f:
+                return self.dump(f)
+        for record in self.get_records():
+            output.write(json.dumps(record, default=str) + '\n')
+
+
+#: The recorder slow requests are recorded with.  Set its `threshold` to
+#: record all requests that take longer than that many seconds.
+slow_requests = SlowRequestRecorder()
+
+
+def _get_json_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class _RequestTimer(object):
+    """Times the phases of a request for a :class:`SlowRequestRecorder`."""
+    __slots__ = ('start', 'last', 'phases', 'params', 'response')
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases = {}
+        self.params = None
+        self.response = None
+
+    def mark(self, phase: str):
+        """Records the time since the previous phase as `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+
+def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable,
+                rejected: Exception = None):
     """Handle a Flask HTTP request
 
+    If the request takes longer than the `slow_request_threshold` of the
+    route, or the threshold of :data:`slow_requests`, it is recorded in
+    :data:`slow_requests`.
+
     :param handler: flask_restful.Resource: An instance of a Flask Restful
         resource class.
     :param tuple args: Any positional arguments passed to the wrapper method.
     :param dict kwargs: Any keyword arguments passed to the wrapper method.
     :param callable logic: The callable to invoke to actually perform the
         business logic for this request.
+    :param rejected: If specified, the request was rejected before it was
+        parsed, e.g. by a :class:`~doctor.routing.ConcurrencyLimit`, and is
+        responded to with this error instead of calling the logic function.
+    """
+    if rejected is not None:
+        raise _get_http_exception(rejected) or rejected
+    threshold = getattr(logic, '_doctor_slow_request_threshold', None)
+    if threshold is None:
+        threshold = slow_requests.threshold
+    if threshold is None:
+        return _handle_http(handler, args, kwargs, logic)
+
+    timer = _RequestTimer()
+    status_code = 500
+    try:
+        result = _handle_http(handler, args, kwargs, logic, timer)
+        status_code = result[1]
+        return result
+    except HTTPException as e:
+        status_code = e.code
+        raise
+    finally:
+        duration = time.perf_counter() - timer.start
+        if duration >= threshold:
+            params = timer.params or {}
+            response = timer.response
+            if isinstance(response, Response):
+                response = response.content
+            slow_requests.record({
+                'time': time.time(),
+                'route': str(request.url_rule or request.path),
+                'method': request.method,
+                'logic': getattr(logic, '__name__', None),
+                'status_code': status_code,
+                'duration': duration,
+                'phases': timer.phases,
+                'request_size': request.content_length,
+                'param_sizes': {name: _get_json_size(value)
+                                for name, value in params.items()},
+                'response_size': _get_json_size(response),
+            })
+
+
+def get_response_type(return_annotation: Any) -> Any:
+    """Returns the type of the content of a response.
+
+    :param return_annotation: The return annotation of a logic function.
+    :returns: `MyType` for `Response[MyType]`, otherwise the annotation.
+    """
+    if getattr(return_annotation, '__origin__', None) is Response:
+        return return_annotation.__args__[0]
+    return return_annotation
+
+
+def _reject_msgpack_bin(value: Any) -> Any:
+    """Raises an error if a decoded MessagePack value holds binary values.
+
+    JSON has no binary type, so types are never passed `bytes` by JSON
+    bodies, e.g. a `String` would get `"b'abc'"`.  This is called with each
+    decoded map and array, and with the decoded body.
+
+    :param value: The decoded value.
+    :returns: The value.
+    :raises InvalidValueError: If the value is or holds `bytes`.
+    """
+    if isinstance(value, dict):
+        values = list(value)
+        values.extend(value.values())
+    elif isinstance(value, list):
+        values = value
+    else:
+        values = (value,)
+    for item in values:
+        if isinstance(item, bytes):
+            raise InvalidValueError(
+                'The request body can not contain MessagePack binary values.')
+    return value
+
+
+def get_msgpack_body() -> Any:
+    """Decodes the MessagePack body of the request.
+
+    :returns: The decoded body.
+    :raises InvalidValueError: If the body is not valid MessagePack, or
+        contains binary values.
+    """
+    try:
+        body = msgpack.unpackb(
+            request.get_data(), raw=False, object_hook=_reject_msgpack_bin,
+            list_hook=_reject_msgpack_bin)
+    except InvalidValueError:
+        raise
+    except ValueError:
+        raise InvalidValueError('The request body is not valid MessagePack.')
+    return _reject_msgpack_bin(body)
+
+
+def output_msgpack(data: Any, code: int, headers: dict = None) -> Any:
+    """Makes a Flask response with a MessagePack encoded body.
+
+    This is a flask-restful representation.  See :func:`enable_msgpack`.
+
+    :param data: The response data.
+    :param code: The status code.
+    :param headers: The response headers.
+    :returns: The Flask response.
+    """
+    resp = make_response(msgpack.packb(data, use_bin_type=True), code)
+    resp.headers.extend(headers or {})
+    resp.headers['Content-Type'] = MSGPACK_MIMETYPE
+    return resp
+
+
+def enable_msgpack(api: Any):
+    """Encodes responses as MessagePack for clients that prefer it.
+
+    Responses are encoded as MessagePack when the `Accept` header of the
+    request prefers `application/msgpack` to `application/json`.  Request
+    bodies are decoded from MessagePack whenever the `msgpack` package is
+    installed, regardless of this.
+
+    :param api: The flask-restful Api.
+    :raises ImportError: If the `msgpack` package is not installed.
+    """
+    if msgpack is None:
+        raise ImportError('You must install msgpack to enable MessagePack '
+                          'responses.')
+    api.representations[MSGPACK_MIMETYPE] = output_msgpack
+
+
+def get_deadline(logic: Callable) -> Union[Deadline, None]:
+    """Returns the deadline of a request to a logic function.
+
+    :param logic: The logic function.
+    :returns: A :class:`~doctor.routing.Deadline`, or None if the logic
+        function has no timeout and does not take the deadline.
+    """
+    timeout = getattr(logic, '_doctor_timeout', None)
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+        timeout = None
+    deadline_param = getattr(logic, '_doctor_deadline_param', None)
+    if timeout is None and not isinstance(deadline_param, str):
+        return None
+    return Deadline(timeout)
+
+
+def run_logic(logic: Callable, args: Tuple, kwargs: Dict,
+              deadline: Deadline = None) -> Any:
+    """Calls a logic function, running it to completion if it is async.
+
+    :param logic: The logic function.
+    :param args: The positional arguments to call it with.
+    :param kwargs: The keyword arguments to call it with.
+    :param deadline: If specified, an async logic function is cancelled when
+        the deadline passes.
+    :returns: The result of the logic function.
+    :raises DeadlineExceededError: If an async logic function was cancelled.
+    """
+    result = logic(*args, **kwargs)
+    if not inspect.iscoroutine(result):
+        return result
+    timeout = None
+    if deadline is not None and deadline.timeout is not None:
+        timeout = deadline.remaining
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(asyncio.wait_for(result, timeout))
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError(
+            'The request was not handled within {} seconds.'.format(
+                deadline.timeout))
+    finally:
+        loop.close()
+
+
+def _get_http_exception(e: Exception) -> HTTPException:
+    """Returns the HTTP exception an error is responded to with.
+
+    :param e: The error, e.g. raised by a logic function.
+    :returns: The HTTP exception, or None if the error is not one of the
+        doctor errors with its own status code.
+    """
+    if isinstance(e, (InvalidValueError, TypeSystemError)):
+        return HTTP400Exception(e, errors=getattr(e, 'errors', None))
+    if isinstance(e, UnauthorizedError):
+        return HTTP401Exception(e)
+    if isinstance(e, ForbiddenError):
+        return HTTP403Exception(e)
+    if isinstance(e, NotFoundError):
+        return HTTP404Exception(e)
+    if isinstance(e, ImmutableError):
+        return HTTP409Exception(e)
+    if isinstance(e, PayloadTooLargeError):
+        return HTTP413Exception(e)
+    if isinstance(e, ServiceUnavailableError):
+        return HTTP503Exception(e, retry_after=e.retry_after)
+    if isinstance(e, DeadlineExceededError):
+        return HTTP504Exception(e)
+    return None
+
+
+def _handle_http(handler: Resource, args: Tuple, kwargs: Dict,
+                 logic: Callable, timer: _RequestTimer = None):
+    """Handles a request for :func:`handle_http`.
+
+    :param timer: If specified, the time spent in each phase of the request
+        is recorded on the timer.
     """
     try:
+        deadline = get_deadline(logic)
         # We are checking mimetype here instead of content_type because
         # mimetype is just the content-type, where as content_type can
         # contain encoding, charset, and language information.  e.g.
         # `Content-Type: application/json; charset=UTF8`
-        if (request.mimetype == 'application/json' and
-                request.method in HTTP_METHODS_WITH_JSON_BODY):
+        # MessagePack bodies are decoded to the same values as JSON bodies,
+        # so they are handled the same way.
+        json_body = msgpack_body = False
+        if request.method in HTTP_METHODS_WITH_JSON_BODY:
+            json_body = request.mimetype == 'application/json'
+            msgpack_body = (msgpack is not None and
+                            request.mimetype in MSGPACK_MIMETYPES)
+        if json_body or msgpack_body:
             # This is a proper typed JSON request. The parameters will be
             # encoded into the request body as a JSON blob.
+            body = get_msgpack_body() if msgpack_body else request.json
+            json_body = True
             if not logic._doctor_req_obj_type:
                 request_params = map_param_names(
-                    request.json, logic._doctor_signature.parameters)
+                    body, logic._doctor_signature.parameters)
             else:
-                request_params = request.json
+                request_params = body
         else:
             # Try to parse things from normal HTTP parameters
             request_params = parse_form_and_query_params(
@@ -143,8 +516,14 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
                 missing = missing[0]
             error = '{} {} required.'.format(missing, verb)
             raise InvalidValueError(error)
-
-        # Validate and coerce parameters to the appropriate types.
+        if timer is not None:
+            timer.params = dict(params)
+            timer.mark('parse')
+        if deadline is not None:
+            deadline.check()
+
+        # Validate and coerce parameters to the appropriate types.  Values
+        # decoded from a JSON body are validated in place rather than copied.
         errors = {}
         sig = logic._doctor_signature
         # If a `req_obj_type` was defined for the route, pass all request
@@ -152,11 +531,13 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
         if logic._doctor_req_obj_type:
             annotation = logic._doctor_req_obj_type
             try:
-                # NOTE: We calculate the value before applying native type in
-                # order to support UnionType types which dynamically modifies
-                # the native_type property based on the initialized value.
-                value = annotation(params)
-                params = annotation.native_type(value)
+                if (getattr(logic, '_doctor_lazy_validation', False) and
+                        issubclass(annotation, Object)):
+                    params = annotation.coerce_lazy(params)
+                elif json_body:
+                    params = annotation.coerce_json(params)
+                else:
+                    params = annotation.coerce(params)
             except TypeError:
                 logging.exception(
                     'Error casting and validating params with value `%s`.',
@@ -170,29 +551,87 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
                 if annotation.nullable and value is None:
                     continue
                 try:
-                    # NOTE: We calculate the value before applying native type
-                    # in order to support UnionType types which dynamically
-                    # modifies the native_type property based on the initialized
-                    # value.
-                    value = annotation(value)
-                    params[name] = annotation.native_type(value)
+                    if json_body:
+                        params[name] = annotation.coerce_json(value)
+                    else:
+                        params[name] = annotation.coerce(value)
                 except TypeSystemError as e:
                     errors[name] = e.detail
+        # Check the sparse fieldset requested by the client, if any.
+        fields_tree = sparse_type = None
+        fields = None
+        if FIELDS_PARAM not in sig.parameters:
+            fields = request.args.get(FIELDS_PARAM)
+        if isinstance(fields, str) and fields:
+            response_type = get_response_type(sig.return_annotation)
+            if supports_fields(response_type):
+                try:
+                    fields_tree, sparse_type = select_fields(
+                        response_type, fields)
+                except TypeSystemError as e:
+                    errors[FIELDS_PARAM] = e.detail
+
         if errors:
             raise TypeSystemError(errors, errors=errors)
-
+        if timer is not None:
+            timer.mark('validate')
+        if deadline is not None:
+            deadline.check()
+
+        # The deadline is passed to logic functions that take it.
+        deadline_kwargs = {}
+        deadline_param = getattr(logic, '_doctor_deadline_param', None)
+        if isinstance(deadline_param, str):
+            deadline_kwargs[deadline_param] = deadline
         if logic._doctor_req_obj_type:
             # Pass any positional arguments followed by the coerced request
             # parameters to the logic function.
-            response = logic(*args, params)
+            response = run_logic(
+                logic, args + (params,), deadline_kwargs, deadline)
         else:
             # Only pass request parameters defined by the logic signature.
             logic_params = {k: v for k, v in params.items()
                             if k in logic._doctor_params.logic}
-            response = logic(*args, **logic_params)
-
-        # response validation
-        if sig.return_annotation != sig.empty:
+            single_flight = getattr(logic, '_doctor_single_flight', None)
+            key = None
+            if isinstance(single_flight, SingleFlight):
+                # Omitted params are keyed by their defaults, so requests
+                # that only differ by omitting them are coalesced too.
+                key_params = dict(logic_params)
+                for name, param in sig.parameters.items():
+                    if (name not in key_params and
+                            param.default is not param.empty):
+                        key_params[name] = param.default
+                try:
+                    # The logic function is part of the key, so routes that
+                    # share a SingleFlight never get each other's results.
+                    key = (logic, args, get_json_key(key_params))
+                    hash(key)
+                except TypeError:
+                    # The params can not be compared, so are not coalesced.
+                    key = None
+            logic_kwargs = dict(logic_params, **deadline_kwargs)
+            if key is not None:
+                response = single_flight.do(key, lambda: run_logic(
+                    logic, args, logic_kwargs, deadline))
+            else:
+                response = run_logic(logic, args, logic_kwargs, deadline)
+        # Prune the response before it is validated and serialized.
+        if fields_tree is not None:
+            if isinstance(response, Response):
+                # The response may be shared with coalesced requests.
+                response = copy.copy(response)
+                response.content = prune(response.content, fields_tree)
+            else:
+                response = prune(response, fields_tree)
+        if timer is not None:
+            timer.response = response
+            timer.mark('logic')
+
+        # response validation is skipped once the deadline has passed, so the
+        # response is returned as soon as possible.
+        expired = deadline is not None and deadline.expired
+        if sig.return_annotation != sig.empty and not expired:
             return_annotation = sig.return_annotation
             _response = response
             if isinstance(response, Response):
@@ -200,9 +639,10 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
                 # Check if our return annotation is a Response that supplied a
                 # type to validate against.  If so, use that type for validation
                 # e.g. def logic() -> Response[MyType]
-                if (issubclass(return_annotation, Response) and
-                        return_annotation.__args__ is not None):
-                    return_annotation = return_annotation.__args__[0]
+                return_annotation = get_response_type(return_annotation)
+            if sparse_type is not None:
+                # Only the requested fields are validated.
+                return_annotation = sparse_type
             try:
                 return_annotation(_response)
             except TypeSystemError as e:
@@ -216,6 +656,8 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
                                  method=request.method, path=request.path,
                                  response=response, error=e.detail))
                     raise TypeSystemError(error)
+        if timer is not None:
+            timer.mark('response')
 
         if isinstance(response, Response):
             status_code = response.status_code
@@ -223,18 +665,10 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
                 status_code = STATUS_CODE_MAP.get(request.method, 200)
             return (response.content, status_code, response.headers)
         return response, STATUS_CODE_MAP.get(request.method, 200)
-    except (InvalidValueError, TypeSystemError) as e:
-        errors = getattr(e, 'errors', None)
-        raise HTTP400Exception(e, errors=errors)
-    except UnauthorizedError as e:
-        raise HTTP401Exception(e)
-    except ForbiddenError as e:
-        raise HTTP403Exception(e)
-    except NotFoundError as e:
-        raise HTTP404Exception(e)
-    except ImmutableError as e:
-        raise HTTP409Exception(e)
     except Exception as e:
+        http_exception = _get_http_exception(e)
+        if http_exception is not None:
+            raise http_exception
         # Always re-raise exceptions when DEBUG is enabled for development.
         if current_app.config.get('DEBUG', False):
             raise
@@ -246,6 +680,124 @@ def handle_http(handler: Resource, args: Tuple, kwargs: Dict, logic: Callable):
         raise HTTP500Exception('Uncaught error in logic function')
 
 
+#: The maximum size of a decompressed request body in bytes, if neither
+#: `enable_compression` nor the `MAX_CONTENT_LENGTH` config of the app set one.
+DEFAULT_MAX_REQUEST_SIZE = 10 * 1024 * 1024
+
+
+class DecompressionMiddleware(object):
+    """WSGI middleware that decompresses gzip and deflate request bodies.
+
+    The body is decompressed before the app reads the request, so logic
+    functions are unaware of it.  Bodies that decompress to more than the
+    maximum size are rejected with a 413 response and bodies that are not
+    valid with a 400 response.
+
+    :param app: The Flask app.
+    :param wsgi_app: The WSGI app to wrap, e.g. `app.wsgi_app`.
+    :param max_size: The maximum size of a decompressed body in bytes.  If
+        not specified, the `MAX_CONTENT_LENGTH` config of the app is used,
+        or :data:`DEFAULT_MAX_REQUEST_SIZE`.
+    """
+    def __init__(self, app, wsgi_app: Callable, max_size: int = None):
+        self.app = app
+        self.max_size = max_size
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ: dict, start_response: Callable):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if not encoding or encoding == 'identity':
+            return self.wsgi_app(environ, start_response)
+        if encoding not in REQUEST_ENCODINGS:
+            error = UnsupportedMediaType(
+                'Unsupported Content-Encoding: {}'.format(encoding))
+            return error(environ, start_response)
+
+        max_size = (self.max_size or
+                    self.app.config.get('MAX_CONTENT_LENGTH') or
+                    DEFAULT_MAX_REQUEST_SIZE)
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or '')
+        except ValueError:
+            # The body ends with the stream when it is chunked.
+            length = None if environ.get('wsgi.input_terminated') else 0
+        try:
+            body = decompress_stream(
+                environ['wsgi.input'], encoding, max_size, length)
+        except PayloadTooLargeError as e:
+            return RequestEntityTooLarge(str(e))(environ, start_response)
+        except InvalidValueError as e:
+            return BadRequest(str(e))(environ, start_response)
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        del environ['HTTP_CONTENT_ENCODING']
+        return self.wsgi_app(environ, start_response)
+
+
+def compress_response(response: Any, min_size: int = 1024, level: int = 6,
+                      brotli_quality: int = 4) -> Any:
+    """Compresses a response with the encoding the client prefers.
+
+    Only text, JSON and XML responses are compressed.  Streamed responses are
+    compressed as they are sent, regardless of their size.
+
+    :param response: The Flask response.
+    :param min_size: Responses smaller than this many bytes are not
+        compressed, since it would not make them much smaller.
+    :param level: The compression level of gzip and deflate, from 1 to 9.
+    :param brotli_quality: The quality of brotli, from 0 to 11.
+    :returns: The response.
+    """
+    if (response.direct_passthrough or
+            'Content-Encoding' in response.headers or
+            response.status_code < 200 or
+            response.status_code in (204, 304) or
+            not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(
+            response.iter_encoded(), encoding, level=level,
+            brotli_quality=brotli_quality)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding, level=level,
+                                   brotli_quality=brotli_quality))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def enable_compression(app, min_size: int = 1024, level: int = 6,
+                       brotli_quality: int = 4, max_request_size: int = None):
+    """Enables compression of the request and response bodies of an app.
+
+    Responses are compressed with :func:`compress_response` and request
+    bodies with a `Content-Encoding` of gzip or deflate are decompressed with
+    :class:`DecompressionMiddleware`.
+
+    :param app: The Flask app.
+    :param min_size: The minimum size of a response to compress in bytes.
+    :param level: The compression level of gzip and deflate, from 1 to 9.
+    :param brotli_quality: The quality of brotli, from 0 to 11.
+    :param max_request_size: The maximum size of a decompressed request body
+        in bytes.  See :class:`DecompressionMiddleware`.
+    """
+    app.wsgi_app = DecompressionMiddleware(app, app.wsgi_app,
+                                           max_size=max_request_size)
+
+    @app.after_request
+    def _compress_response(response):
+        return compress_response(response, min_size=min_size, level=level,
+                                 brotli_quality=brotli_quality)
+
+
 def create_routes(routes: Tuple[Route]) -> List[Tuple[str, Resource]]:
     """A thin wrapper around create_routes that passes in flask specific values.
 
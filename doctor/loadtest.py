@@ -0,0 +1,240 @@
+"""
+Load tests a doctor Flask app in-process.
+
+Requests are built for every route from the example values of the types
+annotated on the logic functions, the same way the API documentation is
+generated by :class:`~doctor.docs.flask.AutoFlaskHarness`, and sent to the
+app with its test client from multiple threads or processes.  The throughput
+and latency percentiles of each route are reported.
+
+Usage::
+
+    python -m doctor.loadtest app_module:app --requests 1000 --concurrency 8
+
+This requires the `docs` extra, since requests are built with the
+documentation harness.
+"""
+import argparse
+import importlib
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .docs.flask import AutoFlaskHarness
+
+#: The latency percentiles that are reported.
+PERCENTILES = (50, 90, 99)
+
+
+def _load_attr(spec: str, default: str) -> Any:
+    module_name, _, attr = spec.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or default)
+
+
+def load_app(spec: str) -> Any:
+    """Imports a Flask app.
+
+    :param spec: The module and attribute of the app, e.g. `api.app:app`.
+        The attribute defaults to `app`.
+    :returns: The app.
+    """
+    return _load_attr(spec, 'app')
+
+
+def load_harness(spec: str) -> AutoFlaskHarness:
+    """Imports a documentation harness.
+
+    :param spec: The module and attribute of the harness, e.g.
+        `docs.conf:autoflask_harness`.  The attribute defaults to
+        `autoflask_harness`, the name the Sphinx directive looks it up by.
+    :returns: The harness.
+    """
+    return _load_attr(spec, 'autoflask_harness')
+
+
+def build_requests(app: Any, harness: AutoFlaskHarness = None) -> List[Dict]:
+    """Builds an example request for each route of an app.
+
+    :param app: The Flask app.
+    :param harness: An optional harness with example values and headers
+        defined for routes.  If not specified, one without any is used.
+    :returns: A list of the dicts returned by
+        :meth:`~doctor.docs.flask.AutoFlaskHarness.build_request`, each with
+        a `name` key added, e.g. `GET /note/<int:note_id>/`.
+    """
+    if harness is None:
+        harness = AutoFlaskHarness(None, '')
+    harness.app = app
+    harness.test_client = app.test_client()
+    requests = []
+    for _, rule, _, annotations in harness.iter_annotations():
+        for annotation in annotations:
+            request = harness.build_request(rule, annotation)
+            request['name'] = '{} {}'.format(annotation.http_method, rule)
+            requests.append(request)
+    return requests
+
+
+def run_worker(app: Any, requests: Sequence[Dict],
+               iterations: int) -> Dict[str, Tuple[List[float], int]]:
+    """Sends each request to an app a number of times.
+
+    :param app: The Flask app.
+    :param requests: The requests returned by :func:`build_requests`.
+    :param iterations: The number of times to send each request.
+    :returns: A dict mapping the name of each request to a list of its
+        latencies in seconds and the number of 5xx responses.
+    """
+    client = app.test_client()
+    results = {request['name']: ([], 0) for request in requests}
+    for _ in range(iterations):
+        for request in requests:
+            method = getattr(client, request['method'])
+            start = time.perf_counter()
+            response = method(request['path'], **request['kwargs'])
+            latency = time.perf_counter() - start
+            latencies, errors = results[request['name']]
+            latencies.append(latency)
+            if response.status_code >= 500:
+                results[request['name']] = (latencies, errors + 1)
+    return results
+
+
+def _run_process_worker(app_spec: str, requests: Sequence[Dict],
+                        iterations: int):
+    return run_worker(load_app(app_spec), requests, iterations)
+
+
+def get_percentile(latencies: Sequence[float], percentile: float) -> float:
+    """Returns a percentile of sorted latencies using the nearest rank.
+
+    :param latencies: The sorted latencies.
+    :param percentile: The percentile, from 0 to 100.
+    :returns: The latency.
+    """
+    if not latencies:
+        return 0.0
+    rank = int(math.ceil(percentile / 100 * len(latencies)))
+    return latencies[max(rank, 1) - 1]
+
+
+def run(app_spec: str, requests_per_route: int = 100, concurrency: int = 1,
+        processes: bool = False, harness: AutoFlaskHarness = None) -> Dict:
+    """Load tests an app.
+
+    :param app_spec: The app to load test.  See :func:`load_app`.
+    :param requests_per_route: The number of requests to send to each route.
+        They are split as evenly as possible between the workers.
+    :param concurrency: The number of workers sending requests.
+    :param processes: If True each worker is a process instead of a thread.
+    :param harness: An optional harness with example values and headers
+        defined for routes.
+    :returns: A dict mapping the name of each route to a dict with the
+        `requests`, `errors`, `throughput` in requests per second and the
+        latency percentiles in seconds, e.g. `p99`.
+    """
+    requests = build_requests(load_app(app_spec), harness)
+    # The first workers send one more request each if they don't divide
+    # evenly.
+    per_worker, remainder = divmod(max(1, requests_per_route), concurrency)
+    iterations = [per_worker + (i < remainder) for i in range(concurrency)]
+    iterations = [count for count in iterations if count]
+    if processes:
+        executor = ProcessPoolExecutor(len(iterations))
+        args = (app_spec, requests)
+        worker = _run_process_worker
+    else:
+        executor = ThreadPoolExecutor(len(iterations))
+        args = (load_app(app_spec), requests)
+        worker = run_worker
+
+    with executor:
+        start = time.perf_counter()
+        futures = [executor.submit(worker, *args, count)
+                   for count in iterations]
+        worker_results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+    # Routes are requested in turn, so each is given the share of the
+    # elapsed time that was spent waiting for its responses.
+    latencies_by_name = {}
+    errors_by_name = {}
+    for request in requests:
+        name = request['name']
+        latencies_by_name[name] = sorted(
+            latency for results in worker_results
+            for latency in results[name][0])
+        errors_by_name[name] = sum(
+            results[name][1] for results in worker_results)
+    total_latency = sum(sum(latencies)
+                        for latencies in latencies_by_name.values())
+
+    report = {}
+    for name, latencies in latencies_by_name.items():
+        route_elapsed = elapsed * sum(latencies) / (total_latency or 1.0)
+        stats = {
+            'requests': len(latencies),
+            'errors': errors_by_name[name],
+            'throughput': len(latencies) / (route_elapsed or 1.0),
+        }
+        for percentile in PERCENTILES:
+            stats['p{}'.format(percentile)] = get_percentile(
+                latencies, percentile)
+        report[name] = stats
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Returns a table of the results returned by :func:`run`."""
+    columns = ['requests', 'errors', 'req/s'] + [
+        'p{} ms'.format(percentile) for percentile in PERCENTILES]
+    lines = ['{:<40}'.format('route') + ''.join(
+        '{:>10}'.format(column) for column in columns)]
+    for name, stats in report.items():
+        values = [stats['requests'], stats['errors'],
+                  '{:.1f}'.format(stats['throughput'])] + [
+            '{:.2f}'.format(stats['p{}'.format(percentile)] * 1e3)
+            for percentile in PERCENTILES]
+        lines.append('{:<40}'.format(name[:40]) + ''.join(
+            '{:>10}'.format(value) for value in values))
+    return '\n'.join(lines)
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m doctor.loadtest',
+        description='Load tests a doctor Flask app in-process.')
+    parser.add_argument(
+        'app', help='The module and attribute of the app, e.g. api.app:app')
+    parser.add_argument(
+        '-n', '--requests', type=int, default=100,
+        help='The number of requests to send to each route.')
+    parser.add_argument(
+        '-c', '--concurrency', type=int, default=1,
+        help='The number of workers sending requests.')
+    parser.add_argument(
+        '--processes', action='store_true',
+        help='Use processes instead of threads for the workers.')
+    parser.add_argument(
+        '--harness',
+        help='The module and attribute of an AutoFlaskHarness with example '
+             'values and headers defined for routes, e.g. '
+             'docs.conf:autoflask_harness')
+    args = parser.parse_args(argv)
+    if '' not in sys.path:
+        # Allow importing the app from the current directory.
+        sys.path.insert(0, '')
+    harness = None
+    if args.harness:
+        harness = load_harness(args.harness)
+    report = run(args.app, requests_per_route=args.requests,
+                 concurrency=args.concurrency, processes=args.processes,
+                 harness=harness)
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Attributes the time spent validating values to each doctor type.
+
+Profiling is enabled with a :class:`ValidationProfiler`, used as a context
+manager, or for a whole process with the `DOCTOR_PROFILE_VALIDATION`
+environment variable.  When profiling is not enabled nothing is installed,
+so validation runs at full speed.
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+from typing import IO, Callable, List, Optional, Tuple, Union
+
+from . import types
+
+#: The environment variable that enables profiling for a whole process.  If
+#: it is `1` the top types are printed to stderr at exit.  Any other value is
+#: the path of a file the collapsed stacks are written to at exit.
+PROFILE_ENV_VAR = 'DOCTOR_PROFILE_VALIDATION'
+
+#: The methods types validate values with.  Calls to these methods are timed.
+_ENTRY_METHODS = ('__new__', '__init__', 'coerce', 'coerce_json', '_coerce')
+
+#: The profiler that is currently enabled.
+_active = None  # type: Optional[ValidationProfiler]
+_active_lock = threading.Lock()
+
+
+def _get_entry_codes() -> frozenset:
+    """Returns the code objects of the methods types validate values with."""
+    codes = set()
+    for obj in vars(types).values():
+        if not (isinstance(obj, type) and issubclass(obj, types.SuperType)):
+            continue
+        for name in _ENTRY_METHODS:
+            func = obj.__dict__.get(name)
+            func = getattr(func, '__func__', func)
+            if hasattr(func, '__code__'):
+                codes.add(func.__code__)
+    return frozenset(codes)
+
+
+def _get_thread_profile() -> Optional[Callable]:
+    """Returns the profile function set with `threading.setprofile`."""
+    getprofile = getattr(threading, 'getprofile', None)
+    if getprofile is not None:
+        return getprofile()
+    # Before Python 3.10 it is only kept in a private attribute.
+    return getattr(threading, '_profile_hook', None)
+
+
+def get_type_label(cls: type) -> str:
+    """Returns the label a type is reported with.
+
+    Types created with :func:`~doctor.types.new_type` share the name of the
+    type they extend, so the description is included.
+
+    :param cls: The type.
+    :returns: The label, e.g. `String (The name of the user.)`.
+    """
+    description = cls.description or ''
+    if len(description) > 40:
+        description = description[:37] + '...'
+    label = '{} ({})'.format(cls.__name__, description)
+    # Semicolons separate the frames of collapsed stacks.
+    return label.replace(';', ',')
+
+
+class ValidationProfiler(object):
+    """Records the time spent validating values with each type.
+
+    Each call to validate a value with a type counts towards that type.  The
+    total time of a type includes the time spent validating its properties
+    or items with other types, which is excluded from its own time.
+
+    >>> with ValidationProfiler() as profiler:
+    ...     handle_request()
+    >>> print(profiler.format_top(10))
+
+    Only one profiler can be enabled at a time.  Threads started while a
+    profiler is enabled are profiled too.  On Python 3.12 and later threads
+    that are already running are also profiled, but on older versions they
+    are not, e.g. the worker threads of a threaded server that was started
+    before the profiler was enabled.
+    """
+
+    def __init__(self):
+        #: Maps each type to its call count, total time and own time.
+        self.stats = {}  # type: dict
+        #: Maps each stack of types to the own time of the last type.
+        self.stacks = {}  # type: dict
+        self._codes = _get_entry_codes()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._previous = None
+        self._previous_thread = None
+
+    def __enter__(self) -> 'ValidationProfiler':
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def enable(self):
+        """Starts profiling validation.
+
+        :raises RuntimeError: If a profiler is already enabled.
+        """
+        global _active
+        with _active_lock:
+            if _active is not None:
+                raise RuntimeError('A validation profiler is already enabled.')
+            _active = self
+        self._previous = sys.getprofile()
+        self._previous_thread = _get_thread_profile()
+        if hasattr(threading, 'setprofile_all_threads'):
+            threading.setprofile_all_threads(self._profile)
+        else:
+            sys.setprofile(self._profile)
+            threading.setprofile(self._profile)
+
+    def disable(self):
+        """Stops profiling validation.
+
+        The profile function is only removed from the calling thread here.
+        Other threads remove it themselves on their next profiled event.
+        """
+        global _active
+        sys.setprofile(self._previous)
+        threading.setprofile(self._previous_thread)
+        self._previous = None
+        self._previous_thread = None
+        with _active_lock:
+            _active = None
+
+    def clear(self):
+        """Clears the recorded stats."""
+        with self._lock:
+            self.stats.clear()
+            self.stacks.clear()
+
+    def _profile(self, frame, event, arg):
+        """The profile function installed with `sys.setprofile`."""
+        if _active is not self:
+            # Disabled from another thread.
+            sys.setprofile(None)
+            return
+        if event == 'call':
+            if frame.f_code not in self._codes:
+                return
+            f_locals = frame.f_locals
+            cls = f_locals.get('cls')
+            if cls is None:
+                cls = type(f_locals.get('self'))
+            stack = self._get_stack()
+            if stack and stack[-1][0] is cls:
+                # e.g. `coerce` calling `_coerce` calling `__new__`.
+                stack[-1][3] += 1
+            else:
+                stack.append([cls, time.perf_counter(), 0.0, 1])
+        elif event == 'return' and frame.f_code in self._codes:
+            stack = self._get_stack()
+            if not stack:
+                return
+            entry = stack[-1]
+            entry[3] -= 1
+            if entry[3]:
+                return
+            stack.pop()
+            cls, start, child_time, _ = entry
+            elapsed = time.perf_counter() - start
+            if stack:
+                stack[-1][2] += elapsed
+            path = tuple(item[0] for item in stack) + (cls,)
+            self._record(cls, path, elapsed, elapsed - child_time)
+
+    def _get_stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, cls: type, path: Tuple[type, ...], elapsed: float,
+                own: float):
+        with self._lock:
+            stat = self.stats.get(cls)
+            if stat is None:
+                stat = self.stats[cls] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += own
+            self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+    def top(self, n: int = 20,
+            sort: str = 'total') -> List[Tuple[type, int, float, float]]:
+        """Returns the types that took the most time.
+
+        :param n: The number of types to return.
+        :param sort: `total` to sort by total time, `own` to sort by own time
+            or `calls` to sort by call count.
+        :returns: A list of `(type, calls, total, own)` tuples.  Times are
+            in seconds.
+        """
+        index = {'calls': 1, 'total': 2, 'own': 3}[sort]
+        with self._lock:
+            rows = [(cls,) + tuple(stat) for cls, stat in self.stats.items()]
+        rows.sort(key=lambda row: row[index], reverse=True)
+        return rows[:n]
+
+    def format_top(self, n: int = 20, sort: str = 'total') -> str:
+        """Returns a table of the types that took the most time.
+
+        :param n: The number of types to include.
+        :param sort: The column to sort by.  See :meth:`top`.
+        :returns: The table.
+        """
+        lines = ['{:<50} {:>10} {:>12} {:>12}'.format(
+            'type', 'calls', 'total ms', 'own ms')]
+        for cls, calls, total, own in self.top(n, sort):
+            lines.append('{:<50} {:>10} {:>12.3f} {:>12.3f}'.format(
+                get_type_label(cls)[:50], calls, total * 1e3, own * 1e3))
+        return '\n'.join(lines)
+
+    def write_collapsed(self, output: Union[str, IO[str]]):
+        """Writes the collapsed stacks for flamegraph tools.
+
+        Each line is a stack of type labels separated by semicolons followed
+        by the own time of the last type in microseconds.
+
+        :param output: A path or a file to write to.
+        """
+        if isinstance(output, str):
+            with open(output, 'w') as f:
+                return self.write_collapsed(f)
+        with self._lock:
+            stacks = list(self.stacks.items())
+        for path, own in stacks:
+            output.write('{} {}\n'.format(
+                ';'.join(get_type_label(cls) for cls in path),
+                int(round(own * 1e6))))
+
+
+def enable_from_environment() -> Optional[ValidationProfiler]:
+    """Enables profiling for the process if `DOCTOR_PROFILE_VALIDATION` is set.
+
+    The results are reported when the process exits.
+
+    :returns: The enabled profiler, or None if the variable is not set.
+    """
+    target = os.environ.get(PROFILE_ENV_VAR)
+    if not target:
+        return None
+    profiler = ValidationProfiler()
+    profiler.enable()
+
+    def report():
+        profiler.disable()
+        if target == '1':
+            sys.stderr.write(profiler.format_top() + '\n')
+        else:
+            profiler.write_collapsed(target)
+
+    atexit.register(report)
+    return profiler
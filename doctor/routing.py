@@ -1,8 +1,207 @@
+import base64
 import functools
 import inspect
-from typing import Any, Callable, List, Sequence, Tuple
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, List, Sequence, Tuple, Type, Union
+
+from doctor.errors import (
+    DeadlineExceededError, ServiceUnavailableError, TypeSystemError)
+from doctor.response import Response
+from doctor.types import Array, integer, new_type, Object, string
+from doctor.utils import (
+    add_param_annotations, copy_func, get_params_from_func,
+    get_valid_class_name, Params, RequestParamAnnotation)
+
+#: The number of items in a page if the request does not specify a limit.
+DEFAULT_PAGE_LIMIT = 20
+
+#: The maximum number of items in a page.
+MAX_PAGE_LIMIT = 100
+
+#: The type of the `limit` request parameter of paginated routes.
+PageLimit = integer('The maximum number of items to return.', minimum=1,
+                    maximum=MAX_PAGE_LIMIT, example=DEFAULT_PAGE_LIMIT)
+
+#: The type of the `cursor` request parameter of paginated routes.
+PageCursor = string(
+    'The `next_cursor` of the previous page.  Omit it to get the first page.',
+    min_length=1, example='bnVsbA')
+
+
+class ConcurrencyLimit(object):
+    """Limits the number of requests a route handles at the same time.
+
+    When the limit is reached, requests wait up to `timeout` seconds for
+    another request to finish and are then rejected with a 503 response, so
+    an expensive route can not tie up every worker thread.  A limit can be
+    shared by several routes.
+
+    :param max_in_flight: The maximum number of requests handled at the same
+        time.
+    :param timeout: The number of seconds a request waits when the limit is
+        reached.  By default requests are rejected right away.
+    :param retry_after: The `Retry-After` header of rejected requests, in
+        seconds.
+    """
+    def __init__(self, max_in_flight: int, timeout: float = 0,
+                 retry_after: int = 1):
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._in_flight = 0
+        self._rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests being handled."""
+        return self._in_flight
+
+    @property
+    def rejected(self) -> int:
+        """The number of requests that were rejected."""
+        return self._rejected
+
+    def get_rejection_error(self) -> ServiceUnavailableError:
+        """Returns the error a rejected request is responded to with."""
+        return ServiceUnavailableError(
+            'Too many concurrent requests, retry later.',
+            retry_after=self.retry_after)
+
+    def acquire(self) -> bool:
+        """Starts handling a request, if the limit allows it.
+
+        :returns: True if the request can be handled.  If so,
+            :meth:`release` must be called when it is finished.
+        """
+        if self.timeout:
+            acquired = self._semaphore.acquire(timeout=self.timeout)
+        else:
+            acquired = self._semaphore.acquire(False)
+        with self._lock:
+            if acquired:
+                self._in_flight += 1
+            else:
+                self._rejected += 1
+        return acquired
+
+    def release(self):
+        """Finishes handling a request."""
+        with self._lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+
+class _Flight(object):
+    """A call that concurrent callers with the same key wait for."""
+    __slots__ = ('done', 'error', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        self.result = None
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls with the same key into a single call.
+
+    The first caller runs the call and the callers that arrive while it is
+    running wait for it and share its result, or its exception.
 
-from doctor.utils import copy_func, get_params_from_func, get_valid_class_name
+    :param timeout: The maximum number of seconds a caller waits for the
+        call of another caller.  If it takes longer, a
+        :class:`~doctor.errors.ServiceUnavailableError` is raised.
+    """
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        #: The number of calls that waited for the call of another caller.
+        self.coalesced = 0
+        self._flights = {}  # type: dict
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Calls a function, unless a call with the same key is running.
+
+        :param key: The key of the call, e.g. the request parameters.
+        :param func: The function to call.
+        :returns: The result of the call.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(self.timeout):
+                raise ServiceUnavailableError(
+                    'Timed out waiting for an identical request.',
+                    retry_after=1)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+class Deadline(object):
+    """The time by which a request should be handled.
+
+    A logic function is passed the deadline of its request if it has a
+    parameter annotated with this class.  It can check the remaining time,
+    e.g. to pass it as the timeout of a query, or call :meth:`check` between
+    steps to stop once the deadline has passed.
+
+    :param timeout: The number of seconds from now until the deadline, or
+        None if there is no deadline.
+    """
+    __slots__ = ('expires', 'timeout')
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self.expires = None
+        if timeout is not None:
+            self.expires = time.monotonic() + timeout
+
+    @property
+    def remaining(self) -> float:
+        """The number of seconds until the deadline, which may be infinite."""
+        if self.expires is None:
+            return math.inf
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """True if the deadline has passed."""
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def check(self):
+        """Raises an error if the deadline has passed.
+
+        :raises DeadlineExceededError: If the deadline has passed.  This
+            results in a 504 response.
+        """
+        if self.expired:
+            raise DeadlineExceededError(
+                'The request was not handled within {} seconds.'.format(
+                    self.timeout))
 
 
 class HTTPMethod(object):
@@ -14,6 +213,18 @@ class HTTPMethod(object):
         - `_doctor_params` - A :class:`~doctor.utils.Params` instance.
         - `_doctor_signature` - The parsed function Signature.
         - `_doctor_title` - The title that should be used in api documentation.
+        - `_doctor_slow_request_threshold` - The duration in seconds after
+          which a request is recorded as slow.
+        - `_doctor_lazy_validation` - If the properties of the request body
+          are validated when they are read.
+        - `_doctor_concurrency_limit` - The :class:`ConcurrencyLimit` of the
+          method.
+        - `_doctor_single_flight` - The :class:`SingleFlight` that concurrent
+          identical requests are coalesced with.
+        - `_doctor_timeout` - The number of seconds a request is handled
+          for before a 504 response is returned.
+        - `_doctor_deadline_param` - The name of the parameter the
+          :class:`Deadline` of the request is passed as, if any.
 
     :param method: The HTTP method.  One of: (delete, get, post, put).
     :param logic: The logic function to be called for the http method.
@@ -23,10 +234,37 @@ class HTTPMethod(object):
         when generating api documentation.
     :param req_obj_type: A doctor :class:`~doctor.types.Object` type that the
         request body should be converted to.
+    :param slow_request_threshold: If specified, requests that take longer
+        than this many seconds are recorded as slow.  This overrides the
+        threshold of :data:`doctor.flask.slow_requests`.
+    :param lazy_validation: If True and `req_obj_type` is an
+        :class:`~doctor.types.Object`, the logic function is passed a
+        :class:`~doctor.types.LazyObject` whose properties are validated when
+        they are read.  See :meth:`~doctor.types.Object.coerce_lazy`.
+    :param concurrency_limit: If specified, limits the number of requests
+        to this method that are handled at the same time.  This takes
+        precedence over the limit of the route.
+    :param single_flight: If True or a :class:`SingleFlight`, concurrent
+        requests with the same parameters share the result of a single call
+        of the logic function.  Only use this for logic functions without
+        side effects, e.g. for GET requests.  Requests are coalesced by
+        their parameters only, so do not use it for logic functions that
+        read anything else of the request, e.g. `flask.request`, auth
+        headers or `flask.g`, or one user could get another user's result.
+    :param timeout: If specified, the number of seconds after which the
+        request fails with a 504 response.  The deadline is checked between
+        the phases of handling the request, async logic functions are
+        cancelled when it passes and responses are not validated after it.
+        See :class:`Deadline`.
     """
     def __init__(self, method: str, logic: Callable,
                  allowed_exceptions: List = None, title: str = None,
-                 req_obj_type: Callable = None):
+                 req_obj_type: Callable = None,
+                 slow_request_threshold: float = None,
+                 lazy_validation: bool = False,
+                 concurrency_limit: ConcurrencyLimit = None,
+                 single_flight: Union[bool, SingleFlight] = False,
+                 timeout: float = None):
         self.method = method
         logic = copy_func(logic)
 
@@ -40,54 +278,427 @@ class HTTPMethod(object):
             logic._doctor_signature = inspect.signature(logic)
         if not hasattr(logic, '_doctor_params'):
             logic._doctor_params = get_params_from_func(logic)
+        # The deadline of the request is not a request parameter.
+        logic._doctor_deadline_param = None
+        sig = logic._doctor_signature
+        for name, param in sig.parameters.items():
+            if param.annotation is Deadline:
+                logic._doctor_deadline_param = name
+                logic._doctor_signature = sig.replace(
+                    parameters=[p for p in sig.parameters.values()
+                                if p.name != name])
+                params = logic._doctor_params
+                logic._doctor_params = Params(*(
+                    [n for n in names if n != name]
+                    for names in (params.all, params.required,
+                                  params.optional, params.logic)))
+                break
         logic._doctor_allowed_exceptions = allowed_exceptions
         logic._doctor_title = title
+        logic._doctor_slow_request_threshold = slow_request_threshold
+        logic._doctor_lazy_validation = lazy_validation
+        logic._doctor_concurrency_limit = concurrency_limit
+        if single_flight is True:
+            single_flight = SingleFlight()
+        logic._doctor_single_flight = single_flight or None
+        logic._doctor_timeout = timeout
         self.logic = logic
 
 
 def delete(func: Callable, allowed_exceptions: List = None,
-           title: str = None, req_obj_type: Callable = None) -> HTTPMethod:
+           title: str = None, req_obj_type: Callable = None,
+           slow_request_threshold: float = None,
+           lazy_validation: bool = False,
+           concurrency_limit: ConcurrencyLimit = None,
+           timeout: float = None) -> HTTPMethod:
     """Returns a HTTPMethod instance to create a DELETE route.
 
     :see: :class:`~doctor.routing.HTTPMethod`
     """
     return HTTPMethod('delete', func, allowed_exceptions=allowed_exceptions,
-                      title=title, req_obj_type=req_obj_type)
+                      title=title, req_obj_type=req_obj_type,
+                      slow_request_threshold=slow_request_threshold,
+                      lazy_validation=lazy_validation,
+                      concurrency_limit=concurrency_limit,
+                      timeout=timeout)
 
 
 def get(func: Callable, allowed_exceptions: List = None,
-        title: str = None, req_obj_type: Callable = None) -> HTTPMethod:
+        title: str = None, req_obj_type: Callable = None,
+        slow_request_threshold: float = None,
+        lazy_validation: bool = False,
+        concurrency_limit: ConcurrencyLimit = None,
+        single_flight: Union[bool, SingleFlight] = False,
+        timeout: float = None) -> HTTPMethod:
     """Returns a HTTPMethod instance to create a GET route.
 
     :see: :class:`~doctor.routing.HTTPMethod`
     """
     return HTTPMethod('get', func, allowed_exceptions=allowed_exceptions,
-                      title=title, req_obj_type=req_obj_type)
+                      title=title, req_obj_type=req_obj_type,
+                      slow_request_threshold=slow_request_threshold,
+                      lazy_validation=lazy_validation,
+                      concurrency_limit=concurrency_limit,
+                      single_flight=single_flight, timeout=timeout)
 
 
 def post(func: Callable, allowed_exceptions: List = None,
-         title: str = None, req_obj_type: Callable = None) -> HTTPMethod:
+         title: str = None, req_obj_type: Callable = None,
+         slow_request_threshold: float = None,
+         lazy_validation: bool = False,
+         concurrency_limit: ConcurrencyLimit = None,
+         timeout: float = None) -> HTTPMethod:
     """Returns a HTTPMethod instance to create a POST route.
 
     :see: :class:`~doctor.routing.HTTPMethod`
     """
     return HTTPMethod('post', func, allowed_exceptions=allowed_exceptions,
-                      title=title, req_obj_type=req_obj_type)
+                      title=title, req_obj_type=req_obj_type,
+                      slow_request_threshold=slow_request_threshold,
+                      lazy_validation=lazy_validation,
+                      concurrency_limit=concurrency_limit,
+                      timeout=timeout)
 
 
 def put(func: Callable, allowed_exceptions: List = None,
-        title: str = None, req_obj_type: Callable = None) -> HTTPMethod:
+        title: str = None, req_obj_type: Callable = None,
+        slow_request_threshold: float = None,
+        lazy_validation: bool = False,
+        concurrency_limit: ConcurrencyLimit = None,
+        timeout: float = None) -> HTTPMethod:
     """Returns a HTTPMethod instance to create a PUT route.
 
     :see: :class:`~doctor.routing.HTTPMethod`
     """
     return HTTPMethod('put', func, allowed_exceptions=allowed_exceptions,
-                      title=title, req_obj_type=req_obj_type)
+                      title=title, req_obj_type=req_obj_type,
+                      slow_request_threshold=slow_request_threshold,
+                      lazy_validation=lazy_validation,
+                      concurrency_limit=concurrency_limit,
+                      timeout=timeout)
+
+
+def encode_cursor(position: Any) -> str:
+    """Encodes the position of a page as an opaque cursor.
+
+    :param position: A JSON serializable value, e.g. the id of the last item
+        of a page.
+    :returns: The cursor.
+    """
+    data = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Decodes a cursor returned by :func:`encode_cursor`.
+
+    Cursors are not signed, so the position should be treated like any other
+    value sent by a client.
+
+    :param cursor: The cursor.
+    :returns: The position.
+    :raises TypeSystemError: If the cursor is not valid.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        return json.loads(data.decode('utf-8'))
+    except ValueError:
+        raise TypeSystemError('Invalid cursor.')
+
+
+class Page(object):
+    """A page of items returned by a paginated logic function.
+
+    :param items: The items in the page.
+    :param next_position: The position of the next page, which is encoded as
+        the `next_cursor` of the response.  None if this is the last page.
+    """
+    def __init__(self, items: Sequence, next_position: Any = None):
+        self.items = items
+        self.next_position = next_position
+
+    def to_dict(self) -> dict:
+        """Returns the response envelope of the page."""
+        next_cursor = None
+        if self.next_position is not None:
+            next_cursor = encode_cursor(self.next_position)
+        return {'items': list(self.items), 'next_cursor': next_cursor}
+
+
+class PageRequest(object):
+    """The page requested from a paginated logic function.
+
+    :param limit: The maximum number of items to return.
+    :param position: The position decoded from the `cursor` request
+        parameter, or None for the first page.
+    """
+    def __init__(self, limit: int, position: Any = None):
+        self.limit = limit
+        self.position = position
+
+    def get_page(self, items: Sequence,
+                 key: Callable[[Any], Any] = None) -> Page:
+        """Returns a page of items fetched after the position.
+
+        Fetch up to `limit + 1` items so it is known if there is a next page
+        without counting them, e.g. for a keyset query like
+        `WHERE id > :position ORDER BY id LIMIT :limit + 1`.
+
+        :param items: The items after the position.
+        :param key: A function returning the position of an item.  The
+            position of the next page is the key of the last item in this
+            page.  If not specified, the item is the position.
+        :returns: The page.
+        """
+        items = list(items)
+        if len(items) <= self.limit:
+            return Page(items)
+        items = items[:self.limit]
+        last = items[-1]
+        return Page(items, last if key is None else key(last))
+
+    def get_sequence_page(self, items: Sequence) -> Page:
+        """Returns a page of a sequence that is already in memory.
+
+        The position is the offset of the first item of the page.
+
+        :param items: All of the items.
+        :returns: The page.
+        :raises TypeSystemError: If the position is not a valid offset.
+        """
+        offset = self.position or 0
+        if not isinstance(offset, int) or isinstance(offset, bool) or (
+                offset < 0):
+            raise TypeSystemError('Invalid cursor.')
+        end = offset + self.limit
+        return Page(items[offset:end], end if end < len(items) else None)
+
+
+def page_type(items: Type[Array]) -> Type[Object]:
+    """Returns the type of the response envelope of a paginated route.
+
+    :param items: The type of the items in a page.
+    :returns: An :class:`~doctor.types.Object` type with `items` and
+        `next_cursor` properties.
+    """
+    next_cursor = new_type(
+        PageCursor, nullable=True, description=(
+            'Pass as the `cursor` to get the next page.  Null if this is '
+            'the last page.'))
+    return new_type(
+        Object, description='A page of {}'.format(items.description),
+        properties={'items': items, 'next_cursor': next_cursor},
+        required=['items', 'next_cursor'], additional_properties=False)
+
+
+def paginate(items: Type[Array] = None,
+             default_limit: int = DEFAULT_PAGE_LIMIT,
+             max_limit: int = MAX_PAGE_LIMIT) -> Callable:
+    """Decorates a logic function to return pages of items.
+
+    The `limit` and `cursor` request parameters are added to the logic
+    function with :func:`~doctor.utils.add_param_annotations`.  The logic
+    function is passed a :class:`PageRequest` as its `page` keyword argument
+    and should return a :class:`Page`, or a
+    :class:`~doctor.response.Response` containing one.  The page is returned
+    in an envelope with `items` and `next_cursor` properties, and the return
+    annotation is replaced with the type of the envelope so the responses are
+    validated and documented.
+
+    .. code-block:: python
+
+        @paginate()
+        def get_notes(page: PageRequest) -> Notes:
+            rows = db.get_notes(after=page.position, limit=page.limit + 1)
+            return page.get_page(rows, key=lambda note: note['note_id'])
+
+    :param items: The `Array` type of the items.  Defaults to the return
+        annotation of the logic function.
+    :param default_limit: The number of items in a page if the request does
+        not specify a limit.
+    :param max_limit: The maximum number of items in a page.
+    :returns: The decorator.
+    """
+    limit_type = new_type(
+        PageLimit, maximum=max_limit, example=min(default_limit, max_limit),
+        description='The maximum number of items to return.  Defaults to '
+                    '{}, at most {}.'.format(default_limit, max_limit))
+    cursor_type = new_type(PageCursor, example=encode_cursor(None))
+
+    def decorator(logic: Callable) -> Callable:
+        sig = getattr(logic, '_doctor_signature', None)
+        if sig is None:
+            sig = inspect.signature(logic)
+        items_type = items
+        if items_type is None:
+            items_type = sig.return_annotation
+        if not (isinstance(items_type, type) and
+                issubclass(items_type, Array)):
+            raise TypeError('Pass the Array type of the items of {} to '
+                            'paginate.'.format(logic.__name__))
+
+        @functools.wraps(logic)
+        def wrapper(*args, limit: int = None, cursor: str = None, **kwargs):
+            position = None
+            if cursor is not None:
+                try:
+                    position = decode_cursor(cursor)
+                except TypeSystemError as e:
+                    errors = {'cursor': e.detail}
+                    raise TypeSystemError(errors, errors=errors)
+            if limit is None:
+                limit = default_limit
+            result = logic(*args, page=PageRequest(limit, position), **kwargs)
+            if isinstance(result, Response):
+                if isinstance(result.content, Page):
+                    result.content = result.content.to_dict()
+                return result
+            return result.to_dict()
+
+        # The `page` argument is not a request parameter.
+        wrapper._doctor_signature = sig.replace(
+            parameters=[p for name, p in sig.parameters.items()
+                        if name != 'page'],
+            return_annotation=page_type(items_type))
+        params = getattr(logic, '_doctor_params', None)
+        if params is None:
+            params = get_params_from_func(wrapper, wrapper._doctor_signature)
+        wrapper._doctor_params = Params(*(
+            [name for name in names if name != 'page']
+            for names in (params.all, params.required, params.optional,
+                          params.logic)))
+        wrapper = add_param_annotations(wrapper, [
+            RequestParamAnnotation('limit', limit_type),
+            RequestParamAnnotation('cursor', cursor_type),
+        ])
+        # Unlike most added parameters, these are passed to the wrapper.
+        wrapper._doctor_params.logic.extend(
+            name for name in ('limit', 'cursor')
+            if name not in sig.parameters)
+        return wrapper
+    return decorator
+
+
+#: The policies of a :class:`HookExecutor` when too many hooks are pending.
+#: `block` waits for a pending hook to finish, `drop` skips the hook and
+#: `inline` runs the hook in the thread handling the request.
+HOOK_POLICIES = ('block', 'drop', 'inline')
+
+
+def log_hook_error(hook: Callable, error: Exception):
+    """Logs an error raised by a hook run by a :class:`HookExecutor`."""
+    logging.error('Error running hook %s: %s',
+                  getattr(hook, '__name__', hook), error, exc_info=error)
+
+
+class HookExecutor(object):
+    """Runs the `before` and `after` hooks of routes on background threads.
+
+    Pass an instance to each :class:`Route` whose hooks should not delay its
+    responses.  The hooks run outside of the request, so they can not use
+    the request context of the web framework.
+
+    :param max_workers: The number of threads running hooks.
+    :param max_pending: The maximum number of hooks that are queued or
+        running.  What happens to more hooks depends on `policy`.
+    :param policy: One of :data:`HOOK_POLICIES`.
+    :param on_error: Called with the hook and the exception when a hook
+        raises one.  Defaults to :func:`log_hook_error`.
+    """
+    def __init__(self, max_workers: int = 4, max_pending: int = 1000,
+                 policy: str = 'block',
+                 on_error: Callable[[Callable, Exception], Any] = None):
+        if policy not in HOOK_POLICIES:
+            raise ValueError('policy must be one of {}'.format(
+                ', '.join(HOOK_POLICIES)))
+        self.max_pending = max_pending
+        self.on_error = on_error or log_hook_error
+        self.policy = policy
+        #: The number of hooks dropped because too many were pending.
+        self.dropped = 0
+        #: The number of hooks that raised an exception.
+        self.errors = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='doctor-hooks')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    @property
+    def pending(self) -> int:
+        """The number of hooks that are queued or running."""
+        return self._pending
+
+    def submit(self, hook: Callable, *args) -> bool:
+        """Runs a hook in the background.
+
+        :param hook: The hook.
+        :param args: The arguments to call the hook with.
+        :returns: False if the hook was dropped, otherwise True.
+        """
+        if not self._slots.acquire(self.policy == 'block'):
+            if self.policy == 'drop':
+                with self._idle:
+                    self.dropped += 1
+                logging.warning('Dropped hook %s, %d hooks are pending.',
+                                getattr(hook, '__name__', hook),
+                                self.max_pending)
+                return False
+            self._run(hook, args)
+            return True
+
+        with self._idle:
+            self._pending += 1
+        try:
+            self._executor.submit(self._run_pending, hook, args)
+        except RuntimeError:
+            # The executor was shut down, e.g. at interpreter exit.
+            self._run_pending(hook, args)
+        return True
+
+    def _run(self, hook: Callable, args: tuple):
+        try:
+            hook(*args)
+        except Exception as e:
+            with self._idle:
+                self.errors += 1
+            self.on_error(hook, e)
+
+    def _run_pending(self, hook: Callable, args: tuple):
+        try:
+            self._run(hook, args)
+        finally:
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: float = None) -> bool:
+        """Waits for the pending hooks to finish.
+
+        :param timeout: The maximum number of seconds to wait.
+        :returns: True if no hooks are pending.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def shutdown(self, wait: bool = True):
+        """Stops the threads once the pending hooks have run.
+
+        Hooks submitted afterwards run in the thread submitting them.  At
+        interpreter exit the pending hooks are run before the threads stop.
+
+        :param wait: If True, wait for the pending hooks to finish.
+        """
+        self._executor.shutdown(wait=wait)
 
 
 def create_http_method(logic: Callable, http_method: str,
                        handle_http: Callable, before: Callable = None,
-                       after: Callable = None) -> Callable:
+                       after: Callable = None,
+                       hook_executor: HookExecutor = None,
+                       concurrency_limit: ConcurrencyLimit = None) -> Callable:
     """Create a handler method to be used in a handler class.
 
     :param callable logic: The underlying function to execute with the
@@ -99,15 +710,37 @@ def create_http_method(logic: Callable, http_method: str,
         with the route.
     :param after: A function to be called after the logic function associated
         with the route.
+    :param hook_executor: If specified, `before` and `after` are run in the
+        background by this executor instead of before the response returns.
+    :param concurrency_limit: If specified, requests beyond the limit are
+        rejected before the request is parsed.
     :returns: A handler function.
     """
     @functools.wraps(logic)
     def fn(handler, *args, **kwargs):
+        if concurrency_limit is None:
+            return dispatch(handler, *args, **kwargs)
+        if not concurrency_limit.acquire():
+            return handle_http(
+                handler, args, kwargs, logic,
+                rejected=concurrency_limit.get_rejection_error())
+        try:
+            return dispatch(handler, *args, **kwargs)
+        finally:
+            concurrency_limit.release()
+
+    def dispatch(handler, *args, **kwargs):
         if before is not None and callable(before):
-            before()
+            if hook_executor is None:
+                before()
+            else:
+                hook_executor.submit(before)
         result = handle_http(handler, args, kwargs, logic)
         if after is not None and callable(after):
-            after(result)
+            if hook_executor is None:
+                after(result)
+            else:
+                hook_executor.submit(after, result)
         return result
     return fn
 
@@ -126,16 +759,23 @@ class Route(object):
         with the route.
     :param after: A function to be called after the logic function associated
         with the route.
+    :param hook_executor: A :class:`HookExecutor` to run `before` and
+        `after` in the background, so they do not delay the response.
+    :param concurrency_limit: A :class:`ConcurrencyLimit` shared by the
+        methods of the route that do not have their own.
     """
     def __init__(self, route: str, methods: Sequence[HTTPMethod],
                  heading: str = 'API', base_handler_class = None,
                  handler_name: str = None, before: Callable = None,
-                 after: Callable = None):
+                 after: Callable = None, hook_executor: HookExecutor = None,
+                 concurrency_limit: ConcurrencyLimit = None):
         self.after = after
         self.base_handler_class = base_handler_class
         self.before = before
         self.handler_name = handler_name
         self.heading = heading
+        self.hook_executor = hook_executor
+        self.concurrency_limit = concurrency_limit
         self.methods = methods
         self.route = route
 
@@ -163,6 +803,8 @@ def create_routes(routes: Sequence[HTTPMethod], handle_http: Callable,
                   default_base_handler_class: Any) -> List[Tuple[str, Any]]:
     """Creates handler routes from the provided routes.
 
+    The time taken is linear in the number of routes.
+
     :param routes: A tuple containing the route and another tuple with
         all http methods allowed for the route.
     :param handle_http: The HTTP handler function that should be
@@ -172,9 +814,9 @@ def create_routes(routes: Sequence[HTTPMethod], handle_http: Callable,
     :returns: A list of tuples containing the route and generated handler.
     """
     created_routes = []
-    all_handler_names = []
+    all_handler_names = set()
+    num_handlers = 0
     for r in routes:
-        handler = None
         if r.base_handler_class is not None:
             base_handler_class = r.base_handler_class
         else:
@@ -185,33 +827,31 @@ def create_routes(routes: Sequence[HTTPMethod], handle_http: Callable,
         # end of the hanlder name if it already exists.
         handler_name = get_handler_name(r, r.methods[0].logic)
         if handler_name in all_handler_names:
-            handler_name = '{}{}'.format(
-                handler_name, len(all_handler_names))
-        all_handler_names.append(handler_name)
-
+            handler_name = '{}{}'.format(handler_name, num_handlers)
+        all_handler_names.add(handler_name)
+        num_handlers += 1
+
+        # The handler class is created once with all of its methods.  Flask's
+        # MethodView initializes the `methods` attribute when it is created.
+        handler_methods_and_properties = {
+            '__name__': handler_name,
+            '_doctor_heading': r.heading,
+            'methods': set(),
+        }
         for method in r.methods:
             logic = method.logic
             http_method = method.method
-            http_func = create_http_method(logic, http_method, handle_http,
-                                           before=r.before, after=r.after)
-
-            handler_methods_and_properties = {
-                '__name__': handler_name,
-                '_doctor_heading': r.heading,
-                'methods': set([http_method.upper()]),
-                http_method: http_func,
-            }
-            if handler is None:
-                handler = type(
-                    handler_name, (base_handler_class,),
-                    handler_methods_and_properties)
-            else:
-                setattr(handler, http_method, http_func)
-                # This is specific to Flask.  Its MethodView class
-                # initializes the methods attribute in __new__ so we
-                # need to add all the other http methods we are defining
-                # on the handler after it gets created by type.
-                if hasattr(handler, 'methods'):
-                    handler.methods.add(http_method.upper())
+            concurrency_limit = getattr(
+                logic, '_doctor_concurrency_limit', None)
+            if concurrency_limit is None:
+                concurrency_limit = r.concurrency_limit
+            http_func = create_http_method(
+                logic, http_method, handle_http, before=r.before,
+                after=r.after, hook_executor=r.hook_executor,
+                concurrency_limit=concurrency_limit)
+            handler_methods_and_properties[http_method] = http_func
+            handler_methods_and_properties['methods'].add(http_method.upper())
+        handler = type(handler_name, (base_handler_class,),
+                       handler_methods_and_properties)
         created_routes.append((r.route, handler))
     return created_routes
@@ -1,10 +1,20 @@
+import hashlib
 import logging
+import marshal
 import os
+import tempfile
+from typing import Any
 
 import jsonschema
 import yaml
 from jsonschema.compat import urldefrag
 
+try:
+    # The libyaml loader is much faster than the pure Python one.
+    from yaml import CSafeLoader as SchemaLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as SchemaLoader
+
 from .errors import (
     DoctorError, SchemaError, SchemaLoadingError, SchemaValidationError)
 from .parsers import parse_json
@@ -12,6 +22,95 @@ from .parsers import parse_json
 
 DEFAULT = object()
 
+#: The environment variable with the directory parsed schema files are cached
+#: in across processes.  If it is not set they are only cached in process.
+SCHEMA_CACHE_DIR_ENV_VAR = 'DOCTOR_SCHEMA_CACHE_DIR'
+
+#: Parsed schema files, keyed by absolute path.  Each value is a tuple of the
+#: modification time and size of the file when it was parsed and the schema.
+_schema_files = {}
+
+
+def _get_cache_path(cache_dir: str, path: str, key: tuple) -> str:
+    """Returns the path a parsed schema file is cached at on disk."""
+    digest = hashlib.sha1('{}\0{}\0{}\0{}'.format(
+        path, key[0], key[1], marshal.version).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, digest + '.marshal')
+
+
+def _read_cache(cache_path: str) -> Any:
+    """Returns a cached schema, or DEFAULT if it is not cached."""
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            return marshal.load(cache_file)
+    except (OSError, EOFError, TypeError, ValueError):
+        return DEFAULT
+
+
+def _write_cache(cache_path: str, schema: Any):
+    """Caches a schema on disk, if it only contains marshallable values."""
+    try:
+        data = marshal.dumps(schema)
+    except ValueError:
+        # e.g. YAML timestamps are loaded as datetimes.
+        logging.debug('Not caching %s, it can not be marshalled.', cache_path)
+        return
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first, so other processes never read a
+        # partially written file.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logging.warning('Error caching parsed schema %s: %s', cache_path, e)
+
+
+def load_schema_file(path: str, cache_dir: str = DEFAULT) -> Any:
+    """Loads a YAML or JSON schema file.
+
+    Parsed files are cached in process, keyed by their absolute path, until
+    their modification time or size changes, so every schema loaded from
+    the same file shares the parsed value.  It must not be modified.
+
+    :param path: The path of the schema file.
+    :param cache_dir: A directory to also cache parsed files in, so other
+        processes do not need to parse them again.  It defaults to the
+        `DOCTOR_SCHEMA_CACHE_DIR` environment variable.  The cache is keyed
+        by the path, modification time and size of each file, so outdated
+        entries are never read, but they are not removed either.  Only use a
+        directory that other users can not write to.
+    :returns: The parsed schema.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _schema_files.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    if cache_dir is DEFAULT:
+        cache_dir = os.environ.get(SCHEMA_CACHE_DIR_ENV_VAR)
+    cache_path = None
+    schema = DEFAULT
+    if cache_dir:
+        cache_path = _get_cache_path(cache_dir, path, key)
+        schema = _read_cache(cache_path)
+    if schema is DEFAULT:
+        with open(path, 'r') as schema_file:
+            schema = yaml.load(schema_file, Loader=SchemaLoader)
+        if cache_path is not None:
+            _write_cache(cache_path, schema)
+    _schema_files[path] = (key, schema)
+    return schema
+
+
+def clear_schema_file_cache():
+    """Clears the in process cache of :func:`load_schema_file`."""
+    _schema_files.clear()
+
 
 class SchemaRefResolver(jsonschema.RefResolver):
 
@@ -97,9 +196,7 @@ class SchemaRefResolver(jsonschema.RefResolver):
         """
         if uri.startswith('file://'):
             try:
-                path = uri[7:]
-                with open(path, 'r') as schema_file:
-                    result = yaml.load(schema_file)
+                result = load_schema_file(uri[7:])
                 if self.cache_remote:
                     self.store[uri] = result
                 return result
@@ -225,8 +322,7 @@ class Schema(object):
         """
         schema_filepath = os.path.abspath(schema_filepath)
         try:
-            with open(schema_filepath, 'r') as schema_file:
-                schema = yaml.load(schema_file.read())
+            schema = load_schema_file(schema_filepath)
         except Exception:
             msg = 'Error loading schema file {}'.format(schema_filepath)
             logging.exception(msg)
@@ -0,0 +1,191 @@
+"""
+Warms up the routes of an app before it handles requests.
+
+Doctor types compile their patterns, lookups and validators the first time
+they validate a value, so the first request to each route in a fresh worker
+is slower than the rest.  :func:`warmup` builds them up front, e.g. in the
+master process of a pre-forking server, so every worker starts with them::
+
+    # gunicorn.conf.py
+    def on_starting(server):
+        import doctor
+        from myapp.app import app
+        doctor.warmup(app, freeze=True)
+
+With `freeze=True` the objects built until then are moved to the permanent
+generation of the garbage collector with :func:`gc.freeze`.  The collector
+then never writes to them, so forked workers keep sharing their pages
+copy-on-write instead of each getting a copy.
+"""
+import gc
+import inspect
+import logging
+from typing import Any, Callable, Iterator, List, Tuple, Type
+
+from .constants import HTTP_METHODS
+from .response import Response
+from .routing import Route
+from .types import Array, Enum, JsonSchema, Object, String, SuperType, UnionType
+
+
+class WarmupReport(object):
+    """The result of :func:`warmup`.
+
+    :param logic_functions: The number of logic functions that were warmed.
+    :param types: The number of types that were warmed.
+    :param errors: A list of tuples of the name of each logic function or
+        type that could not be warmed and the error.
+    :param frozen: The number of objects moved to the permanent generation
+        of the garbage collector.
+    """
+
+    def __init__(self, logic_functions: int = 0, types: int = 0,
+                 errors: List[Tuple[str, Exception]] = None,
+                 frozen: int = 0):
+        self.logic_functions = logic_functions
+        self.types = types
+        self.errors = errors or []
+        self.frozen = frozen
+
+    def __repr__(self) -> str:
+        return ('WarmupReport(logic_functions={}, types={}, errors={}, '
+                'frozen={})'.format(self.logic_functions, self.types,
+                                    len(self.errors), self.frozen))
+
+
+def iter_logic_functions(app_or_routes: Any) -> Iterator[Callable]:
+    """Yields the logic functions of an app or routes.
+
+    :param app_or_routes: A Flask app, or the routes passed to
+        :func:`~doctor.routing.create_routes`, or the tuples of routes and
+        resources it returns.
+    """
+    view_functions = getattr(app_or_routes, 'view_functions', None)
+    if view_functions is not None:
+        handlers = [getattr(view, 'view_class', None)
+                    for view in view_functions.values()]
+    else:
+        handlers = []
+        for route in app_or_routes:
+            if isinstance(route, Route):
+                for method in route.methods:
+                    yield method.logic
+            else:
+                handlers.append(route[1])
+    for handler in handlers:
+        for method_name in HTTP_METHODS:
+            method = getattr(handler, method_name, None)
+            if hasattr(method, '_doctor_signature'):
+                yield method
+
+
+def get_logic_types(logic: Callable) -> List[Any]:
+    """Returns the types of the parameters and response of a logic function.
+
+    :param logic: A logic function with a `_doctor_signature`.
+    """
+    sig = logic._doctor_signature
+    annotations = [param.annotation for param in sig.parameters.values()]
+    req_obj_type = getattr(logic, '_doctor_req_obj_type', None)
+    if req_obj_type:
+        annotations.append(req_obj_type)
+    return_annotation = sig.return_annotation
+    if getattr(return_annotation, '__origin__', None) is Response:
+        return_annotation = return_annotation.__args__[0]
+    annotations.append(return_annotation)
+    return annotations
+
+
+def iter_nested_types(cls: Type[SuperType]) -> Iterator[Any]:
+    """Yields the types nested in a type, e.g. the properties of an object.
+
+    :param cls: The type.
+    """
+    if issubclass(cls, Object):
+        yield from cls.properties.values()
+    elif issubclass(cls, Array):
+        items = cls.items
+        if isinstance(items, (list, tuple)):
+            yield from items
+        else:
+            yield items
+    elif issubclass(cls, UnionType):
+        yield from cls.types
+
+
+def warm_type(cls: Type[SuperType]):
+    """Builds what a type caches the first time it validates a value.
+
+    :param cls: The type.
+    """
+    if issubclass(cls, String) and cls.pattern:
+        cls._get_compiled_pattern()
+    if issubclass(cls, Enum) and cls.enum:
+        cls._get_enum_lookup()
+    if issubclass(cls, UnionType) and cls.discriminator:
+        cls._get_discriminator_lookup()
+    if issubclass(cls, JsonSchema) and cls.schema is not None:
+        cls._get_validator()
+
+
+def freeze_objects() -> int:
+    """Freezes all objects tracked by the garbage collector.
+
+    They are moved to the permanent generation, so the collector never
+    collects or writes to them.  This does nothing before Python 3.7, which
+    added :func:`gc.freeze`.
+
+    :returns: The number of objects in the permanent generation.
+    """
+    if not hasattr(gc, 'freeze'):  # pragma: no cover
+        return 0
+    gc.freeze()
+    return gc.get_freeze_count()
+
+
+def warmup(app_or_routes: Any, freeze: bool = False) -> WarmupReport:
+    """Warms up the logic functions of an app and all the types they use.
+
+    The patterns, lookups and validators that types otherwise build when
+    they first validate a value are built for every type reachable from the
+    parameters and responses of the logic functions.  Anything that can not
+    be warmed is logged and reported instead of raising, since it will fail
+    again, with a proper error, when a request uses it.
+
+    :param app_or_routes: A Flask app, or the routes passed to
+        :func:`~doctor.routing.create_routes`, or the tuples of routes and
+        resources it returns.
+    :param freeze: If True, :func:`freeze_objects` is called once everything
+        is built.  Only do this in the master process of a pre-forking
+        server, after the app is loaded and right before workers are forked.
+        For the most sharing, also call :func:`gc.disable` before loading
+        the app and :func:`gc.enable` in each worker after it is forked.
+    :returns: A :class:`WarmupReport`.
+    """
+    report = WarmupReport()
+    seen = set()
+    pending = []
+    for logic in iter_logic_functions(app_or_routes):
+        report.logic_functions += 1
+        try:
+            pending.extend(get_logic_types(logic))
+        except Exception as e:
+            report.errors.append((logic.__name__, e))
+    while pending:
+        cls = pending.pop()
+        if not (inspect.isclass(cls) and issubclass(cls, SuperType)):
+            continue
+        if cls in seen:
+            continue
+        seen.add(cls)
+        report.types += 1
+        try:
+            warm_type(cls)
+            pending.extend(iter_nested_types(cls))
+        except Exception as e:
+            report.errors.append((cls.__name__, e))
+    for name, error in report.errors:
+        logging.warning('Could not warm up %s: %s', name, error)
+    if freeze:
+        report.frozen = freeze_objects()
+    return report
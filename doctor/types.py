@@ -30,14 +30,23 @@ This file is a modified version of the typingsystem.py module in apistar.
 https://github.com/encode/apistar/blob/973c6485d8297c1bcef35a42221ac5107dce25d5/apistar/typesystem.py
 """
 import math
+import operator
 import re
 import typing
+from array import array as native_array
+from collections.abc import Mapping
 from datetime import datetime
+from itertools import repeat
 from typing import Any
 
 import isodate
 import rfc3987
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from doctor.errors import SchemaError, SchemaValidationError, TypeSystemError
 from doctor.parsers import parse_value
 
@@ -105,6 +114,64 @@ class SuperType(object):
             raise MissingDescriptionError(
                 '{} did not define a description attribute'.format(cls))
 
+    @classmethod
+    def coerce(cls, value: Any) -> Any:
+        """Validates a value and returns it as the native type of the type.
+
+        This is what request parameters are passed through before being
+        given to a logic function.  :class:`~doctor.types.Object` and
+        :class:`~doctor.types.Array` types build plain `dict` and `list`
+        values in a single pass, all the way down, instead of instances of
+        the type.
+
+        :param value: The value to validate.
+        :returns: The validated value.
+        :raises TypeSystemError: If the value is not valid.
+        """
+        value = cls._coerce(value)
+        if value is not None and type(value) is not cls.native_type:
+            value = cls.native_type(value)
+        return value
+
+    @classmethod
+    def coerce_json(cls, value: Any) -> Any:
+        """Validates a value decoded from a JSON request body.
+
+        JSON values already have native types, so instead of building new
+        `dict` and `list` values they are validated in place and only the
+        properties and items whose values change are replaced, e.g. strings
+        with whitespace trimmed or missing properties that have defaults.
+        The result is the same as :meth:`~doctor.types.SuperType.coerce`.
+
+        :param value: The value to validate.  It may be modified.
+        :returns: The validated value.
+        :raises TypeSystemError: If the value is not valid.
+        """
+        value = cls._coerce(value, in_place=True)
+        if value is not None and type(value) is not cls.native_type:
+            value = cls.native_type(value)
+        return value
+
+    @classmethod
+    def _coerce(cls, value: Any, in_place: bool = False) -> Any:
+        """Validates a value without converting scalars to the native type.
+
+        This is used for the properties and items of container types, which
+        keep the values returned by their types, e.g. a `date` from a
+        `String` with a `date` format.
+
+        :param value: The value to validate.
+        :param in_place: If True, `dict` and `list` values are validated in
+            place instead of being copied.
+        :returns: The validated value.
+        """
+        if cls.nullable and value is None:
+            return None
+        value = cls(value)
+        if isinstance(value, SuperType):
+            value = cls.native_type(value)
+        return value
+
     @classmethod
     def validate(cls, value: typing.Any):
         """Additional validation for a type.
@@ -118,44 +185,211 @@ class SuperType(object):
         pass
 
 
+def _has_validate(cls) -> bool:
+    """Returns True if a type overrides `validate`.
+
+    Types only call `validate` if it was overridden.  This is checked on
+    every call, so `validate` may be replaced after the type is created,
+    e.g. with `mock.patch.object`.
+    """
+    return (getattr(cls.validate, '__func__', None) is not
+            SuperType.validate.__func__)
+
+
 class UnionType(SuperType):
     """A type that can be one of any of the defined `types`.
 
     The first type that does not raise a :class:`~doctor.errors.TypeSystemError`
     will be used as the type for the variable.
     """
+    errors = {
+        'discriminator': 'Must be one of: {values}',
+        'json_type': 'Must be one of: {json_types}',
+        'required': 'This field is required.',
+    }
     #: A list of allowed types.
     types = []
-
-    _native_type = None
+    #: An optional property name used to pick the type of an object value.
+    #: Each :class:`~doctor.types.Object` in `types` should define this
+    #: property as an :class:`~doctor.types.Enum` and the value of the property
+    #: will select the type to validate against, instead of trying each type.
+    discriminator = None  # type: str
+    #: If True only the `types` whose native type matches the JSON type of
+    #: the value (str, int, float, bool, dict or list) are tried.  Types
+    #: without one of these native types, e.g. a `JsonSchema`, are always
+    #: tried.
+    dispatch_json_type = False  # type: bool
 
     def __new__(cls, *args, **kwargs):
+        _, value = cls._match(args, kwargs, coerce=False)
+        return value
+
+    @classmethod
+    def _get_discriminator_lookup(cls) -> typing.Dict[str, typing.Type]:
+        """Returns a mapping of discriminator value to type.
+
+        The mapping is cached on the class for the current `types` list.
+        """
+        cached = cls.__dict__.get('_discriminator_lookup')
+        if (cached is not None and cached[0] is cls.types and
+                cached[1] == cls.discriminator):
+            return cached[2]
+        types = cls.types
+        lookup = {}
+        for obj_class in types:
+            properties = getattr(obj_class, 'properties', None) or {}
+            prop = properties.get(cls.discriminator)
+            if prop is None or not issubclass(prop, Enum):
+                continue
+            for value in prop.enum:
+                lookup.setdefault(value, obj_class)
+        cls._discriminator_lookup = (types, cls.discriminator, lookup)
+        return lookup
+
+    @classmethod
+    def _get_candidate_types(cls, value: Any) -> typing.List[typing.Type]:
+        """Returns the types that should be tried for a value.
+
+        :param value: The value being validated.
+        :returns: A list of types.
+        :raises TypeSystemError: If the value can't match any of the types.
+        """
+        if cls.discriminator is not None and isinstance(value, dict):
+            lookup = cls._get_discriminator_lookup()
+            try:
+                key = value[cls.discriminator]
+            except KeyError:
+                raise TypeSystemError(
+                    {cls.discriminator: cls.errors['required']}) from None
+            try:
+                return [lookup[key]]
+            except (KeyError, TypeError):
+                detail = cls.errors['discriminator'].format(
+                    values=sorted(lookup))
+                raise TypeSystemError({cls.discriminator: detail}) from None
+
+        if cls.dispatch_json_type and value is not None:
+            native_types = _JSON_DISPATCH_TYPES.get(type(value))
+            if native_types is not None:
+                # Types without a JSON native type, e.g. a `JsonSchema`, may
+                # accept any value, so they are always tried.
+                candidates = []
+                for t in cls.types:
+                    native_type = getattr(t, 'native_type', None)
+                    if (issubclass(t, UnionType) or
+                            native_type in native_types or
+                            native_type not in _JSON_DISPATCH_NATIVE_TYPES):
+                        candidates.append(t)
+                if not candidates:
+                    json_types = sorted(set(
+                        JSON_TYPES_TO_JSON[t.native_type] for t in cls.types
+                        if t.native_type in JSON_TYPES_TO_JSON))
+                    detail = cls.errors['json_type'].format(
+                        json_types=json_types)
+                    raise TypeSystemError(detail)
+                return candidates
+        return cls.types
+
+    @classmethod
+    def match(cls, *args, **kwargs) -> typing.Tuple[typing.Type, Any]:
+        """Validates a value and returns it along with the type it matched.
+
+        This does not modify the class, so it is safe to call concurrently
+        from multiple threads.  If the matched type is itself a `UnionType`,
+        the innermost matched type is returned.
+
+        >>> from doctor.types import UnionType, string, boolean
+        >>> class BoolOrStr(UnionType):
+        ...   description = 'bool or str'
+        ...   types = [boolean('a bool'), string('a string')]
+        ...
+        >>> matched, value = BoolOrStr.match('str')
+        >>> matched.native_type, value
+        (<class 'str'>, 'str')
+
+        :returns: A tuple of the matched type and the validated value.
+        :raises TypeSystemError: If the value is not valid for any of the
+            `types`.
+        """
+        return cls._match(args, kwargs, coerce=False)
+
+    @classmethod
+    def coerce(cls, value: Any) -> Any:
+        """Validates a value and returns it as the native type it matched.
+
+        :see: :meth:`~doctor.types.SuperType.coerce`
+        """
+        if cls.nullable and value is None:
+            return None
+        matched, value = cls._match((value,), {}, coerce=True)
+        if value is not None and type(value) is not matched.native_type:
+            value = matched.native_type(value)
+        return value
+
+    @classmethod
+    def coerce_json(cls, value: Any) -> Any:
+        """Validates a value decoded from a JSON request body.
+
+        Each of the `types` may fail after partially validating a value, so
+        values are never validated in place for a `UnionType`.
+
+        :see: :meth:`~doctor.types.SuperType.coerce_json`
+        """
+        return cls.coerce(value)
+
+    @classmethod
+    def _coerce(cls, value: Any, in_place: bool = False) -> Any:
+        if cls.nullable and value is None:
+            return None
+        _, value = cls._match((value,), {}, coerce=True)
+        return value
+
+    @classmethod
+    def _match(cls, args: tuple, kwargs: dict,
+               coerce: bool) -> typing.Tuple[typing.Type, Any]:
+        """Finds the type that matches a value.
+
+        :param args: The positional arguments to validate.
+        :param kwargs: The keyword arguments to validate.
+        :param coerce: If True, values are validated with `_coerce` instead of
+            instantiating the types.
+        :returns: A tuple of the matched type and the validated value.
+        """
         if not cls.types:
             raise TypeSystemError(
                 'Sub-class must define a `types` list attribute containing at '
                 'least 1 type.', cls=cls)
 
-        valid = False
+        candidates = cls.types
+        if len(args) == 1 and not kwargs:
+            candidates = cls._get_candidate_types(args[0])
+
+        matched = None
         value = None
         errors = {}
-        for obj_class in cls.types:
+        for obj_class in candidates:
             try:
-                value = obj_class(*args, **kwargs)
-                valid = True
-                # Dynamically change the native_type based on that of the value.
-                cls._native_type = obj_class.native_type
+                if issubclass(obj_class, UnionType):
+                    matched, value = obj_class._match(args, kwargs, coerce)
+                elif coerce:
+                    value = obj_class._coerce(*args, **kwargs)
+                    matched = obj_class
+                else:
+                    value = obj_class(*args, **kwargs)
+                    matched = obj_class
                 break
             except TypeSystemError as e:
                 errors[obj_class.__name__] = str(e)
                 continue
 
-        if not valid:
-            klasses = [klass.__name__ for klass in cls.types]
+        if matched is None:
+            klasses = [klass.__name__ for klass in candidates]
             raise TypeSystemError('Value is not one of {}. {}'.format(
                 klasses, errors))
 
-        cls.validate(value)
-        return value
+        if _has_validate(cls):
+            cls.validate(value)
+        return matched, value
 
     @classmethod
     def get_example(cls):
@@ -167,30 +401,10 @@ class UnionType(SuperType):
         """Returns the native type.
 
         Since UnionType can have multiple types, simply return the native type
-        of the first type defined in the types attribute.
-
-        If _native_type is set based on initializing a value with the class,
-        then we return the dynamically modified type that matches that of the
-        value used during instantiation.  e.g.
-
-        >>> from doctor.types import UnionType, string, boolean
-        >>> class BoolOrStr(UnionType):
-        ...   description = 'bool or str'
-        ...   types = [boolean('a bool'), string('a string')]
-        ...
-        >>> BoolOrStr.native_type
-        <class 'bool'>
-        >>> BoolOrStr('str')
-        'str'
-        >>> BoolOrStr.native_type
-        <class 'str'>
-        >>> BoolOrStr(False)
-        False
-        >>> BoolOrStr.native_type
-        <class 'bool'>
+        of the first type defined in the types attribute.  Use
+        :meth:`~doctor.types.UnionType.match` to get the type that matches a
+        particular value.
         """
-        if cls._native_type is not None:
-            return cls._native_type
         return cls.types[0].native_type
 
 
@@ -219,7 +433,11 @@ class String(SuperType, str):
         if cls.nullable and args[0] is None:
             return None
 
-        value = super().__new__(cls, *args, **kwargs)
+        if len(args) == 1 and not kwargs and type(args[0]) is str:
+            # No need to create an instance of the class for a native value.
+            value = args[0]
+        else:
+            value = super().__new__(cls, *args, **kwargs)
 
         if cls.trim_whitespace:
             value = value.strip()
@@ -236,7 +454,7 @@ class String(SuperType, str):
                 raise TypeSystemError(cls=cls, code='max_length')
 
         if cls.pattern is not None:
-            if not re.search(cls.pattern, value):
+            if not cls._get_compiled_pattern().search(value):
                 raise TypeSystemError(cls=cls, code='pattern')
 
         # Validate format, if specified
@@ -270,9 +488,23 @@ class String(SuperType, str):
         if isinstance(value, cls):
             value = cls.native_type(value)
 
-        cls.validate(value)
+        if _has_validate(cls):
+            cls.validate(value)
         return value
 
+    @classmethod
+    def _get_compiled_pattern(cls) -> typing.Pattern:
+        """Returns the compiled `pattern`.
+
+        The compiled pattern is cached on the class for the current `pattern`.
+        """
+        cached = cls.__dict__.get('_compiled_pattern')
+        if cached is not None and cached[0] is cls.pattern:
+            return cached[1]
+        compiled = re.compile(cls.pattern)
+        cls._compiled_pattern = (cls.pattern, compiled)
+        return compiled
+
     @classmethod
     def get_example(cls) -> str:
         """Returns an example value for the String type."""
@@ -310,10 +542,15 @@ class _NumericType(SuperType):
         if cls.nullable and args[0] is None:
             return None
 
-        try:
-            value = cls.native_type.__new__(cls, *args, **kwargs)
-        except (TypeError, ValueError):
-            raise TypeSystemError(cls=cls, code='type') from None
+        if (len(args) == 1 and not kwargs and
+                type(args[0]) is cls.native_type):
+            # No need to create an instance of the class for a native value.
+            value = args[0]
+        else:
+            try:
+                value = cls.native_type.__new__(cls, *args, **kwargs)
+            except (TypeError, ValueError):
+                raise TypeSystemError(cls=cls, code='type') from None
 
         if not math.isfinite(value):
             raise TypeSystemError(cls=cls, code='finite')
@@ -347,7 +584,8 @@ class _NumericType(SuperType):
         if isinstance(value, cls):
             value = cls.native_type(value)
 
-        cls.validate(value)
+        if _has_validate(cls):
+            cls.validate(value)
         return value
 
 
@@ -375,6 +613,18 @@ class Integer(_NumericType, int):
         return 1
 
 
+#: A mapping of the `str` values a `Boolean` accepts to their bool value.
+_BOOLEAN_STRINGS = {
+    'true': True,
+    'false': False,
+    'on': True,
+    'off': False,
+    '1': True,
+    '0': False,
+    '': False
+}
+
+
 class Boolean(SuperType):
     """Represents a `bool` type."""
     native_type = bool
@@ -387,23 +637,22 @@ class Boolean(SuperType):
         if cls.nullable and value is None:
             return None
 
+        if type(value) is bool:
+            if _has_validate(cls):
+                cls.validate(value)
+            return value
+
         if args and isinstance(value, str):
             try:
-                value = {
-                    'true': True,
-                    'false': False,
-                    'on': True,
-                    'off': False,
-                    '1': True,
-                    '0': False,
-                    '': False
-                }[value.lower()]
+                value = _BOOLEAN_STRINGS[value.lower()]
             except KeyError:
                 raise TypeSystemError(cls=cls, code='type') from None
-            cls.validate(value)
+            if _has_validate(cls):
+                cls.validate(value)
             return value
 
-        cls.validate(value)
+        if _has_validate(cls):
+            cls.validate(value)
         return bool(*args, **kwargs)
 
     @classmethod
@@ -438,22 +687,47 @@ class Enum(SuperType, str):
         if cls.nullable and value is None:
             return None
 
-        if cls.case_insensitive:
-            if cls.uppercase_value:
-                cls.enum = [v.upper() for v in cls.enum]
-            else:
-                cls.enum = [v.lower() for v in cls.enum]
+        try:
+            if cls.case_insensitive and not cls.uppercase_value:
                 value = value.lower()
-        if cls.lowercase_value:
-            value = value.lower()
-        if cls.uppercase_value:
-            value = value.upper()
-        if value not in cls.enum:
+            if cls.lowercase_value:
+                value = value.lower()
+            if cls.uppercase_value:
+                value = value.upper()
+            valid = value in cls._get_enum_lookup()
+        except (AttributeError, TypeError):
+            # Not a str, or not hashable, e.g. an object or an array.
+            valid = False
+        if not valid:
             raise TypeSystemError(cls=cls, code='invalid')
 
-        cls.validate(value)
+        if _has_validate(cls):
+            cls.validate(value)
         return value
 
+    @classmethod
+    def _get_enum_lookup(cls) -> typing.FrozenSet[str]:
+        """Returns the set of values an input is checked against.
+
+        The set is normalized for `case_insensitive` enums and cached on the
+        class for the current `enum` list.  Computing it more than once is
+        harmless, so no locking is needed when called from multiple threads.
+        """
+        cached = cls.__dict__.get('_enum_lookup')
+        options = (cls.case_insensitive, cls.uppercase_value)
+        if (cached is not None and cached[0] is cls.enum and
+                cached[1] == options):
+            return cached[2]
+        enum = cls.enum
+        lookup = frozenset(enum)
+        if cls.case_insensitive:
+            if cls.uppercase_value:
+                lookup = frozenset(v.upper() for v in enum)
+            else:
+                lookup = frozenset(v.lower() for v in enum)
+        cls._enum_lookup = (enum, options, lookup)
+        return lookup
+
     @classmethod
     def get_example(cls) -> str:
         """Returns an example value for the Enum type."""
@@ -494,72 +768,154 @@ class Object(SuperType, dict):
         except (ValueError, TypeError):
             if (len(args) == 1 and not kwargs and
                     hasattr(args[0], '__dict__')):
-                value = dict(args[0].__dict__)
+                self.update(args[0].__dict__)
             else:
                 raise TypeSystemError(
                     cls=self.__class__, code='type') from None
-        value = self
 
+        self._validate_properties(self, self, coerce=False)
+
+        if _has_validate(self):
+            self.validate(self.copy())
+
+    @classmethod
+    def _coerce(cls, value: Any,
+                in_place: bool = False) -> typing.Optional[dict]:
+        if cls.nullable and value is None:
+            return None
+        if cls.__init__ is not Object.__init__:
+            # The type customizes validation, so it needs to be instantiated.
+            return super()._coerce(value)
+
+        value = cls._to_dict(value)
+        result = value if in_place and type(value) is dict else {}
+        cls._validate_properties(value, result, coerce=True, in_place=in_place)
+
+        if _has_validate(cls):
+            cls.validate(result)
+        return result
+
+    @classmethod
+    def coerce_lazy(cls, value: Any) -> typing.Optional[Mapping]:
+        """Validates a value, deferring the validation of its properties.
+
+        Only the structure of the value is validated: that it is an object
+        with all the required properties, no additional properties if they
+        are not allowed and the `property_dependencies`.  Each property is
+        validated the first time it is read from the returned
+        :class:`~doctor.types.LazyObject`, so the cost of validating an
+        object with many properties depends on how many of them are used.
+
+        If the type overrides `validate` or `__init__`, the value needs to
+        be validated as a whole, so a `dict` is returned as by
+        :meth:`~doctor.types.SuperType.coerce`.
+
+        :param value: The value to validate.
+        :returns: A read-only :class:`~doctor.types.LazyObject`.
+        :raises TypeSystemError: If the structure of the value is not valid.
+        """
+        if cls.nullable and value is None:
+            return None
+        if _has_validate(cls) or cls.__init__ is not Object.__init__:
+            return cls.coerce(value)
+
+        value = cls._to_dict(value)
+        result = {}
+        cls._validate_properties(value, result, coerce=True, lazy=True)
+        # Defaults of missing properties aren't validated.
+        defaults = {key: item for key, item in result.items()
+                    if key not in value}
+        return LazyObject(cls, result, defaults)
+
+    @classmethod
+    def _to_dict(cls, value: Any) -> dict:
+        """Converts a value to a `dict` for `_coerce` and `coerce_lazy`."""
+        if isinstance(value, dict):
+            return value
+        try:
+            return dict(value)
+        except (ValueError, TypeError):
+            if not hasattr(value, '__dict__'):
+                raise TypeSystemError(cls=cls, code='type') from None
+            return dict(value.__dict__)
+
+    @classmethod
+    def _validate_properties(cls, value: dict, result: dict, coerce: bool,
+                             in_place: bool = False, lazy: bool = False):
+        """Validates the properties of a value and sets them on `result`.
+
+        :param value: The `dict` to validate.
+        :param result: The `dict` the validated properties are set on.  This
+            may be the same `dict` as `value`.
+        :param coerce: If True each property is validated with `_coerce`
+            instead of instantiating its type.
+        :param in_place: Passed to `_coerce` for each property.
+        :param lazy: If True the properties are set on `result` without
+            being validated.  Only the required and additional properties and
+            the property dependencies are checked.
+        :raises TypeSystemError: If the value is not valid.
+        """
         # Ensure all property keys are strings.
         errors = {}
         if any(not isinstance(key, str) for key in value.keys()):
-            raise TypeSystemError(cls=self.__class__, code='invalid_key')
+            raise TypeSystemError(cls=cls, code='invalid_key')
 
         # Properties
-        for key, child_schema in self.properties.items():
+        for key, child_schema in cls.properties.items():
             try:
                 item = value[key]
             except KeyError:
                 if hasattr(child_schema, 'default'):
                     # If a key is missing but has a default, then use that.
-                    self[key] = child_schema.default
-                elif key in self.required:
-                    exc = TypeSystemError(cls=self.__class__, code='required')
+                    result[key] = child_schema.default
+                elif key in cls.required:
+                    exc = TypeSystemError(cls=cls, code='required')
                     errors[key] = exc.detail
             else:
                 # Coerce value into the given schema type if needed.
-                if isinstance(item, child_schema):
-                    self[key] = item
-                else:
-                    try:
-                        self[key] = child_schema(item)
-                    except TypeSystemError as exc:
-                        errors[key] = exc.detail
+                try:
+                    if lazy:
+                        result[key] = item
+                    elif coerce:
+                        coerced = child_schema._coerce(item, in_place)
+                        if coerced is not item or result is not value:
+                            result[key] = coerced
+                    elif isinstance(item, child_schema):
+                        result[key] = item
+                    else:
+                        result[key] = child_schema(item)
+                except TypeSystemError as exc:
+                    errors[key] = exc.detail
 
         # If additional properties are allowed set any other key/value(s) not
         # in the defined properties.
-        if self.additional_properties:
-            for key, value in value.items():
-                if key not in self:
-                    self[key] = value
-
-        # Raise an exception if additional properties are defined and
-        # not allowed.
-        if not self.additional_properties:
-            properties = list(self.properties.keys())
-            for key in self.keys():
-                if key not in properties:
-                    detail = '{key} not in {properties}'.format(
-                        key=key, properties=properties)
-                    exc = TypeSystemError(detail, cls=self.__class__,
-                                          code='additional_properties')
+        if cls.additional_properties:
+            if result is not value:
+                for key, item in value.items():
+                    if key not in result:
+                        result[key] = item
+        else:
+            # Raise an exception if additional properties are defined and
+            # not allowed.
+            for key in value.keys():
+                if key not in cls.properties:
+                    exc = TypeSystemError(
+                        cls=cls, code='additional_properties')
                     errors[key] = exc.detail
 
         # Check for any property dependencies that are defined.
-        if self.property_dependencies:
+        if cls.property_dependencies:
             err = 'Required properties {} for property `{}` are missing.'
-            for prop, dependencies in self.property_dependencies.items():
-                if prop in self:
+            for prop, dependencies in cls.property_dependencies.items():
+                if prop in value or prop in result:
                     for dep in dependencies:
-                        if dep not in self:
+                        if dep not in value and dep not in result:
                             raise TypeSystemError(err.format(
                                 dependencies, prop))
 
         if errors:
             raise TypeSystemError(errors)
 
-        self.validate(self.copy())
-
     @classmethod
     def get_example(cls) -> dict:
         """Returns an example value for the Dict type.
@@ -572,6 +928,191 @@ class Object(SuperType, dict):
         return {k: v.get_example() for k, v in cls.properties.items()}
 
 
+class LazyObject(Mapping):
+    """A read-only mapping returned by :meth:`Object.coerce_lazy`.
+
+    Each property is validated the first time it is read, and the validated
+    value is kept for later reads.  A property that is not valid raises a
+    :class:`~doctor.errors.TypeSystemError` when it is read.
+
+    :param cls: The `Object` type of the value.
+    :param values: The values of the properties, which haven't been
+        validated yet.
+    :param validated: The values of the properties that have already been
+        validated.
+    """
+    __slots__ = ('_type', '_values', '_validated')
+
+    def __init__(self, cls: typing.Type[Object], values: dict,
+                 validated: dict = None):
+        self._type = cls
+        self._values = values
+        self._validated = validated or {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._validated[key]
+        except KeyError:
+            pass
+        item = self._values[key]
+        prop = self._type.properties.get(key)
+        if prop is not None:
+            try:
+                item = prop._coerce(item)
+            except TypeSystemError as e:
+                raise TypeSystemError({key: e.detail}) from None
+        self._validated[key] = item
+        return item
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(self.__class__.__name__, self._values)
+
+    def validate(self) -> dict:
+        """Validates all properties that haven't been read yet.
+
+        :returns: A `dict` of the validated properties, as returned by
+            :meth:`~doctor.types.SuperType.coerce`.
+        :raises TypeSystemError: If any of the properties are not valid.
+        """
+        errors = {}
+        result = {}
+        for key in self._values:
+            try:
+                result[key] = self[key]
+            except TypeSystemError as e:
+                errors.update(e.detail)
+        if errors:
+            raise TypeSystemError(errors)
+        return result
+
+
+#: The minimum number of items an `Array` whose items are a `Number` or
+#: `Integer` type needs before the items are validated in bulk.
+BULK_NUMERIC_MIN_ITEMS = 64
+
+#: A mapping of numeric native type to the value types it accepts in bulk.
+_BULK_NUMERIC_TYPES = {
+    float: (frozenset([float, int]), 'd'),
+    int: (frozenset([int]), 'q'),
+}
+
+
+def _check_numeric_bounds(items: typing.Type[_NumericType], low: Any,
+                          high: Any) -> bool:
+    """Checks the smallest and largest values against a numeric type.
+
+    :param items: The `Number` or `Integer` type.
+    :param low: The smallest value.
+    :param high: The largest value.
+    :returns: True if the values are within the bounds of the type.
+    """
+    if items.minimum is not None:
+        if items.exclusive_minimum and low <= items.minimum:
+            return False
+        if low < items.minimum:
+            return False
+    if items.maximum is not None:
+        if items.exclusive_maximum and high >= items.maximum:
+            return False
+        if high > items.maximum:
+            return False
+    return True
+
+
+def _bulk_validate_numeric(items: typing.Type[_NumericType],
+                           value: list) -> typing.Optional[list]:
+    """Validates a list of numbers against a numeric type in one pass.
+
+    NumPy is used if it is installed, otherwise the values are packed into an
+    `array.array`.  Only lists containing native numbers are handled and
+    types that override `__new__` or `validate` are skipped, since they
+    need to see each value.
+
+    :param items: The `Number` or `Integer` type of the array items.
+    :param value: The list of values to validate.
+    :returns: A list of the coerced values, or None if the values could not
+        be validated in bulk.  In that case each item should be validated
+        individually in order to get the errors.
+    """
+    if (items.nullable or items.__new__ is not _NumericType.__new__ or
+            _has_validate(items)):
+        return None
+    try:
+        allowed, typecode = _BULK_NUMERIC_TYPES[items.native_type]
+    except KeyError:
+        return None
+    if not set(map(type, value)) <= allowed:
+        return None
+
+    multiple_of = items.multiple_of
+    try:
+        if numpy is not None:
+            values = numpy.array(value, dtype=typecode)
+            if typecode == 'd' and not numpy.isfinite(values).all():
+                return None
+            if not _check_numeric_bounds(items, values.min(), values.max()):
+                return None
+            if isinstance(multiple_of, float):
+                scaled = values * (1 / multiple_of)
+                if (scaled != numpy.floor(scaled)).any():
+                    return None
+            elif multiple_of is not None and (values % multiple_of).any():
+                return None
+            return values.tolist()
+
+        values = native_array(typecode, value)
+    except OverflowError:
+        return None
+    if typecode == 'd' and not all(map(math.isfinite, values)):
+        return None
+    if not _check_numeric_bounds(items, min(values), max(values)):
+        return None
+    if isinstance(multiple_of, float):
+        scaled = map(operator.mul, values, repeat(1 / multiple_of))
+        if not all(map(float.is_integer, scaled)):
+            return None
+    elif multiple_of is not None and any(
+            map(operator.mod, values, repeat(multiple_of))):
+        return None
+    return values.tolist()
+
+
+#: Types of JSON values that can be hashed as is.
+_JSON_SCALAR_TYPES = frozenset([float, int, str, type(None)])
+
+
+def get_json_key(value: Any) -> typing.Hashable:
+    """Returns a hashable key for a JSON value.
+
+    Two values have the same key if they are equal JSON values, regardless of
+    the order of keys in objects.  This allows arrays of objects and arrays
+    to be checked for unique items with a set.
+
+    >>> get_json_key({'a': [1, 2], 'b': True}) == get_json_key(
+    ...     {'b': True, 'a': [1, 2]})
+    True
+
+    :param value: The value.
+    :returns: A hashable key.
+    """
+    if type(value) in _JSON_SCALAR_TYPES:
+        return value
+    if isinstance(value, dict):
+        return frozenset([(k, get_json_key(v)) for k, v in value.items()])
+    if isinstance(value, (list, tuple)):
+        return tuple([get_json_key(v) for v in value])
+    if isinstance(value, bool):
+        # Otherwise True and 1 would be considered equal.
+        return (bool, value)
+    return value
+
+
 class Array(SuperType, list):
     """Represents a `list` type."""
     native_type = list
@@ -607,46 +1148,113 @@ class Array(SuperType, list):
         except TypeError:
             raise TypeSystemError(cls=self.__class__, code='type') from None
 
-        if isinstance(self.items, list) and len(self.items) > 1:
-            if len(value) < len(self.items):
-                raise TypeSystemError(cls=self.__class__, code='min_items')
-            elif len(value) > len(self.items) and not self.additional_items:
-                raise TypeSystemError(cls=self.__class__, code='max_items')
+        self._validate_items(value, self, coerce=False)
+
+        if _has_validate(self):
+            self.validate(value)
+
+    @classmethod
+    def _coerce(cls, value: Any,
+                in_place: bool = False) -> typing.Optional[list]:
+        if cls.nullable and value is None:
+            return None
+        if cls.__init__ is not Array.__init__:
+            # The type customizes validation, so it needs to be instantiated.
+            return super()._coerce(value)
+
+        if isinstance(value, (str, bytes)):
+            raise TypeSystemError(cls=cls, code='type')
+        if not isinstance(value, list):
+            try:
+                value = list(value)
+            except TypeError:
+                raise TypeSystemError(cls=cls, code='type') from None
+
+        result = value if in_place and type(value) is list else []
+        cls._validate_items(value, result, coerce=True, in_place=in_place)
+
+        if _has_validate(cls):
+            cls.validate(value)
+        return result
 
-        if len(value) < self.min_items:
-            raise TypeSystemError(cls=self.__class__, code='min_items')
-        elif self.max_items is not None and len(value) > self.max_items:
-            raise TypeSystemError(cls=self.__class__, code='max_items')
+    @classmethod
+    def _validate_items(cls, value: list, result: list, coerce: bool,
+                        in_place: bool = False):
+        """Validates the items of a value and appends them to `result`.
+
+        :param value: The `list` to validate.
+        :param result: The `list` the validated items are appended to.  If
+            this is the same `list` as `value`, items are replaced in place
+            instead.
+        :param coerce: If True each item is validated with `_coerce` instead
+            of instantiating its type.
+        :param in_place: Passed to `_coerce` for each item.
+        :raises TypeSystemError: If the value is not valid.
+        """
+        if isinstance(cls.items, list) and len(cls.items) > 1:
+            if len(value) < len(cls.items):
+                raise TypeSystemError(cls=cls, code='min_items')
+            elif len(value) > len(cls.items) and not cls.additional_items:
+                raise TypeSystemError(cls=cls, code='max_items')
+
+        if len(value) < cls.min_items:
+            raise TypeSystemError(cls=cls, code='min_items')
+        elif cls.max_items is not None and len(value) > cls.max_items:
+            raise TypeSystemError(cls=cls, code='max_items')
+
+        # Large arrays of numbers are validated in one pass.  If that fails
+        # each item is validated below in order to get the errors.
+        if (len(value) >= BULK_NUMERIC_MIN_ITEMS and
+                isinstance(cls.items, type) and
+                issubclass(cls.items, _NumericType)):
+            coerced = _bulk_validate_numeric(cls.items, value)
+            if coerced is not None and (
+                    not cls.unique_items or
+                    len(set(coerced)) == len(coerced)):
+                if result is value:
+                    value[:] = coerced
+                else:
+                    result.extend(coerced)
+                return
 
         # Ensure all items are of the right type.
         errors = {}
-        if self.unique_items:
+        if cls.unique_items:
             seen_items = set()
 
-        for pos, item in enumerate(value):
+        for pos, original in enumerate(value):
+            item = original
             try:
-                if isinstance(self.items, list):
-                    if pos < len(self.items):
-                        item = self.items[pos](item)
-                elif self.items is not None:
-                    item = self.items(item)
-
-                if self.unique_items:
-                    if item in seen_items:
-                        raise TypeSystemError(
-                            cls=self.__class__, code='unique_items')
+                if isinstance(cls.items, list):
+                    if pos < len(cls.items):
+                        item_type = cls.items[pos]
                     else:
-                        seen_items.add(item)
+                        item_type = None
+                else:
+                    item_type = cls.items
+                if item_type is not None:
+                    if coerce:
+                        item = item_type._coerce(item, in_place)
+                    else:
+                        item = item_type(item)
+
+                if cls.unique_items:
+                    key = get_json_key(item)
+                    if key in seen_items:
+                        raise TypeSystemError(cls=cls, code='unique_items')
+                    else:
+                        seen_items.add(key)
 
-                self.append(item)
+                if result is not value:
+                    result.append(item)
+                elif item is not original:
+                    value[pos] = item
             except TypeSystemError as exc:
                 errors[pos] = exc.detail
 
         if errors:
             raise TypeSystemError(errors)
 
-        self.validate(value)
-
     @classmethod
     def get_example(cls) -> list:
         """Returns an example value for the Array type.
@@ -688,10 +1296,7 @@ class JsonSchema(SuperType):
             _, value = parse_value(value, [cls.json_type])
         except ValueError:
             pass
-        request_schema = None
         if cls.definition_key is not None:
-            params = [cls.definition_key]
-            request_schema = cls.schema._create_request_schema(params, params)
             data = {cls.definition_key: value}
         else:
             data = value
@@ -699,7 +1304,7 @@ class JsonSchema(SuperType):
         super().__new__(cls)
         # Validate the data against the schema and raise an error if it
         # does not validate.
-        validator = cls.schema.get_validator(request_schema)
+        validator = cls._get_validator()
         try:
             cls.schema.validate(data, validator)
         except SchemaValidationError as e:
@@ -707,6 +1312,25 @@ class JsonSchema(SuperType):
 
         return value
 
+    @classmethod
+    def _get_validator(cls) -> typing.Any:
+        """Returns the jsonschema validator values are validated with.
+
+        The validator is cached on the class for the current `schema` and
+        `definition_key`, so the request schema is only created once.
+        """
+        cached = cls.__dict__.get('_validator')
+        if (cached is not None and cached[0] is cls.schema and
+                cached[1] == cls.definition_key):
+            return cached[2]
+        request_schema = None
+        if cls.definition_key is not None:
+            params = [cls.definition_key]
+            request_schema = cls.schema._create_request_schema(params, params)
+        validator = cls.schema.get_validator(request_schema)
+        cls._validator = (cls.schema, cls.definition_key, validator)
+        return validator
+
     @classmethod
     def get_example(cls) -> typing.Any:
         """Returns an example value for the JsonSchema type."""
@@ -723,6 +1347,24 @@ JSON_TYPES_TO_NATIVE = {
     'string': str,
 }
 
+#: A mapping of native python types to json types.
+JSON_TYPES_TO_JSON = {v: k for k, v in JSON_TYPES_TO_NATIVE.items()}
+
+#: A mapping of the type of a value to the native types of the doctor types
+#: that can accept it when dispatching a `UnionType` on JSON type.
+_JSON_DISPATCH_TYPES = {
+    bool: (bool,),
+    dict: (dict,),
+    float: (float, int),
+    int: (int, float),
+    list: (list,),
+    str: (str,),
+}
+
+#: The native types that are dispatched on when dispatching a `UnionType` on
+#: JSON type.
+_JSON_DISPATCH_NATIVE_TYPES = (bool, dict, float, int, list, str)
+
 
 def get_value_from_schema(schema, definition: dict, key: str,
                           definition_key: str):
@@ -48,6 +48,9 @@ setup(
         'strict-rfc3339 >= 0.5, < 1.0',
     ],
     extras_require={
+        'brotli': [
+            'brotli >= 1.0.0, < 2.0.0',
+        ],
         'docs': [
             'mock >= 2.0.0, < 3.0.0',
             'sphinx >= 1.5.4, < 2.0.0',
@@ -55,13 +58,18 @@ setup(
             'sphinx-rtd-theme >= 0.2.4, < 1.0.0',
             'sphinxcontrib-httpdomain >= 1.5.0, < 2.0.0',
         ],
+        'msgpack': [
+            'msgpack >= 0.6.0, < 2.0.0',
+        ],
         'tests': [
+            'brotli >= 1.0.0, < 2.0.0',
             'coverage >= 4.4.1, < 5.0.0',
             'flake8 >= 3.3.0, < 4.0.0',
             'flask >= 0.10.1, < 1.0.0',
             'flask-restful==0.3.6',
             'Flask-Testing==0.6.2',
             'mock >= 2.0.0, < 3.0.0',
+            'msgpack >= 0.6.0, < 2.0.0',
             'pytest >= 3.3.2, < 4.0.0',
         ],
     },
@@ -0,0 +1,192 @@
+import inspect
+import threading
+
+import mock
+import pytest
+from flask import Flask
+from flask_restful import Api
+
+from doctor.cache import Cache, CacheInfo, memoize
+from doctor.flask import create_routes
+from doctor.routing import Deadline, get, Route
+from doctor.types import array, boolean, integer, Object
+
+from .types import Age, IsAlive
+
+Ages = array('ages', items=Age)
+
+
+class Filters(Object):
+    description = 'Filters'
+    properties = {
+        'is_alive': boolean('Is alive?'),
+        'min_age': integer('Minimum age'),
+    }
+
+
+class TestCache(object):
+
+    def test_get_or_call(self):
+        cache = Cache()
+        func = mock.Mock(return_value=1)
+        assert 1 == cache.get_or_call('a', func)
+        assert 1 == cache.get_or_call('a', func)
+        assert 1 == func.call_count
+        assert CacheInfo(1, 1, 128, 1) == cache.info()
+
+        cache.clear()
+        assert CacheInfo(0, 0, 128, 0) == cache.info()
+        assert 1 == cache.get_or_call('a', func)
+        assert 2 == func.call_count
+
+    def test_errors_are_not_cached(self):
+        cache = Cache()
+        func = mock.Mock(side_effect=[ValueError('boom'), 2])
+        with pytest.raises(ValueError, match='boom'):
+            cache.get_or_call('a', func)
+        assert 2 == cache.get_or_call('a', func)
+        assert 0 == len(cache._key_locks)
+
+    def test_lru_eviction(self):
+        cache = Cache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # Reading `a` makes `b` the least recently used entry.
+        assert 1 == cache.get_or_call('a', mock.Mock())
+        cache.set('c', 3)
+        assert 2 == len(cache)
+        assert 1 == cache.get_or_call('a', mock.Mock())
+        assert 4 == cache.get_or_call('b', mock.Mock(return_value=4))
+
+    @mock.patch('doctor.cache.time.monotonic')
+    def test_ttl_eviction(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        cache = Cache(ttl=10)
+        cache.set('a', 1)
+        mock_monotonic.return_value = 109.9
+        assert 1 == cache.get_or_call('a', mock.Mock())
+        mock_monotonic.return_value = 110.0
+        assert 2 == cache.get_or_call('a', mock.Mock(return_value=2))
+
+    def test_concurrent_misses_are_computed_once(self):
+        cache = Cache()
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            finish.wait(5)
+            return 'value'
+
+        results = []
+
+        def call():
+            results.append(cache.get_or_call('a', func))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        threads[0].start()
+        assert started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # The other callers wait on the lock of the key.
+        for _ in range(500):
+            if cache._key_locks['a'][1] == 4:
+                break
+            threading.Event().wait(0.01)
+        assert 4 == cache._key_locks['a'][1]
+        finish.set()
+        for thread in threads:
+            thread.join(5)
+        assert [1] == calls
+        assert ['value'] * 4 == results
+        assert CacheInfo(3, 1, 128, 1) == cache.info()
+        assert {} == cache._key_locks
+
+
+class TestMemoize(object):
+
+    def test_memoize(self):
+        calls = []
+
+        @memoize()
+        def get_ages(is_alive: IsAlive = True, filters: Filters = None):
+            calls.append((is_alive, filters))
+            return [len(calls)]
+
+        assert [1] == get_ages()
+        # Omitted arguments are keyed by their defaults.
+        assert [1] == get_ages(True)
+        assert [1] == get_ages(is_alive=True, filters=None)
+        assert [2] == get_ages(False)
+        # Objects are keyed canonically.
+        assert [3] == get_ages(filters={'is_alive': True, 'min_age': 2})
+        assert [3] == get_ages(filters={'min_age': 2, 'is_alive': True})
+        assert 3 == len(calls)
+        assert CacheInfo(3, 3, 128, 3) == get_ages.cache_info()
+
+        get_ages.cache_clear()
+        assert [4] == get_ages()
+
+    def test_unhashable_arguments_are_not_cached(self):
+        func = mock.Mock(return_value=1)
+
+        @memoize()
+        def get_ages(is_alive: IsAlive):
+            return func(is_alive)
+
+        assert 1 == get_ages({1, 2})
+        assert 1 == get_ages({1, 2})
+        assert 2 == func.call_count
+        assert 0 == len(get_ages.cache)
+
+    def test_deadline_is_not_part_of_key(self):
+        @memoize(ttl=60)
+        def get_ages(deadline: Deadline, is_alive: IsAlive = True):
+            return [deadline.timeout]
+
+        assert [1] == get_ages(Deadline(1))
+        assert [1] == get_ages(Deadline(2))
+        assert [None] == get_ages(Deadline(), is_alive=False)
+
+    def test_coroutine_functions_are_not_supported(self):
+        async def get_ages():
+            return []
+
+        with pytest.raises(TypeError, match='coroutine'):
+            memoize()(get_ages)
+
+    def test_http_method_sees_annotations(self):
+        @memoize()
+        def get_ages(is_alive: IsAlive = True) -> Ages:
+            return [1]
+
+        m = get(get_ages)
+        sig = m.logic._doctor_signature
+        assert IsAlive is sig.parameters['is_alive'].annotation
+        assert Ages is sig.return_annotation
+        assert inspect.signature(get_ages) == sig
+
+    def test_flask(self):
+        calls = []
+
+        @memoize(ttl=60)
+        def get_ages(is_alive: IsAlive = True) -> Ages:
+            calls.append(is_alive)
+            return [len(calls)]
+
+        app = Flask('test')
+        api = Api(app)
+        for route, resource in create_routes((
+                Route('/ages/', methods=[get(get_ages)]),)):
+            api.add_resource(resource, route)
+        client = app.test_client()
+
+        # The params are coerced, so these requests share a result.
+        assert [1] == client.get('/ages/').json
+        assert [1] == client.get('/ages/?is_alive=true').json
+        assert [1] == client.get('/ages/?is_alive=True').json
+        assert [2] == client.get('/ages/?is_alive=false').json
+        assert [True, False] == calls
+        assert CacheInfo(2, 2, 128, 2) == get_ages.cache_info()
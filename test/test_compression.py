@@ -0,0 +1,177 @@
+import gzip
+import io
+import json
+import zlib
+
+import pytest
+from flask import Flask, Response as FlaskResponse
+from flask_restful import Api
+
+from doctor.compression import (
+    compress, compress_stream, decompress_stream, is_compressible,
+    negotiate_encoding, parse_accept_encoding)
+from doctor.errors import InvalidValueError, PayloadTooLargeError
+from doctor.flask import create_routes, enable_compression
+from doctor.routing import get, post, Route
+
+from .types import Foos
+
+
+def test_is_compressible():
+    assert is_compressible('application/json')
+    assert is_compressible('application/problem+json')
+    assert is_compressible('text/html')
+    assert not is_compressible('image/png')
+    assert not is_compressible(None)
+
+
+def test_parse_accept_encoding():
+    assert {} == parse_accept_encoding(None)
+    expected = {'gzip': 1.0, 'br': 0.5, '*': 0.0, 'deflate': 0.0}
+    assert expected == parse_accept_encoding(
+        'GZIP, br;q=0.5, *;q=0, deflate;q=abc')
+
+
+@pytest.mark.parametrize('header,expected', (
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate, gzip', 'gzip'),
+    ('deflate, gzip;q=0.5', 'deflate'),
+    ('*', 'gzip'),
+    ('*, gzip;q=0', 'deflate'),
+    ('gzip;q=0', None),
+))
+def test_negotiate_encoding(header, expected):
+    assert expected == negotiate_encoding(header, ('gzip', 'deflate'))
+
+
+def test_compress():
+    data = b'{"foo": "bar"}' * 100
+    assert data == gzip.decompress(compress(data, 'gzip', level=1))
+    assert data == zlib.decompress(compress(data, 'deflate'))
+    with pytest.raises(ValueError, match='Unsupported encoding'):
+        compress(data, 'zstd')
+
+
+def test_compress_stream():
+    chunks = [b'{"foo": ', b'"bar"}'] * 50
+    compressed = list(compress_stream(iter(chunks), 'gzip'))
+    assert len(compressed) > 2
+    # Each chunk can be decompressed as soon as it is received.
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert b'{"foo": ' == decompressor.decompress(compressed[0])
+    assert b''.join(chunks) == gzip.decompress(b''.join(compressed))
+
+
+def test_decompress_stream():
+    data = b'a' * 1000
+    for compressed in (gzip.compress(data), zlib.compress(data)):
+        assert data == decompress_stream(io.BytesIO(compressed), 'gzip', 1000)
+        assert data == decompress_stream(
+            io.BytesIO(compressed + b'extra'), 'deflate', 1000,
+            length=len(compressed))
+
+
+def test_decompress_stream_too_large():
+    # A small body that decompresses to 10MB.
+    compressed = gzip.compress(b'\0' * 10 * 1024 * 1024)
+    with pytest.raises(PayloadTooLargeError, match='larger than 999 bytes'):
+        decompress_stream(io.BytesIO(compressed), 'gzip', 999)
+
+
+def test_decompress_stream_invalid():
+    compressed = gzip.compress(b'a' * 1000)
+    with pytest.raises(InvalidValueError, match='not valid gzip'):
+        decompress_stream(io.BytesIO(b'abc'), 'gzip', 1000)
+    with pytest.raises(InvalidValueError, match='not valid gzip'):
+        decompress_stream(io.BytesIO(compressed[:-4]), 'gzip', 1000)
+    with pytest.raises(InvalidValueError, match='not valid gzip'):
+        decompress_stream(io.BytesIO(compressed), 'gzip', 1000, length=10)
+    with pytest.raises(InvalidValueError, match='Unsupported'):
+        decompress_stream(io.BytesIO(compressed), 'br', 1000)
+
+
+def get_foos() -> Foos:
+    return ['foo'] * 1000
+
+
+def echo_foos(foos: Foos) -> Foos:
+    return foos
+
+
+@pytest.fixture
+def app():
+    app = Flask('test')
+    api = Api(app)
+    for route, resource in create_routes((
+            Route('/foos/', methods=[get(get_foos), post(echo_foos)]),)):
+        api.add_resource(resource, route)
+
+    @app.route('/stream/')
+    def stream():
+        return FlaskResponse(
+            (json.dumps(foo) for foo in ['a', 'b']),
+            mimetype='application/json')
+
+    @app.route('/foo/')
+    def foo():
+        return FlaskResponse('"foo"', mimetype='application/json')
+
+    enable_compression(app, min_size=100, level=1, max_request_size=10000)
+    return app
+
+
+def test_enable_compression_response(app):
+    client = app.test_client()
+    response = client.get('/foos/', headers={'Accept-Encoding': 'gzip'})
+    assert 200 == response.status_code
+    assert 'gzip' == response.headers['Content-Encoding']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert ['foo'] * 1000 == json.loads(gzip.decompress(response.data))
+
+    response = client.get('/foos/', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert ['foo'] * 1000 == response.json
+
+    # Small responses are not compressed.
+    response = client.get('/foo/', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert b'"foo"' == response.data
+
+
+def test_enable_compression_streamed_response(app):
+    client = app.test_client()
+    response = client.get('/stream/', headers={'Accept-Encoding': 'deflate'})
+    assert 'deflate' == response.headers['Content-Encoding']
+    assert 'Content-Length' not in response.headers
+    assert b'"a""b"' == zlib.decompress(response.data)
+
+
+def test_enable_compression_request(app):
+    client = app.test_client()
+    body = gzip.compress(json.dumps({'foos': ['a', 'b']}).encode('utf-8'))
+    response = client.post(
+        '/foos/', data=body, content_type='application/json',
+        headers={'Content-Encoding': 'gzip'})
+    assert 201 == response.status_code
+    assert ['a', 'b'] == response.json
+
+    body = gzip.compress(json.dumps({'foos': ['a'] * 10000}).encode('utf-8'))
+    response = client.post(
+        '/foos/', data=body, content_type='application/json',
+        headers={'Content-Encoding': 'gzip'})
+    assert 413 == response.status_code
+
+    response = client.post(
+        '/foos/', data=b'abc', content_type='application/json',
+        headers={'Content-Encoding': 'gzip'})
+    assert 400 == response.status_code
+
+    response = client.post(
+        '/foos/', data=b'abc', content_type='application/json',
+        headers={'Content-Encoding': 'zstd'})
+    assert 415 == response.status_code
@@ -0,0 +1,89 @@
+import pytest
+
+from doctor.errors import TypeSystemError
+from doctor.fields import prune, select_fields, supports_fields
+from doctor.types import array, integer, new_type, string, Object
+
+from .types import Foo, FooInstance
+
+
+AuthorName = string('author name', min_length=1)
+Author = new_type(Object, description='An author.', properties={
+    'author_id': integer('author id'),
+    'name': AuthorName,
+}, required=['author_id', 'name'], additional_properties=False)
+Note = new_type(Object, description='A note.', properties={
+    'note_id': integer('note id'),
+    'body': string('body'),
+    'author': Author,
+}, required=['note_id', 'body'], additional_properties=False,
+    property_dependencies={'body': ['note_id']})
+Notes = array('notes', items=Note)
+
+
+def test_supports_fields():
+    assert supports_fields(Note)
+    assert supports_fields(Notes)
+    assert not supports_fields(Foo)
+    assert not supports_fields(array('foos', items=Foo))
+    assert not supports_fields(dict)
+    assert not supports_fields(None)
+
+
+def test_select_fields():
+    tree, sparse_type = select_fields(Note, 'note_id, author.name')
+    assert {'note_id': None, 'author': {'name': None}} == tree
+    assert {'note_id', 'author'} == set(sparse_type.properties)
+    assert ['note_id'] == sparse_type.required
+    assert {} == sparse_type.property_dependencies
+    author_type = sparse_type.properties['author']
+    assert ['name'] == list(author_type.properties)
+    assert ['name'] == author_type.required
+    # The original types are unchanged.
+    assert 3 == len(Note.properties)
+    assert 2 == len(Author.properties)
+
+    # Requesting a whole property includes its nested properties.
+    tree, _ = select_fields(Note, 'author,author.name')
+    assert {'author': None} == tree
+    tree, _ = select_fields(Note, 'author.name,author')
+    assert {'author': None} == tree
+
+    # Dependencies are kept if all of their properties are requested.
+    _, sparse_type = select_fields(Note, 'body,note_id')
+    assert {'body': ['note_id']} == sparse_type.property_dependencies
+
+
+def test_select_fields_array():
+    tree, sparse_type = select_fields(Notes, 'author.author_id')
+    assert {'author': {'author_id': None}} == tree
+    assert ['author'] == list(sparse_type.items.properties)
+    assert Notes.items is Note
+
+
+def test_select_fields_unknown():
+    with pytest.raises(TypeSystemError,
+                       match='Unknown fields: foo, author.foo, body.foo.'):
+        select_fields(Note, 'foo,author.foo,body.foo,note_id')
+
+
+def test_select_fields_cached():
+    assert select_fields(FooInstance, 'foo') is select_fields(
+        FooInstance, 'foo')
+
+
+def test_prune():
+    tree, sparse_type = select_fields(Notes, 'note_id,author.name')
+    notes = [
+        {'note_id': 1, 'body': 'Hi', 'author': {'author_id': 1, 'name': 'a'}},
+        {'note_id': 2, 'body': 'Bye'},
+    ]
+    expected = [{'note_id': 1, 'author': {'name': 'a'}}, {'note_id': 2}]
+    assert expected == prune(notes, tree)
+    assert expected == sparse_type(expected)
+    # The response is not modified.
+    assert 'body' in notes[0]
+
+    # Values that are not objects are returned as is.
+    assert prune(None, tree) is None
+    assert {'author': None} == prune({'author': None}, tree)
@@ -1,25 +1,31 @@
 import inspect
 import os
+from datetime import date
 from functools import wraps
 
 import mock
 import pytest
+from flask import Flask
+from flask_restful import Api
 
 from doctor.errors import (
     ForbiddenError, ImmutableError, InvalidValueError, NotFoundError,
-    UnauthorizedError)
+    ServiceUnavailableError, UnauthorizedError)
 from doctor.flask import (
-    handle_http, HTTP400Exception, HTTP401Exception, HTTP403Exception,
-    HTTP404Exception, HTTP409Exception, HTTP500Exception,
-    should_raise_response_validation_errors)
+    create_routes, enable_msgpack, handle_http, HTTP400Exception,
+    HTTP401Exception, HTTP403Exception, HTTP404Exception, HTTP409Exception,
+    HTTP500Exception, HTTP503Exception, _reject_msgpack_bin,
+    should_raise_response_validation_errors, slow_requests,
+    SlowRequestRecorder)
 from doctor.types import new_type
 from doctor.response import Response
+from doctor.routing import get, Route
 from doctor.utils import (
     add_param_annotations, get_params_from_func, Params, RequestParamAnnotation)
 
 from .types import (
-    Auth, Colors, ColorsOrObject, FooInstance, Item, ItemId, IncludeDeleted,
-    Latitude)
+    Auth, Colors, ColorsOrObject, ExampleObjects, FooInstance, Foos, Item,
+    ItemId, IncludeDeleted, Latitude)
 from .utils import add_doctor_attrs
 
 
@@ -126,6 +132,57 @@ def test_handle_http_with_route_that_defines_req_obj_type(mock_request):
         handle_http(mock_handler, (), {}, logic)
 
 
+def test_handle_http_rejected(mock_request, mock_get_logic):
+    mock_request.method = 'GET'
+    error = ServiceUnavailableError('Busy.', retry_after=2)
+    with pytest.raises(HTTP503Exception) as exc_info:
+        handle_http(mock.Mock(), (), {}, mock_get_logic, rejected=error)
+    assert 2 == exc_info.value.retry_after
+    assert not mock_get_logic.called
+
+
+def test_handle_http_lazy_validation(mock_request):
+    def logic(foo: FooInstance):
+        return {'foo_id': foo['foo_id']}
+
+    logic = add_doctor_attrs(logic, req_obj_type=FooInstance)
+    logic._doctor_lazy_validation = True
+
+    mock_request.method = 'POST'
+    mock_request.mimetype = 'application/json'
+    mock_request.json = {'foo': 1, 'foo_id': '1'}
+    mock_handler = mock.Mock()
+    # The invalid `foo` property is never read.
+    assert ({'foo_id': 1}, 201) == handle_http(mock_handler, (), {}, logic)
+
+    mock_request.json = {'foo': 'A foo', 'foo_id': 'abc'}
+    with pytest.raises(HTTP400Exception, match='Must be a valid number'):
+        handle_http(mock_handler, (), {}, logic)
+
+
+@mock.patch('doctor.flask.should_raise_response_validation_errors')
+@mock.patch('doctor.flask.current_app')
+def test_handle_http_sparse_fields(mock_app, mock_should, mock_request):
+    def logic() -> Response[ExampleObjects]:
+        return Response([{'str': 'a', 'foo': 'b'}])
+
+    logic = add_doctor_attrs(logic)
+    mock_should.return_value = True
+    mock_app.config = {'DEBUG': False}
+    mock_request.method = 'GET'
+    mock_request.content_type = 'application/x-www-form-urlencoded'
+    mock_request.values = {}
+    mock_request.args = {'fields': 'str'}
+    mock_handler = mock.Mock()
+    # The response is pruned before it is validated.
+    assert ([{'str': 'a'}], 200, None) == handle_http(
+        mock_handler, (), {}, logic)
+
+    mock_request.args = {'fields': 'str,foo'}
+    with pytest.raises(HTTP400Exception, match='Unknown fields: foo.'):
+        handle_http(mock_handler, (), {}, logic)
+
+
 def test_handle_http_with_logic_containing_uniontype(mock_request):
     """
     This test verifies that if our logic function has a UnionType annotation
@@ -174,6 +231,118 @@ def test_handle_http_object_array_types(mock_request, mock_post_logic):
     assert type(kwargs['colors']) is list
 
 
+def test_handle_http_nested_native_types(mock_request):
+    """
+    This test verifies that nested objects and arrays are also passed to the
+    logic function as native types.
+    """
+    def logic(objs: ExampleObjects, val: ColorsOrObject):
+        return {'objs': objs, 'val': val}
+
+    logic = add_doctor_attrs(logic)
+    mock_request.method = 'POST'
+    mock_request.mimetype = 'application/json'
+    mock_request.json = {'objs': [{'str': 'a'}, {'str': 'b'}],
+                         'val': {'str': 'c'}}
+    mock_handler = mock.Mock()
+    actual, _ = handle_http(mock_handler, (), {}, logic)
+    assert {'objs': [{'str': 'a'}, {'str': 'b'}],
+            'val': {'str': 'c'}} == actual
+    assert type(actual['objs']) is list
+    assert all(type(obj) is dict for obj in actual['objs'])
+    assert type(actual['val']) is dict
+
+
+def test_handle_http_json_body_validated_in_place(mock_request):
+    """
+    This test verifies that the containers decoded from a JSON body are
+    validated in place rather than copied.
+    """
+    def logic(objs: ExampleObjects):
+        return objs
+
+    logic = add_doctor_attrs(logic)
+    objs = [{'str': 'a'}, {'str': 'b'}]
+    mock_request.method = 'POST'
+    mock_request.mimetype = 'application/json'
+    mock_request.json = {'objs': objs}
+    mock_handler = mock.Mock()
+    actual, _ = handle_http(mock_handler, (), {}, logic)
+    assert actual is objs
+
+
+def test_handle_http_msgpack_body(mock_request):
+    msgpack = pytest.importorskip('msgpack')
+
+    def logic(objs: ExampleObjects, auth: Auth):
+        return {'objs': objs, 'auth': auth}
+
+    logic = add_doctor_attrs(logic)
+    mock_request.method = 'POST'
+    mock_request.mimetype = 'application/msgpack'
+    mock_request.get_data.return_value = msgpack.packb(
+        {'objs': [{'str': 'a'}], 'auth': 'token'})
+    mock_handler = mock.Mock()
+    actual = handle_http(mock_handler, (), {}, logic)
+    assert ({'objs': [{'str': 'a'}], 'auth': 'token'}, 201) == actual
+
+    mock_request.get_data.return_value = msgpack.packb(
+        {'objs': [{'str': 'a', 'foo': 1}], 'auth': 'token'})
+    with pytest.raises(HTTP400Exception,
+                       match='Additional properties are not allowed'):
+        handle_http(mock_handler, (), {}, logic)
+
+    mock_request.get_data.return_value = b'\xc1'
+    with pytest.raises(HTTP400Exception, match='not valid MessagePack'):
+        handle_http(mock_handler, (), {}, logic)
+
+    # Binary values are not decoded to `bytes`, which JSON can't have.
+    for body in ({'objs': [{'str': b'a'}], 'auth': 'token'},
+                 {'objs': [b'a'], 'auth': 'token'},
+                 {b'objs': [], 'auth': 'token'},
+                 b'a'):
+        mock_request.get_data.return_value = msgpack.packb(
+            body, use_bin_type=True)
+        with pytest.raises(HTTP400Exception, match='binary values'):
+            handle_http(mock_handler, (), {}, logic)
+
+
+def test_reject_msgpack_bin():
+    body = {'a': [1, 'b'], 'c': None}
+    assert body is _reject_msgpack_bin(body)
+    assert body['a'] is _reject_msgpack_bin(body['a'])
+    assert 'a' == _reject_msgpack_bin('a')
+    for value in ({'a': b'b'}, {b'a': 'b'}, ['a', b'b'], b'a'):
+        with pytest.raises(InvalidValueError, match='binary values'):
+            _reject_msgpack_bin(value)
+
+
+def test_enable_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+
+    def get_foos() -> Foos:
+        return ['a', 'b']
+
+    app = Flask('test')
+    api = Api(app)
+    enable_msgpack(api)
+    for route, resource in create_routes((
+            Route('/foos/', methods=[get(get_foos)]),)):
+        api.add_resource(resource, route)
+    client = app.test_client()
+
+    response = client.get('/foos/', headers={'Accept': 'application/msgpack'})
+    assert 'application/msgpack' == response.headers['Content-Type']
+    assert ['a', 'b'] == msgpack.unpackb(response.data, raw=False)
+
+    # JSON is still the default.
+    response = client.get('/foos/', headers={'Accept': '*/*'})
+    assert ['a', 'b'] == response.json
+    response = client.get('/foos/', headers={
+        'Accept': 'application/msgpack;q=0.5, application/json'})
+    assert ['a', 'b'] == response.json
+
+
 def test_handle_http_non_json(mock_request, mock_get_logic):
     mock_request.method = 'GET'
     mock_request.content_type = 'application/x-www-form-urlencoded'
@@ -412,3 +581,89 @@ def test_handle_http_http_errors(
     mock_app.config = {'DEBUG': True}
     with pytest.raises(Exception, match='internal error'):
         handle_http(mock_handler, (), {}, mock_get_logic)
+
+
+@pytest.fixture
+def recorder():
+    yield slow_requests
+    slow_requests.threshold = None
+    slow_requests.max_records = 100
+    slow_requests.clear()
+
+
+def test_handle_http_slow_requests(mock_request, recorder):
+    def logic(item_id: ItemId) -> Item:
+        return {'item_id': item_id}
+
+    logic = add_doctor_attrs(logic)
+    mock_request.method = 'GET'
+    mock_request.url_rule = '/items/<int:item_id>'
+    mock_request.content_length = None
+    mock_request.values = {'item_id': '3'}
+    mock_handler = mock.Mock()
+
+    # Requests are not recorded without a threshold.
+    handle_http(mock_handler, (), {}, logic)
+    assert [] == recorder.get_records()
+
+    recorder.threshold = 0
+    handle_http(mock_handler, (), {}, logic)
+    records = recorder.get_records()
+    assert 1 == len(records)
+    record = records[0]
+    assert ['logic', 'parse', 'response', 'validate'] == sorted(
+        record['phases'])
+    assert record['duration'] >= sum(record['phases'].values())
+    assert {
+        'route': '/items/<int:item_id>',
+        'method': 'GET',
+        'status_code': 200,
+        'request_size': None,
+        'logic': 'logic',
+        'param_sizes': {'item_id': 1},
+        'response_size': len('{"item_id": 3}'),
+    } == {k: v for k, v in record.items()
+          if k not in ('time', 'duration', 'phases')}
+
+    recorder.threshold = 60
+    handle_http(mock_handler, (), {}, logic)
+    assert 1 == len(recorder.get_records())
+
+    # The threshold of the route overrides the recorder's.
+    logic._doctor_slow_request_threshold = 0
+    handle_http(mock_handler, (), {}, logic)
+    assert 2 == len(recorder.get_records())
+
+
+def test_handle_http_slow_requests_errors(
+        mock_request, mock_get_logic, recorder):
+    mock_request.method = 'GET'
+    mock_request.values = {'item_id': 'foo'}
+    recorder.threshold = 0
+    with pytest.raises(HTTP400Exception):
+        handle_http(mock.Mock(), (), {}, mock_get_logic)
+    record = recorder.get_records()[0]
+    assert 400 == record['status_code']
+    # The request failed while parsing the params.
+    assert {} == record['phases']
+
+
+def test_slow_request_recorder(tmpdir):
+    recorder = SlowRequestRecorder(max_records=2)
+    for i in range(3):
+        recorder.record({'i': i})
+    assert [{'i': 1}, {'i': 2}] == recorder.get_records()
+
+    recorder.max_records = 1
+    assert [{'i': 2}] == recorder.get_records()
+
+    path = str(tmpdir.join('slow.jsonl'))
+    recorder.dump(path)
+    recorder.record({'i': 3, 'date': date(2019, 1, 2)})
+    recorder.dump(path)
+    with open(path) as f:
+        assert ['{"i": 2}', '{"i": 3, "date": "2019-01-02"}'] == (
+            f.read().splitlines())
+
+    recorder.clear()
+    assert [] == recorder.get_records()
@@ -0,0 +1,102 @@
+import mock
+
+from doctor.docs.flask import AutoFlaskHarness
+from doctor.loadtest import (
+    build_requests, get_percentile, load_app, load_harness, main, run,
+    run_worker)
+
+from . import flask_app
+
+APP_SPEC = 'test.flask_app:app'
+
+autoflask_harness = AutoFlaskHarness(None, '')
+autoflask_harness.define_example_values(
+    'get', '/note/<int:note_id>/', {'note_id': 2})
+
+
+def test_load_app():
+    assert flask_app.app is load_app(APP_SPEC)
+    assert flask_app.app is load_app('test.flask_app')
+
+
+def test_load_harness():
+    assert autoflask_harness is load_harness(
+        'test.test_loadtest:autoflask_harness')
+    assert autoflask_harness is load_harness('test.test_loadtest')
+
+
+def test_build_requests():
+    requests = build_requests(flask_app.app)
+    assert [
+        'GET /',
+        'GET /note/',
+        'POST /note/',
+        'GET /note/<int:note_id>/',
+        'PUT /note/<int:note_id>/',
+        'DELETE /note/<int:note_id>/',
+        'GET /example/list-obj/',
+    ] == [request['name'] for request in requests]
+    request = requests[3]
+    assert 'get' == request['method']
+    assert request['path'].startswith('/note/1/?')
+
+    requests = build_requests(flask_app.app, autoflask_harness)
+    assert '/note/2/' == requests[3]['path']
+
+
+def test_run_worker():
+    requests = [r for r in build_requests(flask_app.app)
+                if r['name'] == 'GET /note/<int:note_id>/']
+    results = run_worker(flask_app.app, requests, 3)
+    latencies, errors = results['GET /note/<int:note_id>/']
+    assert 3 == len(latencies)
+    assert 0 == errors
+
+
+def test_get_percentile():
+    latencies = [float(i) for i in range(1, 101)]
+    assert 50.0 == get_percentile(latencies, 50)
+    assert 99.0 == get_percentile(latencies, 99)
+    assert 100.0 == get_percentile(latencies, 100)
+    assert 1.0 == get_percentile(latencies, 0)
+    assert 0.0 == get_percentile([], 50)
+
+
+def test_run():
+    report = run(APP_SPEC, requests_per_route=4, concurrency=2)
+    stats = report['GET /note/<int:note_id>/']
+    assert 4 == stats['requests']
+    assert 0 == stats['errors']
+    assert stats['throughput'] > 0
+    assert stats['p50'] <= stats['p90'] <= stats['p99']
+
+
+def test_run_uneven_split():
+    # The remainder is spread over the first workers.
+    report = run(APP_SPEC, requests_per_route=5, concurrency=3)
+    assert 5 == report['GET /']['requests']
+    # Workers without any requests are not started.
+    report = run(APP_SPEC, requests_per_route=2, concurrency=4)
+    assert 2 == report['GET /']['requests']
+
+
+def test_run_processes():
+    report = run(APP_SPEC, requests_per_route=2, concurrency=2,
+                 processes=True)
+    assert 2 == report['GET /']['requests']
+
+
+def test_main(capsys):
+    main([APP_SPEC, '--requests', '1'])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[:4] == ['route', 'requests', 'errors', 'req/s']
+    assert lines[1].startswith('GET /  ')
+
+
+@mock.patch('doctor.loadtest.run')
+def test_main_harness(mock_run, capsys):
+    mock_run.return_value = {}
+    main([APP_SPEC, '--harness', 'test.test_loadtest:autoflask_harness'])
+    mock_run.assert_called_once_with(
+        APP_SPEC, requests_per_route=100, concurrency=1, processes=False,
+        harness=autoflask_harness)
@@ -0,0 +1,126 @@
+import pytest
+
+from doctor.errors import TypeSystemError
+from doctor.payloads import PayloadGenerator
+from doctor.types import (
+    array, boolean, integer, new_type, number, string, Object,
+    UnionType)
+
+from .types import Color, ColorsOrObject, FooInstance, TwoItems
+
+
+Code = string('code', pattern=r'^[A-Z]{2}-\d{3,5}(x|yz)?$', max_length=9)
+Name = string('name', min_length=2, max_length=5)
+Born = string('born', format='date')
+Count = integer('count', minimum=10, maximum=20, multiple_of=3)
+Ratio = number('ratio', minimum=0, maximum=1, exclusive_maximum=True)
+Enabled = boolean('enabled')
+Tags = array('tags', items=Name, min_items=1, max_items=3, unique_items=True)
+Person = new_type(Object, description='A person.', properties={
+    'name': Name,
+    'code': Code,
+    'born': Born,
+    'count': Count,
+    'ratio': Ratio,
+    'enabled': Enabled,
+    'color': Color,
+    'tags': Tags,
+    'nickname': new_type(Name, nullable=True),
+}, required=['name', 'code'], additional_properties=False,
+    property_dependencies={'count': ['ratio']})
+
+TYPES = [Code, Name, Born, Count, Ratio, Enabled, Color, Tags, Person,
+         ColorsOrObject, FooInstance, TwoItems]
+
+
+@pytest.fixture
+def generator():
+    return PayloadGenerator(seed=0)
+
+
+@pytest.mark.parametrize('cls', TYPES)
+def test_valid(generator, cls):
+    for _ in range(50):
+        # Raises an error if the value is not valid.
+        cls(generator.valid(cls))
+
+
+@pytest.mark.parametrize('cls', TYPES)
+def test_invalid(generator, cls):
+    for _ in range(50):
+        value = generator.invalid(cls)
+        with pytest.raises(TypeSystemError):
+            cls(value)
+
+
+def test_valid_constraints(generator):
+    values = [generator.valid(Person) for _ in range(100)]
+    assert all(
+        {'name', 'code'} <= set(value) <= set(Person.properties)
+        for value in values)
+    assert all('ratio' in value for value in values if 'count' in value)
+    # Optional and nullable values are sometimes omitted.
+    assert any('count' not in value for value in values)
+    assert any(value.get('nickname', '') is None for value in values)
+    assert all(value['count'] % 3 == 0 for value in values
+               if 'count' in value)
+    assert all(1 <= len(value['tags']) <= 3 for value in values
+               if 'tags' in value)
+
+
+def test_seed():
+    assert (PayloadGenerator(seed=1).valid(Person) ==
+            PayloadGenerator(seed=1).valid(Person))
+
+
+def test_size_knobs():
+    Ints = array('ints', items=integer('int'))
+    generator = PayloadGenerator(array_length=10000)
+    assert 10000 == len(generator.valid(Ints))
+    # The length is limited by the constraints of the type.
+    assert 3 == len(generator.valid(Tags))
+
+    Open = new_type(Object, description='Open.', properties={'a': Name})
+    generator = PayloadGenerator(extra_properties=500,
+                                 optional_probability=0)
+    assert 500 == len(generator.valid(Open))
+    assert {} == generator.valid(new_type(Open, additional_properties=False))
+
+
+def test_invalid_targets_one_constraint(generator):
+    keys = set()
+    for _ in range(100):
+        value = generator.invalid(Person)
+        with pytest.raises(TypeSystemError) as exc:
+            Person(value)
+        if isinstance(exc.value.detail, dict):
+            assert 1 == len(exc.value.detail)
+            keys.update(exc.value.detail)
+    assert {'name', 'code', 'count', 'tags'} <= keys
+
+
+def test_unsatisfiable(generator):
+    with pytest.raises(ValueError, match='invalid value for String'):
+        generator.invalid(string('anything'))
+
+    Impossible = new_type(UnionType, description='Impossible.',
+                          types=[string('empty', max_length=0,
+                                        min_length=1)])
+    with pytest.raises(ValueError, match='Could not generate a valid value'):
+        generator.valid(Impossible)
+
+
+def test_unsupported_pattern(generator):
+    # Lookarounds and back references fall back to the example.
+    Lookahead = string('lookahead', pattern=r'^(?=ab)\w+$', example='abc')
+    BackReference = string('back reference', pattern=r'^(a|b)\1$',
+                           example='bb')
+    for _ in range(10):
+        assert 'abc' == generator.valid(Lookahead)
+        assert 'bb' == generator.valid(BackReference)
+
+    NoExample = string('no example', pattern=r'^(?!a)\w+$', example='a')
+    with pytest.raises(ValueError,
+                       match='Could not generate a valid value') as exc_info:
+        generator.valid(NoExample)
+    assert 'Unsupported pattern' in str(exc_info.value.__cause__)
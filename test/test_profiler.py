@@ -0,0 +1,152 @@
+import io
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from doctor.profiler import (
+    _get_thread_profile, ValidationProfiler, get_type_label)
+from doctor.types import array, integer, new_type, string, Object
+
+
+Name = string('name')
+Ids = array('ids', items=integer('id'))
+Person = new_type(Object, description='A person.', properties={
+    'name': Name,
+    'ids': Ids,
+})
+
+
+class TestValidationProfiler(object):
+
+    def test_stats(self):
+        with ValidationProfiler() as profiler:
+            Person({'name': 'a', 'ids': [1, 2, 3]})
+            Person.coerce({'name': 'b', 'ids': [4]})
+        assert sys.getprofile() is None
+        stats = profiler.stats
+        assert {Person, Name, Ids, Ids.items} == set(stats)
+        assert 2 == stats[Person][0]
+        assert 2 == stats[Name][0]
+        assert 4 == stats[Ids.items][0]
+        # The total time of a type includes the time of its children.
+        calls, total, own = stats[Person]
+        assert own < total
+        assert total >= stats[Name][1] + stats[Ids][1]
+        assert stats[Ids.items][1] == pytest.approx(stats[Ids.items][2])
+
+        assert [Person, Ids] == [row[0] for row in profiler.top(2)]
+        assert Ids.items == profiler.top(1, sort='calls')[0][0]
+        assert 'calls' in profiler.format_top().splitlines()[0]
+
+    def test_errors(self):
+        with ValidationProfiler() as profiler:
+            with pytest.raises(Exception):
+                Person({'name': 'a', 'ids': ['foo']})
+        assert 1 == profiler.stats[Person][0]
+        assert 1 == profiler.stats[Ids.items][0]
+
+    def test_disabled(self):
+        profiler = ValidationProfiler()
+        Person({'name': 'a', 'ids': [1]})
+        assert {} == profiler.stats
+
+    def test_threads(self):
+        with ValidationProfiler() as profiler:
+            thread = threading.Thread(target=Name, args=('a',))
+            thread.start()
+            thread.join()
+        assert 1 == profiler.stats[Name][0]
+
+    def test_threads_uninstall_after_disable(self):
+        started = threading.Event()
+        disabled = threading.Event()
+        profiles = []
+
+        def target():
+            Name('a')
+            started.set()
+            disabled.wait(5)
+            Name('b')
+            profiles.append(sys.getprofile())
+
+        with ValidationProfiler() as profiler:
+            thread = threading.Thread(target=target)
+            thread.start()
+            assert started.wait(5)
+        disabled.set()
+        thread.join(5)
+        assert [None] == profiles
+        assert 1 == profiler.stats[Name][0]
+
+    def test_restores_thread_profile(self):
+        def hook(frame, event, arg):
+            pass
+
+        threading.setprofile(hook)
+        try:
+            with ValidationProfiler():
+                pass
+            assert hook is _get_thread_profile()
+        finally:
+            threading.setprofile(None)
+
+    @pytest.mark.skipif(not hasattr(threading, 'setprofile_all_threads'),
+                        reason='Requires Python 3.12 or later.')
+    def test_running_threads(self):
+        started = threading.Event()
+        enabled = threading.Event()
+
+        def target():
+            started.set()
+            enabled.wait(5)
+            Name('a')
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        assert started.wait(5)
+        with ValidationProfiler() as profiler:
+            enabled.set()
+            thread.join(5)
+        assert 1 == profiler.stats[Name][0]
+
+    def test_only_one_enabled(self):
+        with ValidationProfiler():
+            with pytest.raises(RuntimeError):
+                ValidationProfiler().enable()
+        with ValidationProfiler():
+            pass
+
+    def test_write_collapsed(self):
+        with ValidationProfiler() as profiler:
+            Person({'name': 'a', 'ids': [1]})
+        output = io.StringIO()
+        profiler.write_collapsed(output)
+        lines = sorted(output.getvalue().splitlines())
+        stacks = sorted(line.rsplit(' ', 1)[0] for line in lines)
+        person = get_type_label(Person)
+        assert [
+            person,
+            ';'.join([person, get_type_label(Ids)]),
+            ';'.join([person, get_type_label(Ids), get_type_label(Ids.items)]),
+            ';'.join([person, get_type_label(Name)]),
+        ] == stacks
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+    def test_environment_variable(self, tmpdir):
+        path = str(tmpdir.join('stacks.folded'))
+        env = dict(os.environ, DOCTOR_PROFILE_VALIDATION=path)
+        subprocess.check_call([
+            sys.executable, '-c',
+            'from doctor.types import string; string("a name")("a")'],
+            env=env)
+        with open(path) as f:
+            assert f.read().startswith('String (a name) ')
+
+
+def test_get_type_label():
+    assert 'String (name)' == get_type_label(Name)
+    label = get_type_label(string('x' * 50 + ';'))
+    assert 'String ({}...)'.format('x' * 37) == label
@@ -1,10 +1,24 @@
+import asyncio
 import inspect
-
-from flask_restful import Resource
-
-from doctor.flask import handle_http
+import math
+import threading
+import time
+
+import mock
+import pytest
+from flask import Flask
+from flask_restful import Api, Resource
+
+from doctor.errors import (
+    DeadlineExceededError, ServiceUnavailableError, TypeSystemError)
+from doctor.flask import create_routes as flask_create_routes, handle_http
+from doctor.response import Response
 from doctor.routing import (
-    create_routes, delete, get, get_handler_name, post, put, HTTPMethod, Route)
+    ConcurrencyLimit, create_http_method, create_routes, Deadline,
+    decode_cursor, delete, encode_cursor, get, get_handler_name,
+    HookExecutor, Page, page_type, paginate, PageRequest, post, put,
+    HTTPMethod, Route, SingleFlight)
+from doctor.types import array
 from doctor.utils import Params
 
 from .types import Age, Foo, FooId, FooInstance, Foos, IsAlive, Name
@@ -201,6 +215,13 @@ class TestRouting(object):
         assert r'^/bar/?$' == route
         assert 'Retrieve Other List' == handler.get._doctor_title
 
+    def test_create_routes_methods(self):
+        routes = (
+            Route('^/foo/?$', (get(get_foos), post(create_foo))),
+        )
+        route, handler = create_routes(routes, handle_http, Resource)[0]
+        assert {'GET', 'POST'} == handler.methods
+
     def test_get_handler_name_route_has_handler_name(self):
         """Tests handler name comes from one defined on Route"""
         route = Route('/', (get(get_foos),), handler_name='FooFooHandler')
@@ -234,3 +255,640 @@ class TestRouting(object):
         """
         route = Route('/', (put(update_foo),), heading='Dinosaur (v1)')
         assert 'DinosaurV1Handler' == get_handler_name(route, update_foo)
+
+
+Ages = array('ages', items=Age)
+
+
+@paginate()
+def get_ages(is_alive: IsAlive = True, page: PageRequest = None) -> Ages:
+    return page.get_sequence_page(list(range(1, 8)))
+
+
+class TestPagination(object):
+
+    def test_cursor(self):
+        for position in (None, 0, 'abc', [1, 'b'], {'id': 10}):
+            cursor = encode_cursor(position)
+            assert '=' not in cursor
+            assert position == decode_cursor(cursor)
+        for cursor in ('!', 'abc', encode_cursor(1)[:-1] + '#'):
+            with pytest.raises(TypeSystemError, match='Invalid cursor.'):
+                decode_cursor(cursor)
+
+    def test_page(self):
+        assert {'items': [1], 'next_cursor': None} == Page((1,)).to_dict()
+        page = Page([1, 2], {'id': 2})
+        assert {'items': [1, 2],
+                'next_cursor': encode_cursor({'id': 2})} == page.to_dict()
+
+    def test_get_page(self):
+        page = PageRequest(2).get_page([1, 2, 3])
+        assert ([1, 2], 2) == (page.items, page.next_position)
+        page = PageRequest(2).get_page([{'id': 1}, {'id': 2}, {'id': 3}],
+                                       key=lambda item: item['id'])
+        assert 2 == page.next_position
+        page = PageRequest(2).get_page([1, 2])
+        assert ([1, 2], None) == (page.items, page.next_position)
+
+    def test_get_sequence_page(self):
+        items = [1, 2, 3, 4, 5]
+        page = PageRequest(2).get_sequence_page(items)
+        assert ([1, 2], 2) == (page.items, page.next_position)
+        page = PageRequest(2, 4).get_sequence_page(items)
+        assert ([5], None) == (page.items, page.next_position)
+        page = PageRequest(2, 3).get_sequence_page(items)
+        assert ([4, 5], None) == (page.items, page.next_position)
+        for position in (-1, 'a', True, 1.5):
+            with pytest.raises(TypeSystemError, match='Invalid cursor.'):
+                PageRequest(2, position).get_sequence_page(items)
+
+    def test_page_type(self):
+        envelope = page_type(Ages)
+        assert 'A page of ages' == envelope.description
+        assert envelope({'items': [1], 'next_cursor': None})
+        with pytest.raises(TypeSystemError):
+            envelope({'items': [1]})
+
+    def test_paginate_annotations(self):
+        sig = get_ages._doctor_signature
+        assert ['is_alive', 'limit', 'cursor'] == list(sig.parameters)
+        assert 'A page of ages' == sig.return_annotation.description
+        assert 100 == sig.parameters['limit'].annotation.maximum
+        expected = Params(
+            all=['is_alive', 'limit', 'cursor'],
+            optional=['is_alive', 'limit', 'cursor'],
+            required=[],
+            logic=['is_alive', 'limit', 'cursor'])
+        assert expected == get_ages._doctor_params
+
+    def test_paginate_requires_array(self):
+        with pytest.raises(TypeError, match='Pass the Array type'):
+            paginate()(get_foo)
+
+    def test_paginate_response(self):
+        @paginate(Ages, default_limit=3, max_limit=5)
+        def logic(page: PageRequest):
+            return Response(page.get_sequence_page([1, 2]), {'X-Foo': 'a'})
+
+        response = logic(limit=None, cursor=None)
+        assert {'items': [1, 2], 'next_cursor': None} == response.content
+        assert {'X-Foo': 'a'} == response.headers
+        assert 5 == logic._doctor_signature.parameters[
+            'limit'].annotation.maximum
+
+    def test_paginate_flask(self):
+        app = Flask('test')
+        api = Api(app)
+        for route, resource in flask_create_routes(
+                (Route('/ages/', methods=[get(get_ages)]),)):
+            api.add_resource(resource, route)
+        client = app.test_client()
+
+        response = client.get('/ages/?limit=3')
+        assert 200 == response.status_code
+        assert [1, 2, 3] == response.json['items']
+        ages = []
+        cursor = None
+        while True:
+            url = '/ages/?limit=3'
+            if cursor is not None:
+                url += '&cursor=' + cursor
+            data = client.get(url).json
+            ages.extend(data['items'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        assert list(range(1, 8)) == ages
+        assert 7 == len(client.get('/ages/').json['items'])
+
+        response = client.get('/ages/?limit=101')
+        assert 400 == response.status_code
+        response = client.get('/ages/?cursor=abc')
+        assert 400 == response.status_code
+        assert b'cursor - Invalid cursor.' in response.data
+
+
+class TestHookExecutor(object):
+
+    def blocked_executor(self, policy):
+        """Returns an executor with a pending hook that waits for an event."""
+        executor = HookExecutor(max_workers=1, max_pending=1, policy=policy)
+        event = threading.Event()
+        executor.submit(event.wait)
+        return executor, event
+
+    def test_submit(self):
+        executor = HookExecutor(max_workers=2)
+        results = []
+        for i in range(10):
+            assert executor.submit(results.append, i)
+        assert executor.drain(timeout=5)
+        assert list(range(10)) == sorted(results)
+        assert 0 == executor.pending
+        executor.shutdown()
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError, match='policy must be one of'):
+            HookExecutor(policy='queue')
+
+    def test_policy_drop(self):
+        executor, event = self.blocked_executor('drop')
+        hook = mock.Mock()
+        assert not executor.submit(hook)
+        assert 1 == executor.dropped
+        event.set()
+        assert executor.drain(timeout=5)
+        assert not hook.called
+        assert executor.submit(hook)
+        executor.shutdown()
+        assert hook.called
+
+    def test_policy_inline(self):
+        executor, event = self.blocked_executor('inline')
+        threads = []
+        assert executor.submit(
+            lambda: threads.append(threading.current_thread()))
+        assert [threading.current_thread()] == threads
+        event.set()
+        executor.shutdown()
+
+    def test_policy_block(self):
+        executor, event = self.blocked_executor('block')
+        hook = mock.Mock()
+        submitter = threading.Thread(target=executor.submit, args=(hook,))
+        submitter.start()
+        submitter.join(0.05)
+        # The hook is not submitted until the pending hook finishes.
+        assert submitter.is_alive()
+        assert not hook.called
+        event.set()
+        submitter.join(5)
+        executor.shutdown()
+        assert hook.called
+
+    def test_errors(self):
+        on_error = mock.Mock()
+        executor = HookExecutor(on_error=on_error)
+        error = ValueError('bad hook')
+
+        def hook():
+            raise error
+
+        executor.submit(hook)
+        executor.shutdown()
+        assert 1 == executor.errors
+        assert mock.call(hook, error) == on_error.call_args
+        assert 0 == executor.pending
+
+    def test_submit_after_shutdown(self):
+        executor = HookExecutor()
+        executor.shutdown()
+        hook = mock.Mock()
+        assert executor.submit(hook, 1)
+        assert mock.call(1) == hook.call_args
+
+    def test_create_http_method(self):
+        # The hooks are queued behind a hook that waits for an event.
+        executor = HookExecutor(max_workers=1)
+        event = threading.Event()
+        executor.submit(event.wait)
+        before = mock.Mock()
+        after = mock.Mock()
+        handle_http = mock.Mock(return_value='result')
+        fn = create_http_method(get_foo, 'get', handle_http, before=before,
+                                after=after, hook_executor=executor)
+        # The hooks do not delay the response.
+        assert 'result' == fn(mock.Mock())
+        assert not after.called
+        event.set()
+        executor.shutdown()
+        assert before.called
+        assert mock.call('result') == after.call_args
+
+    def test_route(self):
+        executor = HookExecutor()
+        route = Route('/foo/', methods=[get(get_foo)], hook_executor=executor)
+        assert executor is route.hook_executor
+        assert Route('/foo/', methods=[get(get_foo)]).hook_executor is None
+
+
+class TestConcurrencyLimit(object):
+
+    def test_acquire(self):
+        limit = ConcurrencyLimit(2)
+        assert limit.acquire()
+        assert limit.acquire()
+        assert not limit.acquire()
+        assert (2, 1) == (limit.in_flight, limit.rejected)
+        limit.release()
+        assert limit.acquire()
+        limit.release()
+        limit.release()
+        assert (0, 1) == (limit.in_flight, limit.rejected)
+
+    def test_acquire_timeout(self):
+        limit = ConcurrencyLimit(1, timeout=5)
+        assert limit.acquire()
+        releaser = threading.Timer(0.05, limit.release)
+        releaser.start()
+        # Waits for the other request to finish.
+        assert limit.acquire()
+        assert 0 == limit.rejected
+        limit = ConcurrencyLimit(1, timeout=0.01)
+        assert limit.acquire()
+        assert not limit.acquire()
+        assert 1 == limit.rejected
+
+    def test_get_rejection_error(self):
+        limit = ConcurrencyLimit(1, retry_after=5)
+        error = limit.get_rejection_error()
+        assert isinstance(error, ServiceUnavailableError)
+        assert 5 == error.retry_after
+
+    def test_create_http_method(self):
+        limit = ConcurrencyLimit(1)
+        handle_http = mock.Mock(return_value='result')
+        fn = create_http_method(get_foo, 'get', handle_http,
+                                concurrency_limit=limit)
+        handler = mock.Mock()
+        assert 'result' == fn(handler, 1, foo=2)
+        assert mock.call(handler, (1,), {'foo': 2}, get_foo) == (
+            handle_http.call_args)
+        assert 0 == limit.in_flight
+
+        assert limit.acquire()
+        fn(handler)
+        # The real logic function is passed along with the error.
+        assert get_foo is handle_http.call_args[0][3]
+        error = handle_http.call_args[1]['rejected']
+        assert isinstance(error, ServiceUnavailableError)
+        assert 1 == limit.rejected
+
+        # The limit is released when the handler raises an exception.
+        limit.release()
+        handle_http.side_effect = ValueError
+        with pytest.raises(ValueError):
+            fn(handler)
+        assert 0 == limit.in_flight
+
+    def test_create_routes(self):
+        route_limit = ConcurrencyLimit(1)
+        method_limit = ConcurrencyLimit(1)
+        handle = mock.Mock()
+        routes = create_routes((
+            Route('/foo/', methods=[
+                get(get_foo),
+                post(create_foo, concurrency_limit=method_limit)],
+                concurrency_limit=route_limit),
+        ), handle, Resource)
+        _, handler = routes[0]
+        assert route_limit.acquire()
+        assert method_limit.acquire()
+        handler.get(mock.Mock())
+        assert 'rejected' in handle.call_args[1]
+        assert 1 == route_limit.rejected
+        handler.post(mock.Mock())
+        assert 'rejected' in handle.call_args[1]
+        assert (1, 1) == (route_limit.rejected, method_limit.rejected)
+
+    def test_flask(self):
+        limit = ConcurrencyLimit(1, retry_after=3)
+        started = threading.Event()
+        finish = threading.Event()
+
+        def get_slow_foos() -> Foos:
+            started.set()
+            finish.wait(5)
+            return ['foo']
+
+        app = Flask('test')
+        api = Api(app)
+        for route, resource in flask_create_routes((
+                Route('/foos/', methods=[get(get_slow_foos)],
+                      concurrency_limit=limit),)):
+            api.add_resource(resource, route)
+
+        responses = []
+        thread = threading.Thread(target=lambda: responses.append(
+            app.test_client().get('/foos/')))
+        thread.start()
+        assert started.wait(5)
+        response = app.test_client().get('/foos/')
+        assert 503 == response.status_code
+        assert '3' == response.headers['Retry-After']
+        assert (1, 1) == (limit.in_flight, limit.rejected)
+        finish.set()
+        thread.join(5)
+        assert 200 == responses[0].status_code
+        assert 0 == limit.in_flight
+
+
+def wait_until(predicate, timeout=5):
+    """Waits until a predicate of the state of other threads is True."""
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        event.wait(0.01)
+    return predicate()
+
+
+class TestSingleFlight(object):
+
+    def start_callers(self, single_flight, key, func, num_callers,
+                      results=None):
+        """Calls a function from threads, returning the threads and results."""
+        if results is None:
+            results = []
+
+        def call():
+            try:
+                results.append(single_flight.do(key, func))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(num_callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_do(self):
+        single_flight = SingleFlight()
+        assert 1 == single_flight.do('a', lambda: 1)
+        assert 2 == single_flight.do('a', lambda: 2)
+        assert 0 == single_flight.coalesced
+
+    def test_do_concurrent(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            finish.wait(5)
+            return {'a': 1}
+
+        threads, results = self.start_callers(single_flight, 'a', func, 1)
+        assert started.wait(5)
+        waiters, _ = self.start_callers(single_flight, 'a', func, 4, results)
+        # Other keys are not coalesced.
+        assert 'b' == single_flight.do('b', lambda: 'b')
+        assert wait_until(lambda: single_flight.coalesced == 4)
+        finish.set()
+        for thread in threads + waiters:
+            thread.join(5)
+        assert 1 == len(calls)
+        assert 5 == len(results)
+        assert all(result is results[0] for result in results)
+        assert 4 == single_flight.coalesced
+
+    def test_do_error(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        finish = threading.Event()
+        error = ValueError('bad')
+
+        def func():
+            started.set()
+            finish.wait(5)
+            raise error
+
+        threads, results = self.start_callers(single_flight, 'a', func, 1)
+        assert started.wait(5)
+        waiters, _ = self.start_callers(single_flight, 'a', func, 2, results)
+        assert wait_until(lambda: single_flight.coalesced == 2)
+        finish.set()
+        for thread in threads + waiters:
+            thread.join(5)
+        assert [error] * 3 == results
+        # The next call runs the function again.
+        assert 1 == single_flight.do('a', lambda: 1)
+
+    def test_do_timeout(self):
+        single_flight = SingleFlight(timeout=0.01)
+        started = threading.Event()
+        finish = threading.Event()
+
+        def func():
+            started.set()
+            finish.wait(5)
+            return 1
+
+        threads, results = self.start_callers(single_flight, 'a', func, 1)
+        assert started.wait(5)
+        with pytest.raises(ServiceUnavailableError, match='Timed out'):
+            single_flight.do('a', func)
+        finish.set()
+        threads[0].join(5)
+        assert [1] == results
+
+    def test_httpmethod(self):
+        assert get(get_foo).logic._doctor_single_flight is None
+        m = get(get_foo, single_flight=True)
+        assert isinstance(m.logic._doctor_single_flight, SingleFlight)
+        single_flight = SingleFlight(timeout=1)
+        m = get(get_foo, single_flight=single_flight)
+        assert single_flight is m.logic._doctor_single_flight
+
+    def test_flask(self):
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def get_ages(is_alive: IsAlive = True) -> Ages:
+            calls.append(is_alive)
+            started.set()
+            finish.wait(5)
+            return [1, 2]
+
+        app = Flask('test')
+        api = Api(app)
+        method = get(get_ages, single_flight=True)
+        for route, resource in flask_create_routes((
+                Route('/ages/', methods=[method]),)):
+            api.add_resource(resource, route)
+
+        responses = []
+
+        def request(url):
+            responses.append(app.test_client().get(url))
+
+        first = threading.Thread(target=request, args=('/ages/',))
+        first.start()
+        assert started.wait(5)
+        # The params are coerced, so these are identical requests.
+        threads = [
+            threading.Thread(target=request, args=(url,))
+            for url in ('/ages/', '/ages/?is_alive=true', '/ages/?foo=1')]
+        for thread in threads:
+            thread.start()
+        single_flight = method.logic._doctor_single_flight
+        assert wait_until(lambda: single_flight.coalesced == 3)
+        finish.set()
+        for thread in [first] + threads:
+            thread.join(5)
+        assert [True] == calls
+        assert [[1, 2]] * 4 == [response.json for response in responses]
+
+        # Requests with other params are not coalesced.
+        assert [1, 2] == app.test_client().get('/ages/?is_alive=false').json
+        assert [True, False] == calls
+
+    def test_flask_routes_share_single_flight(self):
+        started = threading.Event()
+        finish = threading.Event()
+
+        def get_a(name: Name) -> Name:
+            started.set()
+            finish.wait(5)
+            return 'from a'
+
+        def get_b(name: Name) -> Name:
+            return 'from b'
+
+        single_flight = SingleFlight()
+        app = Flask('test')
+        api = Api(app)
+        for route, resource in flask_create_routes((
+                Route('/a/', methods=[get(get_a, single_flight=single_flight)]),
+                Route('/b/', methods=[
+                    get(get_b, single_flight=single_flight)]))):
+            api.add_resource(resource, route)
+
+        responses = {}
+
+        def request(url):
+            responses[url] = app.test_client().get(url + '?name=x')
+
+        first = threading.Thread(target=request, args=('/a/',))
+        first.start()
+        assert started.wait(5)
+        # The same params to another route are not coalesced.
+        request('/b/')
+        finish.set()
+        first.join(5)
+        assert 0 == single_flight.coalesced
+        assert 'from a' == responses['/a/'].json
+        assert 'from b' == responses['/b/'].json
+
+
+class TestDeadline(object):
+
+    def test_deadline(self):
+        deadline = Deadline()
+        assert math.inf == deadline.remaining
+        assert not deadline.expired
+        deadline.check()
+
+        deadline = Deadline(60)
+        assert 59 < deadline.remaining <= 60
+        assert not deadline.expired
+        deadline.check()
+
+        deadline = Deadline(0)
+        assert 0 == deadline.remaining
+        assert deadline.expired
+        with pytest.raises(DeadlineExceededError,
+                           match='not handled within 0 seconds'):
+            deadline.check()
+
+    def test_http_method(self):
+        def get_ages(deadline: Deadline, is_alive: IsAlive = True) -> Ages:
+            return [1]
+
+        m = get(get_ages, timeout=2)
+        assert 2 == m.logic._doctor_timeout
+        assert 'deadline' == m.logic._doctor_deadline_param
+        # The deadline is not a request parameter.
+        assert ['is_alive'] == list(m.logic._doctor_signature.parameters)
+        assert Params(['is_alive'], [], ['is_alive'], ['is_alive']) == (
+            m.logic._doctor_params)
+
+        m = get(get_foos)
+        assert m.logic._doctor_timeout is None
+        assert m.logic._doctor_deadline_param is None
+
+    def create_app(self, *methods):
+        app = Flask('test')
+        api = Api(app)
+        for route, resource in flask_create_routes((
+                Route('/ages/', methods=methods),)):
+            api.add_resource(resource, route)
+        return app.test_client()
+
+    def test_flask_passes_deadline(self):
+        deadlines = []
+
+        def get_ages(deadline: Deadline, is_alive: IsAlive = True) -> Ages:
+            deadlines.append(deadline)
+            return [1]
+
+        client = self.create_app(get(get_ages, timeout=60))
+        response = client.get('/ages/?is_alive=false')
+        assert 200 == response.status_code
+        assert [1] == response.json
+        assert 60 == deadlines[0].timeout
+        assert 0 < deadlines[0].remaining <= 60
+
+        # Without a timeout the deadline never passes.
+        client = self.create_app(get(get_ages))
+        assert 200 == client.get('/ages/').status_code
+        assert deadlines[1].timeout is None
+
+    def test_flask_cooperative_cancellation(self):
+        def get_ages(deadline: Deadline) -> Ages:
+            time.sleep(0.05)
+            deadline.check()
+            return [1]
+
+        client = self.create_app(get(get_ages, timeout=0.01))
+        response = client.get('/ages/')
+        assert 504 == response.status_code
+        assert b'not handled within 0.01 seconds' in response.data
+
+    def test_flask_cancels_async_logic(self):
+        cancelled = []
+
+        async def get_ages() -> Ages:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return [1]
+
+        async def get_names() -> Ages:
+            await asyncio.sleep(0)
+            return [2]
+
+        client = self.create_app(get(get_ages, timeout=0.05))
+        response = client.get('/ages/')
+        assert 504 == response.status_code
+        assert [True] == cancelled
+
+        client = self.create_app(get(get_names, timeout=5))
+        response = client.get('/ages/')
+        assert 200 == response.status_code
+        assert [2] == response.json
+
+    @mock.patch('doctor.flask.should_raise_response_validation_errors',
+                return_value=True)
+    def test_flask_skips_response_validation(self, mock_should):
+        def get_ages(deadline: Deadline) -> Ages:
+            if deadline.timeout < 1:
+                time.sleep(deadline.remaining + 0.01)
+            return ['invalid']
+
+        # The response is returned without validating it once the deadline
+        # has passed.
+        client = self.create_app(get(get_ages, timeout=0.01))
+        response = client.get('/ages/')
+        assert 200 == response.status_code
+        assert ['invalid'] == response.json
+
+        client = self.create_app(get(get_ages, timeout=60))
+        response = client.get('/ages/')
+        assert 400 == response.status_code
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 
 import jsonschema
 import mock
@@ -7,7 +9,8 @@ import simplejson as json
 
 from doctor.errors import (
     ParseError, SchemaError, SchemaLoadingError, SchemaValidationError)
-from doctor.schema import Schema, SchemaRefResolver
+from doctor.schema import (
+    clear_schema_file_cache, load_schema_file, Schema, SchemaRefResolver)
 from .base import TestCase
 
 
@@ -148,3 +151,81 @@ class TestSchemaRefResolver(TestCase):
             r"/#/circular_ref_chain_1")
         with pytest.raises(SchemaError, match=expected_message):
             self.resolver.resolve('#/circular_ref_chain_1')
+
+
+class TestLoadSchemaFile(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.path = os.path.join(self.tmp_dir, 'schema.yaml')
+        self.write_schema('type: object\ndescription: A schema.\n')
+        clear_schema_file_cache()
+
+    def tearDown(self):
+        clear_schema_file_cache()
+        shutil.rmtree(self.tmp_dir)
+
+    def write_schema(self, content, mtime=1000000000):
+        with open(self.path, 'w') as f:
+            f.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_shared_in_process(self):
+        schema = load_schema_file(self.path, cache_dir=None)
+        assert {'type': 'object', 'description': 'A schema.'} == schema
+        assert schema is load_schema_file(
+            os.path.relpath(self.path), cache_dir=None)
+        # Schemas loaded from the same file share the parsed value.
+        assert schema is Schema.from_file(self.path).schema
+        assert not os.path.exists(self.cache_dir)
+
+    def test_reloaded_when_file_changes(self):
+        schema = load_schema_file(self.path, cache_dir=None)
+        self.write_schema('type: string\ndescription: A schema.\n',
+                          mtime=1000000001)
+        assert {'type': 'string', 'description': 'A schema.'} == (
+            load_schema_file(self.path, cache_dir=None))
+        assert schema != load_schema_file(self.path, cache_dir=None)
+
+    def test_cached_on_disk(self):
+        schema = load_schema_file(self.path, cache_dir=self.cache_dir)
+        assert 1 == len(os.listdir(self.cache_dir))
+
+        # Another process reads the cached schema instead of parsing it.
+        clear_schema_file_cache()
+        with mock.patch('doctor.schema.yaml.load') as mock_load:
+            cached = load_schema_file(self.path, cache_dir=self.cache_dir)
+        assert not mock_load.called
+        assert schema == cached
+        assert schema is not cached
+
+        # The cache is keyed by the modification time and size.
+        clear_schema_file_cache()
+        self.write_schema('type: string\ndescription: A schema.\n',
+                          mtime=1000000001)
+        assert 'string' == load_schema_file(
+            self.path, cache_dir=self.cache_dir)['type']
+        assert 2 == len(os.listdir(self.cache_dir))
+
+    @mock.patch.dict(os.environ)
+    def test_cache_dir_from_environment(self):
+        os.environ['DOCTOR_SCHEMA_CACHE_DIR'] = self.cache_dir
+        load_schema_file(self.path)
+        assert 1 == len(os.listdir(self.cache_dir))
+
+    def test_unmarshallable_schema_not_cached_on_disk(self):
+        self.write_schema('description: A schema.\nexample: 2019-01-01\n')
+        schema = load_schema_file(self.path, cache_dir=self.cache_dir)
+        assert 'A schema.' == schema['description']
+        assert not os.path.exists(self.cache_dir)
+
+    def test_corrupt_cache_is_ignored(self):
+        load_schema_file(self.path, cache_dir=self.cache_dir)
+        cache_path = os.path.join(
+            self.cache_dir, os.listdir(self.cache_dir)[0])
+        with open(cache_path, 'wb') as f:
+            f.write(b'\x00')
+        clear_schema_file_cache()
+        assert 'object' == load_schema_file(
+            self.path, cache_dir=self.cache_dir)['type']
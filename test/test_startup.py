@@ -0,0 +1,115 @@
+import mock
+from flask import Flask
+from flask_restful import Api
+
+import doctor
+from doctor.flask import create_routes
+from doctor.resource import ResourceSchema
+from doctor.response import Response
+from doctor.routing import get, post, Route
+from doctor.startup import iter_logic_functions, warmup, WarmupReport
+from doctor.types import (
+    array, enum, JsonSchema, new_type, Object, string, UnionType)
+
+from .types import Age, IsAlive
+
+Code = string('A code.', pattern=r'^[A-Z]{3}$', example='ABC')
+CatKind = enum('A cat.', enum=['cat'], case_insensitive=True, example='cat')
+DogKind = enum('A dog.', enum=['dog'], example='dog')
+Codes = array('Codes.', items=Code, example=['ABC'])
+Schema = new_type(JsonSchema, description='A schema.',
+                  schema=ResourceSchema({'type': 'object'}))
+
+
+class Cat(Object):
+    description = 'A cat.'
+    properties = {'kind': CatKind, 'codes': Codes}
+
+
+class Dog(Object):
+    description = 'A dog.'
+    properties = {'kind': DogKind, 'age': Age}
+
+
+class Pet(UnionType):
+    description = 'A pet.'
+    types = [Cat, Dog]
+    discriminator = 'kind'
+
+
+Pets = array('Pets.', items=Pet, example=[])
+
+
+def get_pets(code: Code, is_alive: IsAlive = True) -> Response[Pets]:
+    return Response([])
+
+
+def create_pet(pet: Pet, extra: Schema = None) -> Pet:
+    return pet
+
+
+def get_routes():
+    return (
+        Route('/pets/', methods=[get(get_pets), post(create_pet)]),
+    )
+
+
+def test_doctor_warmup():
+    assert warmup is doctor.warmup
+
+
+def test_warmup():
+    report = warmup(get_routes())
+    assert 2 == report.logic_functions
+    # Code, IsAlive, Pets, Pet, Schema, Cat, Dog, CatKind, DogKind, Codes
+    # and Age.
+    assert 11 == report.types
+    assert [] == report.errors
+    assert '^[A-Z]{3}$' == Code.__dict__['_compiled_pattern'][0]
+    assert frozenset(['cat']) == CatKind.__dict__['_enum_lookup'][2]
+    assert {'cat': Cat, 'dog': Dog} == Pet.__dict__['_discriminator_lookup'][2]
+    validator = Schema.__dict__['_validator'][2]
+    assert validator is Schema._get_validator()
+
+
+def test_warmup_flask_app():
+    app = Flask('test')
+    api = Api(app)
+    for route, resource in create_routes(get_routes()):
+        api.add_resource(resource, route)
+    assert 2 == warmup(app).logic_functions
+    assert 2 == warmup(create_routes(get_routes())).logic_functions
+    assert ['get_pets', 'create_pet'] == [
+        logic.__name__ for logic in iter_logic_functions(app)]
+
+
+@mock.patch('doctor.startup.logging')
+@mock.patch('doctor.startup.warm_type')
+def test_warmup_reports_errors(mock_warm_type, mock_logging):
+    error = ValueError('boom')
+
+    def warm_type(cls):
+        if cls is Pet:
+            raise error
+    mock_warm_type.side_effect = warm_type
+
+    # The types nested in a type that could not be warmed are skipped.
+    report = warmup(get_routes())
+    assert [('Pet', error)] == report.errors
+    mock_logging.warning.assert_called_once_with(
+        'Could not warm up %s: %s', 'Pet', error)
+    assert ('WarmupReport(logic_functions=2, types=5, errors=1, frozen=0)' ==
+            repr(report))
+    assert [] == WarmupReport().errors
+
+
+@mock.patch('doctor.startup.gc')
+def test_warmup_freeze(mock_gc):
+    mock_gc.get_freeze_count.return_value = 1234
+    report = warmup(get_routes())
+    assert 0 == report.frozen
+    assert not mock_gc.freeze.called
+
+    report = warmup(get_routes(), freeze=True)
+    assert 1234 == report.frozen
+    mock_gc.freeze.assert_called_once_with()
@@ -1,14 +1,19 @@
+import copy
 import os
+import threading
 from datetime import date, datetime
 
+import mock
 import pytest
 
 from doctor.errors import TypeSystemError
 from doctor.resource import ResourceSchema
 from doctor.types import (
-    array, Array, boolean, Boolean, enum, Enum, integer, json_schema_type,
-    Object, new_type, number, Number, string, String, MissingDescriptionError,
-    SuperType, UnionType)
+    array, Array, boolean, Boolean, enum, Enum, integer, Integer,
+    json_schema_type, JsonSchema, LazyObject, Object, new_type, number,
+    Number, string, String, MissingDescriptionError, SuperType, UnionType)
+
+from .types import ColorsOrObject
 
 
 class TestSuperType(object):
@@ -26,6 +31,27 @@ class TestSuperType(object):
 
         MyType()
 
+    def test_validate_replaced_after_creation(self):
+        S = string('A string.')
+        I = integer('An integer.')  # noqa: E741
+        validate = mock.Mock(side_effect=TypeSystemError('Nope.'))
+        for cls in (S, I):
+            with mock.patch.object(cls, 'validate', validate):
+                with pytest.raises(TypeSystemError, match='Nope.'):
+                    cls.coerce(cls.native_type(1))
+            cls.coerce(cls.native_type(1))
+
+        def check(cls, value):
+            raise TypeSystemError('Never.')
+
+        S.validate = classmethod(check)
+        with pytest.raises(TypeSystemError, match='Never.'):
+            S('x')
+        with mock.patch.object(I, 'validate', classmethod(check)):
+            with pytest.raises(TypeSystemError, match='Never.'):
+                I(1)
+        I(1)
+
 
 class TestUnionType(object):
 
@@ -78,12 +104,186 @@ class TestUnionType(object):
         # Should be the first native_type in the types attribute.
         assert Item.native_type == bool
 
-        # After instantiating with a value, it should update the native_type
-        # to match the value.
+        # Instantiating with a value should not modify the class.
         assert 'S' == Item('S')
-        assert Item.native_type == str
-        assert Item(True)
         assert Item.native_type == bool
+        assert '_native_type' not in Item.__dict__
+
+    def test_match(self):
+        B = boolean('A bool.')
+        S = string('A string.')
+        Int = integer('An int.')
+
+        class BOrS(UnionType):
+            description = 'B or S.'
+            types = [B, S]
+
+        class Nested(UnionType):
+            description = 'Int or a nested union.'
+            types = [Int, BOrS]
+
+        assert (S, 'S') == BOrS.match('S')
+        assert (B, True) == BOrS.match(True)
+        # The innermost matched type is returned for nested unions.
+        assert (Int, 1) == Nested.match(1)
+        assert (S, 'S') == Nested.match('S')
+
+        class BOrInt(UnionType):
+            description = 'B or Int.'
+            types = [B, Int]
+
+        with pytest.raises(TypeSystemError, match='Value is not one of'):
+            BOrInt.match('foo')
+
+    def test_match_concurrent(self):
+        Int = integer('An int.')
+        S = string('A string.')
+        Obj = new_type(Object, description='An obj.')
+
+        class U(UnionType):
+            description = 'Int, S or Obj.'
+            types = [Int, Obj, S]
+
+        values = [(1, Int), ('one', S), ({'one': 1}, Obj)] * 100
+        failures = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            for _ in range(20):
+                for value, expected in values:
+                    matched, actual = U.match(value)
+                    if matched is not expected or actual != value:
+                        failures.append((value, matched))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [] == failures
+        assert U.native_type == int
+
+
+class TestUnionTypeDispatch(object):
+
+    class Circle(Object):
+        description = 'A circle.'
+        properties = {
+            'kind': enum('circle kind', enum=['circle']),
+            'radius': number('radius', minimum=0),
+        }
+        required = ['kind', 'radius']
+        additional_properties = False
+
+    class Square(Object):
+        description = 'A square.'
+        properties = {
+            'kind': enum('square kind', enum=['square', 'box']),
+            'side': number('side', minimum=0),
+        }
+        required = ['kind', 'side']
+        additional_properties = False
+
+    def test_discriminator(self):
+        circle, square = self.Circle, self.Square
+
+        class Shape(UnionType):
+            description = 'A shape.'
+            types = [circle, square]
+            discriminator = 'kind'
+
+        assert (square, {'kind': 'box', 'side': 2}) == Shape.match(
+            {'kind': 'box', 'side': 2})
+        assert {'kind': 'circle', 'radius': 1} == Shape(
+            {'kind': 'circle', 'radius': 1})
+
+    def test_discriminator_errors_only_for_matched_type(self):
+        circle, square = self.Circle, self.Square
+
+        class Shape(UnionType):
+            description = 'A shape.'
+            types = [circle, square]
+            discriminator = 'kind'
+
+        with pytest.raises(TypeSystemError) as exc:
+            Shape({'kind': 'square', 'side': -1})
+        assert 'Square' in str(exc.value)
+        assert 'Circle' not in str(exc.value)
+
+        with pytest.raises(TypeSystemError) as exc:
+            Shape({'side': 1})
+        assert {'kind': 'This field is required.'} == exc.value.detail
+
+        with pytest.raises(TypeSystemError) as exc:
+            Shape({'kind': 'triangle'})
+        expected = {'kind': "Must be one of: ['box', 'circle', 'square']"}
+        assert expected == exc.value.detail
+
+    def test_discriminator_non_object_value(self):
+        circle = self.Circle
+
+        class CircleOrName(UnionType):
+            description = 'A circle or a name.'
+            types = [circle, string('name')]
+            discriminator = 'kind'
+
+        matched, value = CircleOrName.match('foo')
+        assert matched.native_type is str
+        assert 'foo' == value
+
+    def test_dispatch_json_type(self):
+        S = string('A string.')
+        Int = integer('An int.')
+        Colors = array('colors', items=S)
+
+        class U(UnionType):
+            description = 'S, Int, Colors or an Object.'
+            types = [Colors, S, Int, FooObject]
+            dispatch_json_type = True
+
+        assert (Int, 1) == U.match(1)
+        assert (S, '1') == U.match('1')
+        assert (Colors, ['a']) == U.match(['a'])
+        # Without dispatching the dict would become a list of its keys.
+        assert (FooObject, {'foo': 'bar'}) == U.match({'foo': 'bar'})
+
+        with pytest.raises(TypeSystemError) as exc:
+            U({'foo': 'b'})
+        assert 'FooObject' in str(exc.value)
+        assert 'Colors' not in str(exc.value)
+
+        with pytest.raises(TypeSystemError, match='Must be one of'):
+            U(True)
+
+    def test_dispatch_json_type_keeps_types_without_json_native_type(self):
+        S = string('A string.')
+        J = new_type(JsonSchema, description='A schema.',
+                     schema=ResourceSchema({'type': 'object'}))
+
+        class Anything(SuperType):
+            description = 'Anything.'
+
+            def __new__(cls, value):
+                return value
+
+        class U(UnionType):
+            description = 'S or J.'
+            types = [S, J]
+            dispatch_json_type = True
+
+        assert (J, {'a': 1}) == U.match({'a': 1})
+        assert {'a': 1} == U({'a': 1})
+        assert (S, 'a') == U.match('a')
+
+        class V(UnionType):
+            description = 'S or Anything.'
+            types = [S, Anything]
+            dispatch_json_type = True
+
+        assert (Anything, {'a': 1}) == V.match({'a': 1})
+        assert (S, 'a') == V.match('a')
 
 
 class TestString(object):
@@ -92,6 +292,25 @@ class TestString(object):
         S = string('string')
         assert type(S('string')) is str
 
+    def test_type_str_subclass(self):
+        class MyStr(str):
+            pass
+
+        S = string('string', trim_whitespace=False)
+        actual = S(MyStr('foo'))
+        assert 'foo' == actual
+        assert type(actual) is str
+
+    def test_type_validate_new_type(self):
+        def validate(cls, value):
+            if not value.startswith('foo'):
+                raise TypeSystemError('Does not start with foo')
+
+        S = new_type(string('string'), validate=classmethod(validate))
+        S('foobar')
+        with pytest.raises(TypeSystemError, match='Does not start with foo'):
+            S('barfoo')
+
     def test_type_validate(self):
         class S(String):
             description = 'description'
@@ -144,6 +363,19 @@ class TestString(object):
         with pytest.raises(TypeSystemError):
             S('bar')
 
+        # Changing the pattern uses the new pattern.
+        S.pattern = r'^bar'
+        S('bar')
+        with pytest.raises(TypeSystemError, match=r'Must match the pattern'):
+            S('foo bar')
+
+        # A new type with a different pattern.
+        T = new_type(S, pattern=r'^baz')
+        T('baz')
+        S('bar')
+        with pytest.raises(TypeSystemError, match=r'Must match the pattern'):
+            T('bar')
+
     def test_format_date(self):
         S = string('date', format='date')
         # No exception
@@ -218,8 +450,23 @@ class TestNumericType(object):
 
         N(3)
         N(2)
+        N(2.5)
         with pytest.raises(TypeSystemError, match='Value is < 2'):
             N(1)
+        with pytest.raises(TypeSystemError, match='Value is < 2'):
+            N(1.5)
+
+    def test_native_values(self):
+        I = integer('int', minimum=1)  # noqa
+        N = number('float', maximum=2)
+        for value, expected in ((I(1), 1), (I('2'), 2), (I(2.0), 2),
+                                (N(1.5), 1.5), (N(1), 1.0), (N('1.5'), 1.5)):
+            assert expected == value
+            assert type(value) is type(expected)
+        with pytest.raises(TypeSystemError, match='greater than or equal'):
+            I(0)
+        with pytest.raises(TypeSystemError, match='less than or equal'):
+            N(2.5)
 
     def test_nullable(self):
         N = number('int', nullable=True)
@@ -323,10 +570,13 @@ class TestBoolean(object):
                     raise TypeSystemError('Value must be truthy')
 
         B(1)
+        B(True)
         B('true')
         B('on')
         with pytest.raises(TypeSystemError, match='Value must be truthy'):
             B(0)
+        with pytest.raises(TypeSystemError, match='Value must be truthy'):
+            B(False)
 
     def test_nullable(self):
         B = boolean('bool', nullable=True)
@@ -377,6 +627,13 @@ class TestEnum(object):
         E = enum('choices', enum=['FOO'], uppercase_value=True)
         assert 'FOO' == E('foo')
 
+    def test_wrong_type(self):
+        for E in (enum('choices', enum=['foo']),
+                  enum('choices', enum=['foo'], case_insensitive=True)):
+            for value in ({'foo': 1}, ['foo'], 1):
+                with pytest.raises(TypeSystemError, match='Must be one of'):
+                    E(value)
+
     def test_enum_validate(self):
         class E(Enum):
             description = 'description'
@@ -401,6 +658,55 @@ class TestEnum(object):
         with pytest.raises(TypeSystemError, match=expected_msg):
             E('dog')
 
+    def test_case_insensitive_does_not_modify_enum(self):
+        E = enum('choices', enum=['Foo', 'BAR'], case_insensitive=True)
+        assert 'foo' == E('FOO')
+        assert 'bar' == E('Bar')
+        assert ['Foo', 'BAR'] == E.enum
+
+        E = enum('choices', enum=['Foo', 'bar'], case_insensitive=True,
+                 uppercase_value=True)
+        assert 'BAR' == E('bar')
+        assert ['Foo', 'bar'] == E.enum
+
+    def test_new_type_case_insensitive(self):
+        E = enum('choices', enum=['Foo'])
+        E('Foo')
+        C = new_type(E, case_insensitive=True)
+        assert 'foo' == C('FOO')
+        with pytest.raises(TypeSystemError, match='Must be one of'):
+            E('FOO')
+
+    def test_enum_reassigned(self):
+        E = enum('choices', enum=['foo'])
+        E('foo')
+        E.enum = ['bar']
+        E('bar')
+        with pytest.raises(TypeSystemError, match='Must be one of'):
+            E('foo')
+
+    def test_case_insensitive_concurrent(self):
+        E = enum('choices', enum=['Blue', 'Green'], case_insensitive=True)
+        values = [('BLUE', 'blue'), ('green', 'green'), ('gReEn', 'green')]
+        failures = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            for _ in range(500):
+                for value, expected in values:
+                    if E(value) != expected:
+                        failures.append(value)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [] == failures
+        assert ['Blue', 'Green'] == E.enum
+
     def test_nullalbe(self):
         E = enum('choices', enum=['foo'], nullable=True)
         assert E(None) is None
@@ -636,6 +942,30 @@ class TestArray(object):
         with pytest.raises(TypeSystemError, match='This item is not unique.'):
             A([1, 1, 1, 2])
 
+    def test_unique_items_objects_and_arrays(self):
+        A = array('unique', unique_items=True)
+        # no exception
+        A([{'a': 1, 'b': [1, 2]}, {'a': 1, 'b': [2, 1]}, [1, 2], [2, 1],
+           {'a': True}, {'a': 1}])
+
+        with pytest.raises(TypeSystemError) as exc:
+            A([{'a': 1, 'b': {'c': [1]}}, [1, {'d': 2}],
+               {'b': {'c': [1]}, 'a': 1}, [1, {'d': 2}], 'e',
+               {'a': 1, 'b': {'c': [1]}}])
+        # All duplicate positions are reported.
+        expected = {
+            2: 'This item is not unique.',
+            3: 'This item is not unique.',
+            5: 'This item is not unique.',
+        }
+        assert expected == exc.value.detail
+
+    def test_unique_items_object_items(self):
+        A = array('unique', items=FooObject, unique_items=True)
+        A([{'foo': 'ab'}, {'foo': 'cd'}])
+        with pytest.raises(TypeSystemError, match='This item is not unique.'):
+            A([{'foo': 'ab'}, {'foo': 'ab'}])
+
     def test_get_example(self):
         A = array('No example of items')
         assert [1] == A.get_example()
@@ -652,6 +982,299 @@ class TestArray(object):
         assert ['foo', 123] == A.get_example()
 
 
+class TestCoerce(object):
+
+    class Child(Object):
+        description = 'A child.'
+        properties = {
+            'born': string('birth date', format='date'),
+            'tags': array('tags', items=string('tag'), nullable=True),
+        }
+        required = ['born']
+
+    def test_object(self):
+        Parent = new_type(Object, description='A parent.', properties={
+            'name': string('name'),
+            'children': array('children', items=self.Child),
+            'favorite': new_type(self.Child, nullable=True),
+        })
+        actual = Parent.coerce({
+            'name': ' John ',
+            'children': [{'born': '2018-10-22', 'tags': ['a']},
+                         {'born': '2019-01-02', 'tags': None}],
+            'favorite': None,
+            'other': [1],
+        })
+        assert {
+            'name': 'John',
+            'children': [{'born': date(2018, 10, 22), 'tags': ['a']},
+                         {'born': date(2019, 1, 2), 'tags': None}],
+            'favorite': None,
+            'other': [1],
+        } == actual
+        assert type(actual) is dict
+        assert type(actual['children']) is list
+        assert all(type(c) is dict for c in actual['children'])
+        assert type(actual['children'][0]['tags']) is list
+
+    def test_same_result_as_instantiating(self):
+        values = [{'born': '2018-10-22'}, {'born': 'foo'}, {}, {'born': 1},
+                  'foo', None]
+        for value in values:
+            try:
+                expected = dict(self.Child(value))
+            except TypeSystemError as e:
+                with pytest.raises(TypeSystemError) as exc:
+                    self.Child.coerce(value)
+                assert e.detail == exc.value.detail
+            else:
+                assert expected == self.Child.coerce(value)
+
+    def test_errors(self):
+        A = array('children', items=self.Child, max_items=2)
+        with pytest.raises(TypeSystemError) as exc:
+            A.coerce([{'born': '2018-10-22'}, {'tags': [1]}])
+        assert {1: {'born': 'This field is required.'}} == exc.value.detail
+
+        with pytest.raises(TypeSystemError, match='Too many items'):
+            A.coerce([{'born': '2018-10-22'}] * 3)
+
+        with pytest.raises(TypeSystemError, match='Must be a list'):
+            A.coerce('foo')
+
+    def test_scalars(self):
+        assert '2018-10-22' == string('date', format='date').coerce(
+            '2018-10-22')
+        assert 1 == integer('int').coerce('1')
+        assert integer('int', nullable=True).coerce(None) is None
+
+    def test_union(self):
+        U = new_type(ColorsOrObject)
+        assert ['blue'] == U.coerce(['blue'])
+        actual = U.coerce({'str': 'foo'})
+        assert {'str': 'foo'} == actual
+        assert type(actual) is dict
+
+    def test_custom_init(self):
+        class Custom(Object):
+            description = 'Adds a key.'
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self['added'] = True
+
+        actual = Custom.coerce({'foo': 1})
+        assert {'foo': 1, 'added': True} == actual
+        assert type(actual) is dict
+
+    def test_coerce_json(self):
+        Parent = new_type(Object, description='A parent.', properties={
+            'name': string('name'),
+            'age': integer('age', default=30),
+            'children': array('children', items=self.Child),
+            'ids': array('ids', items=integer('id', minimum=0)),
+        })
+        children = [{'born': '2018-10-22', 'tags': ['a']}]
+        ids = list(range(100))
+        value = {'name': ' John ', 'children': children, 'ids': ids}
+        expected = Parent.coerce(copy.deepcopy(value))
+
+        actual = Parent.coerce_json(value)
+        assert expected == actual
+        assert {'name': 'John', 'age': 30, 'children': [
+            {'born': date(2018, 10, 22), 'tags': ['a']}], 'ids': ids} == actual
+        assert actual is value
+        assert actual['children'] is children
+        assert actual['ids'] is ids
+
+    def test_coerce_json_errors(self):
+        A = array('children', items=self.Child)
+        values = [[{'born': '2018-10-22'}, {'tags': [1]}], 'foo',
+                  [{'born': 'foo', 'tags': None}]]
+        for value in values:
+            with pytest.raises(TypeSystemError) as expected:
+                A.coerce(copy.deepcopy(value))
+            with pytest.raises(TypeSystemError) as actual:
+                A.coerce_json(value)
+            assert expected.value.detail == actual.value.detail
+
+    def test_coerce_json_union(self):
+        # A member that fails part way through must not modify the value.
+        First = new_type(Object, description='First.', properties={
+            'name': string('name', trim_whitespace=True),
+            'count': integer('count'),
+        }, required=['count'])
+        Second = new_type(Object, description='Second.', properties={
+            'name': string('name', trim_whitespace=False),
+        })
+        U = new_type(UnionType, description='Either.', types=[First, Second])
+        assert {'name': ' a '} == U.coerce_json({'name': ' a '})
+
+
+class TestObjectCoerceLazy(object):
+
+    Person = new_type(Object, description='A person.', properties={
+        'name': string('name', min_length=2),
+        'born': string('born', format='date'),
+        'age': integer('age', minimum=0),
+        'tags': array('tags', items=string('tag'), default=[]),
+    }, required=['name'], additional_properties=False,
+        property_dependencies={'age': ['born']})
+
+    def test_lazy(self):
+        value = self.Person.coerce_lazy(
+            {'name': ' Bob ', 'born': '2018-10-22', 'age': -1})
+        assert isinstance(value, LazyObject)
+        assert {'name', 'born', 'age', 'tags'} == set(value)
+        assert 4 == len(value)
+        assert 'Bob' == value['name']
+        assert date(2018, 10, 22) == value['born']
+        assert [] == value['tags']
+        with pytest.raises(TypeSystemError) as exc:
+            value['age']
+        assert {'age': 'Must be greater than or equal to 0.'} == (
+            exc.value.detail)
+        with pytest.raises(KeyError):
+            value['other']
+        with pytest.raises(TypeError):
+            value['name'] = 'Alice'
+
+    def test_structure_validated_eagerly(self):
+        with pytest.raises(TypeSystemError) as exc:
+            self.Person.coerce_lazy({'name': 1, 'other': 1})
+        assert {'other': 'Additional properties are not allowed.'} == (
+            exc.value.detail)
+        with pytest.raises(TypeSystemError) as exc:
+            self.Person.coerce_lazy({})
+        assert {'name': 'This field is required.'} == exc.value.detail
+        with pytest.raises(TypeSystemError, match='Required properties'):
+            self.Person.coerce_lazy({'name': 'Bob', 'age': 1})
+        with pytest.raises(TypeSystemError, match='Must be an object'):
+            self.Person.coerce_lazy('foo')
+        assert new_type(self.Person, nullable=True).coerce_lazy(None) is None
+
+    def test_validate(self):
+        value = {'name': 'Bob', 'born': '2018-10-22', 'age': 3}
+        lazy = self.Person.coerce_lazy(value)
+        assert self.Person.coerce(value) == lazy.validate()
+        assert type(lazy.validate()) is dict
+
+        lazy = self.Person.coerce_lazy({'name': 'B', 'born': 'x', 'age': 1})
+        with pytest.raises(TypeSystemError) as exc:
+            lazy.validate()
+        assert {'name', 'born'} == set(exc.value.detail)
+
+    def test_properties_validated_once(self):
+        calls = []
+
+        class Name(String):
+            description = 'name'
+
+            @classmethod
+            def validate(cls, value):
+                calls.append(value)
+
+        P = new_type(Object, description='P', properties={'name': Name})
+        value = P.coerce_lazy({'name': 'Bob'})
+        assert [] == calls
+        value['name']
+        value['name']
+        assert ['Bob'] == calls
+
+    def test_custom_validate_is_eager(self):
+        class P(Object):
+            description = 'P'
+            properties = {'name': string('name')}
+
+            @classmethod
+            def validate(cls, value):
+                if value['name'] != 'Bob':
+                    raise TypeSystemError('Must be Bob.')
+
+        assert {'name': 'Bob'} == P.coerce_lazy({'name': 'Bob'})
+        with pytest.raises(TypeSystemError, match='Must be Bob'):
+            P.coerce_lazy({'name': 'Alice'})
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def bulk_numeric_backend(request, monkeypatch):
+    """Runs a test with and without NumPy for bulk numeric validation."""
+    import doctor.types
+    if request.param == 'numpy':
+        if doctor.types.numpy is None:
+            pytest.skip('numpy is not installed')
+    else:
+        monkeypatch.setattr(doctor.types, 'numpy', None)
+    return request.param
+
+
+class TestArrayBulkNumeric(object):
+
+    def test_integers(self, bulk_numeric_backend):
+        A = array('ints', items=integer('int', minimum=0, maximum=1000,
+                                        multiple_of=2))
+        values = list(range(0, 1000, 2))
+        actual = A(values)
+        assert values == actual
+        assert all(type(v) is int for v in actual)
+
+        values[10] = 1001
+        values[20] = 3
+        with pytest.raises(TypeSystemError) as exc:
+            A(values)
+        assert {10: 'Must be less than or equal to 1000.',
+                20: 'Must be a multiple of 2.'} == exc.value.detail
+
+    def test_numbers(self, bulk_numeric_backend):
+        A = array('nums', items=number('num', minimum=0, maximum=100,
+                                       exclusive_minimum=True,
+                                       multiple_of=0.5))
+        values = [0.5 * i for i in range(1, 200)] + [1, 2]
+        actual = A(values)
+        assert values == actual
+        assert all(type(v) is float for v in actual)
+
+        for bad, code in ((0, 'Must be greater than 0.'),
+                          (0.25, 'Must be a multiple of 0.5.'),
+                          (float('inf'), 'Must be a finite number.'),
+                          (float('nan'), 'Must be a finite number.')):
+            with pytest.raises(TypeSystemError) as exc:
+                A(values + [bad])
+            assert {len(values): code} == exc.value.detail
+
+    def test_coerced_values_fall_back(self, bulk_numeric_backend):
+        A = array('ints', items=integer('int', maximum=10))
+        values = [1] * 100 + ['2', True, 3.0]
+        assert [1] * 100 + [2, 1, 3] == A(values)
+
+        # Too large to fit in a 64 bit int.
+        B = array('ints', items=integer('int'))
+        values = [1] * 100 + [2 ** 70]
+        assert values == B(values)
+
+    def test_unique_items(self, bulk_numeric_backend):
+        A = array('ints', items=integer('int'), unique_items=True)
+        values = list(range(100))
+        assert values == A(values)
+        with pytest.raises(TypeSystemError) as exc:
+            A(values + [5])
+        assert {100: 'This item is not unique.'} == exc.value.detail
+
+    def test_item_validate_is_called(self, bulk_numeric_backend):
+        class Even(Integer):
+            description = 'An even int.'
+
+            @classmethod
+            def validate(cls, value):
+                if value % 2:
+                    raise TypeSystemError('Must be even.')
+
+        A = array('evens', items=Even)
+        with pytest.raises(TypeSystemError) as exc:
+            A([2] * 100 + [3])
+        assert {100: 'Must be even.'} == exc.value.detail
+
+
 class TestJsonSchema(object):
 
     def test_no_definition_key(self):